@@ -0,0 +1,4 @@
+"""Microbenchmarks for hot paths of the MagentaTV api.
+
+Run a benchmark from the repository root, e.g. ``python -m benchmarks.soap_envelope``.
+"""
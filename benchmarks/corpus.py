@@ -0,0 +1,106 @@
+"""Synthetic receiver traffic used by the benchmarks.
+
+The events are generated, shaped like the property changes of the NOTIFY requests a MR401 sends while zapping
+through a few channels.
+"""
+
+from __future__ import annotations
+
+
+def _eit_changed(channel_code: int, channel_num: int, media_id: int, programs: list[tuple[str, ...]]) -> str:
+    program_info = [
+        f'{{"event_id":"{31788 + index}","start_time":"{start_time}","duration":"{duration}",'
+        f'"running_status":{4 if index == 0 else 1},"free_CA_mode":false,'
+        f'"short_event":[{{"language_code":"DEU","event_name":"{name}","text_char":"{text}"}}]}}'
+        for index, (start_time, duration, name, text) in enumerate(programs)
+    ] or ["{}", "{}"]
+    return (
+        f'{{"type":"EVENT_EIT_CHANGE","instance_id":23,"channel_code":"{channel_code}","channel_num":"{channel_num}",'
+        f'"mediaId":"{media_id}","program_info":[{",".join(program_info)}]}}'
+    )
+
+
+def _play_content(new_play_mode: int, media_code: int) -> str:
+    return f'{{"new_play_mode":{new_play_mode},"playBackState":1,"mediaType":1,"mediaCode":"{media_code}"}}'
+
+
+_CHANNELS = [
+    (
+        378,
+        1,
+        3710,
+        [
+            ("2023/06/14 16:45:00", "00:45:00", "Lebensmitteltricks - Lege packt aus", "Süße Lebensmittelsünden"),
+            ("2023/06/14 17:30:00", "00:45:00", "Hallo Niedersachsen", ""),
+        ],
+    ),
+    (
+        391,
+        4,
+        3713,
+        [
+            ("2023/05/29 09:30:00", "01:40:00", "Ich glaub' mich knutscht ein Elch!", ""),
+            ("2023/05/29 11:10:00", "01:35:00", "Ghostbusters - Die Geisterjäger", ""),
+        ],
+    ),
+    (421, 5, 4806, []),
+    (
+        402,
+        7,
+        3733,
+        [
+            ("2023/06/14 17:00:00", "00:30:00", "Nachrichten", "Mit Sport und Wetter"),
+            ("2023/06/14 17:30:00", "01:00:00", "Dokumentation & Reportage", "Die Welt der Ozeane"),
+        ],
+    ),
+]
+
+# NOTIFY property changes in the order the receiver sends them, including its duplicates
+EVENTS: list[dict[str, str]] = []
+for _channel_code, _channel_num, _media_id, _programs in _CHANNELS:
+    EVENTS.append({"STB_playContent": _play_content(20, _media_id)})
+    EVENTS.append({"STB_EitChanged": _eit_changed(_channel_code, _channel_num, _media_id, _programs)})
+    EVENTS.append({"STB_playContent": _play_content(4, _media_id)})
+    EVENTS.append({"STB_EitChanged": _eit_changed(_channel_code, _channel_num, _media_id, _programs)})
+    EVENTS.append({"STB_EitChanged": _eit_changed(_channel_code, _channel_num, _media_id, _programs)})
+
+
+def _player_state(values: dict[str, str]) -> str:
+    elements = "".join(f"<{name}>{value}</{name}>" for name, value in values.items())
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+        's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/"><s:Body>'
+        f'<u:X-getPlayerStateResponse xmlns:u="urn:schemas-upnp-org:service:X-CTC_RemotePairing:1">{elements}'
+        "</u:X-getPlayerStateResponse></s:Body></s:Envelope>"
+    )
+
+
+# X-getPlayerState responses shaped like the ones of a receiver watching, pausing and in standby
+POLL_RESPONSES: list[str] = [
+    _player_state(
+        {
+            "chanKey": str(_channel_num),
+            "duration": "0",
+            "mediaCode": str(_media_id),
+            "mediaType": "1",
+            "playBackState": "1",
+            "playPostion": "0",
+        }
+    )
+    for _channel_code, _channel_num, _media_id, _programs in _CHANNELS
+]
+POLL_RESPONSES.append(
+    _player_state(
+        {
+            "chanKey": "2",
+            "duration": "1733",
+            "fastSpeed": "0",
+            "mediaCode": "3733",
+            "mediaType": "1",
+            "playBackState": "1",
+            "playPostion": "1718",
+        }
+    )
+)
+POLL_RESPONSES.append(_player_state({"playBackState": "0"}))
@@ -0,0 +1,78 @@
+"""Compare parsing NOTIFY events with a TypeAdapter built per event against the shared parser registry,
+with and without skipping repeated events.
+
+Usage: ``python -m benchmarks.event_parsing``
+"""
+
+from __future__ import annotations
+
+import timeit
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from custom_components.magentatv.api.event_model import (
+    EitChangedEvent,
+    EventDecoder,
+    EventModel,
+    PlayContentEvent,
+    parse_changes,
+)
+
+from .corpus import EVENTS
+
+ROUNDS = 200
+
+
+def legacy_parse(changes: Mapping[str, str]) -> dict[str, EventModel]:
+    """Parsing as done by MediaReceiver._async_on_event before the registry was introduced."""
+    if "STB_playContent" in changes:
+        ta = TypeAdapter(PlayContentEvent)
+        return {"STB_playContent": ta.validate_json(changes["STB_playContent"])}
+    ta = TypeAdapter(EitChangedEvent)
+    return {"STB_EitChanged": ta.validate_json(changes["STB_EitChanged"])}
+
+
+def decoder_parse() -> Callable[[Mapping[str, str]], dict[str, EventModel]]:
+    # one decoder per replay of the corpus, like one per receiver
+    return EventDecoder().decode
+
+
+def _normalized(events: dict[str, EventModel]) -> dict[str, dict[str, Any]]:
+    # the registry validates the program info lazily, compare the validated programs instead of the raw field
+    return {
+        variable: {field: getattr(event, field) for field in event.set_keys() if field != "program_info"}
+        | {"programs": getattr(event, "programs", None)}
+        for variable, event in events.items()
+    }
+
+
+def _run(parse) -> None:
+    for changes in EVENTS:
+        parse(changes)
+
+
+def _measure(name: str, parser_factory) -> float:
+    seconds = min(timeit.repeat(lambda: _run(parser_factory()), number=ROUNDS, repeat=5))
+    events_per_second = ROUNDS * len(EVENTS) / seconds
+    print(f"{name:<36} {events_per_second:10.0f} events/s")
+    return events_per_second
+
+
+def main() -> None:
+    decode = decoder_parse()
+    for changes in EVENTS:
+        legacy = _normalized(legacy_parse(changes))
+        assert legacy == _normalized(parse_changes(changes))
+        assert legacy == _normalized(decode(changes))
+
+    legacy = _measure("TypeAdapter per event", lambda: legacy_parse)
+    registry = _measure("parser registry", lambda: parse_changes)
+    decoder = _measure("parser registry, skipping repeats", decoder_parse)
+    print(f"{'speedup (registry)':<36} {registry / legacy:10.1f}x")
+    print(f"{'speedup (skipping repeats)':<36} {decoder / legacy:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Load test of a local NotifyServer, comparing NOTIFY bodies parsed in the event loop against bodies parsed in a
+pool of worker threads.
+
+The NOTIFYs of RECEIVERS subscriptions are sent from a separate process, every one on a new connection like the
+receivers do. Several SO_REUSEPORT listener sockets are not compared, all of them would be served by the same
+Home Assistant event loop.
+
+Usage: ``python -m benchmarks.notify_load [requests] [concurrency]``
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+
+import aiohttp
+
+from custom_components.magentatv.api import NotifyServer
+from custom_components.magentatv.api.notify_parser import NotifyBodyParser
+from custom_components.magentatv.api.subscription import Subscription
+
+from .corpus import EVENTS
+from .notify_parsing import notify_body
+
+REQUESTS = 5000
+CONCURRENCY = 100
+RECEIVERS = 50
+PARSER_WORKERS = 2
+
+
+def _parse_notify_body(body: bytes) -> dict[str, str]:
+    parser = NotifyBodyParser()
+    parser.feed(body)
+    return parser.close()
+
+
+class WorkerParsingNotifyServer(NotifyServer):
+    """NotifyServer reading the complete body and parsing it in a thread pool, only the changes return to the loop"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.executor = ThreadPoolExecutor(max_workers=PARSER_WORKERS, thread_name_prefix="notify_parser")
+
+    async def _handle_notify_stream(self, headers: Mapping[str, str], content: aiohttp.StreamReader) -> HTTPStatus:
+        if status := self._validate_notify_headers(headers):
+            return status
+        body = await content.read()
+        changes = await asyncio.get_running_loop().run_in_executor(self.executor, _parse_notify_body, body)
+        self._notify_subscribed_callbacks(headers.get("SID"), changes)
+        return HTTPStatus.OK
+
+
+MODES: list[tuple[str, type[NotifyServer]]] = [
+    ("parsing in loop", NotifyServer),
+    (f"{PARSER_WORKERS} parser workers", WorkerParsingNotifyServer),
+]
+
+
+async def _async_generate_load(url: str, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    bodies = [notify_body(changes) for changes in EVENTS]
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True, limit=0)) as session:
+
+        async def notify(index: int) -> None:
+            headers = {"NT": "upnp:event", "NTS": "upnp:propchange", "SID": f"uuid:{index % RECEIVERS}"}
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.request("NOTIFY", url, headers=headers, data=bodies[index % len(bodies)]) as resp:
+                    assert resp.status == 200
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[notify(index) for index in range(requests)])
+        return time.perf_counter() - start, latencies
+
+
+def _generate_load(url: str, requests: int, concurrency: int) -> tuple[float, list[float]]:
+    return asyncio.run(_async_generate_load(url, requests, concurrency))
+
+
+async def _run(name: str, server_class: type[NotifyServer], requests: int, concurrency: int) -> None:
+    server = server_class(listen=("127.0.0.1", 0))
+    received = 0
+
+    async def on_event(changes) -> None:
+        nonlocal received
+        received += 1
+
+    await server.async_start()
+    subscriptions = [
+        Subscription(
+            f"uuid:{index}",
+            (f"10.0.0.{index}", 8081),
+            "X-CTC_RemotePairing",
+            on_event,
+            dispatch_stats=server.dispatch_stats,
+        )
+        for index in range(RECEIVERS)
+    ]
+    for subscription in subscriptions:
+        server._subscription_registry.add(subscription)
+
+    url = f"http://127.0.0.1:{server._sockets[0].getsockname()[1]}/eventSub"
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        seconds, latencies = await asyncio.get_running_loop().run_in_executor(
+            executor, _generate_load, url, requests, concurrency
+        )
+
+    for subscription in subscriptions:
+        await subscription.queue.async_join()
+        server._subscription_registry.remove(subscription)
+    stats = server.dispatch_stats
+    assert stats.dispatched + stats.coalesced + stats.dropped == requests
+    assert received == stats.dispatched
+
+    server._resubscribe_task.cancel()
+    await server.async_stop()
+    if isinstance(server, WorkerParsingNotifyServer):
+        server.executor.shutdown()
+
+    latencies.sort()
+    print(
+        f"{name:<20} {requests / seconds:8.0f} NOTIFY/s   "
+        f"p50 {statistics.median(latencies) * 1000:6.1f} ms   "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms   "
+        f"delivered {stats.dispatched}, coalesced {stats.coalesced}"
+    )
+
+
+async def main(requests: int, concurrency: int) -> None:
+    for name, server_class in MODES:
+        await _run(name, server_class, requests, concurrency)
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    asyncio.run(main(*(arguments + [REQUESTS, CONCURRENCY][len(arguments) :])))
@@ -0,0 +1,103 @@
+"""Compare peak memory and cpu time of buffered and streaming NOTIFY body parsing.
+
+Usage: ``python -m benchmarks.notify_parsing``
+"""
+
+from __future__ import annotations
+
+import re
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable, Mapping
+
+import defusedxml.ElementTree as Et
+from async_upnp_client.client import NS
+
+from custom_components.magentatv.api.notify_parser import DEFAULT_CHUNK_SIZE, NotifyBodyParser
+
+from .corpus import EVENTS
+
+ROUNDS = 200
+# the EPG of a whole evening sent in one burst while zapping
+BURST = 40
+
+_invalid_ampersand_re = re.compile(r"&(?![a-z0-9]+;)")
+
+
+def notify_body(changes: Mapping[str, str]) -> bytes:
+    properties = "".join(f"<e:property><{name}>{value}</{name}></e:property>" for name, value in changes.items())
+    return (
+        f'<?xml version="1.0"?>\n<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">{properties}</e:propertyset>'
+    ).encode()
+
+
+def _received(body: bytes) -> list[bytes]:
+    return [body[i : i + DEFAULT_CHUNK_SIZE] for i in range(0, len(body), DEFAULT_CHUNK_SIZE)]
+
+
+def buffered_parse(chunks: list[bytes]) -> dict[str, str]:
+    """Parsing as done by NotifyServer._handle_notify after request.text()"""
+    body = b"".join(chunks).decode()
+    fixed_body = _invalid_ampersand_re.sub("&amp;", body)
+    changes = {}
+    el_root = Et.fromstring(fixed_body)
+    for el_property in el_root.findall("./event:property", NS):
+        for el_state_var in el_property:
+            changes[el_state_var.tag] = el_state_var.text or ""
+    return changes
+
+
+def streaming_parse(chunks: list[bytes]) -> dict[str, str]:
+    parser = NotifyBodyParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+def _peak_memory(parse: Callable[[list[bytes]], dict[str, str]], requests: list[list[bytes]]) -> int:
+    peak = 0
+    tracemalloc.start()
+    for chunks in requests:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        parse(chunks)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+    return peak
+
+
+def _cpu_time(parse: Callable[[list[bytes]], dict[str, str]], requests: list[list[bytes]]) -> float:
+    def run() -> None:
+        for chunks in requests:
+            parse(chunks)
+
+    seconds = min(timeit.repeat(run, timer=time.process_time, number=ROUNDS, repeat=5))
+    return seconds / (ROUNDS * len(requests)) * 1e6
+
+
+def _report(title: str, requests: list[list[bytes]]) -> None:
+    size = max(sum(len(chunk) for chunk in chunks) for chunks in requests)
+    print(f"{title} (largest body {size} bytes)")
+    for name, parse in [("buffered", buffered_parse), ("streaming", streaming_parse)]:
+        peak = _peak_memory(parse, requests)
+        cpu = _cpu_time(parse, requests)
+        print(f"  {name:<12} peak {peak / 1024:8.1f} KiB   cpu {cpu:8.1f} us/event")
+
+
+def main() -> None:
+    requests = [_received(notify_body(changes)) for changes in EVENTS]
+    for chunks in requests:
+        assert buffered_parse(chunks) == streaming_parse(chunks)
+
+    # several EIT changes batched into a single NOTIFY
+    eit_changes = [changes["STB_EitChanged"] for changes in EVENTS if "STB_EitChanged" in changes]
+    burst = _received(notify_body({f"STB_EitChanged{i}": eit_changes[i % len(eit_changes)] for i in range(BURST)}))
+    assert buffered_parse(burst) == streaming_parse(burst)
+
+    _report("recorded events", requests)
+    _report("burst", [burst])
+
+
+if __name__ == "__main__":
+    main()
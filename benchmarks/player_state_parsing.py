@@ -0,0 +1,66 @@
+"""Compare parsing X-getPlayerState responses through an element tree and a dict validated by pydantic, with the
+plain and the defused ElementTree, against the single-pass parser.
+
+Usage: ``python -m benchmarks.player_state_parsing``
+"""
+
+from __future__ import annotations
+
+import timeit
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+
+import defusedxml.ElementTree as Et
+
+from custom_components.magentatv.api.event_model import PLAYER_STATE_PARSER, PlayContentEvent
+from custom_components.magentatv.api.player_state_parser import parse_player_state
+
+from .corpus import POLL_RESPONSES
+
+ROUNDS = 2000
+
+
+def _tree_parse(fromstring: Callable[[str], ET.Element]) -> Callable[[str], PlayContentEvent]:
+    def parse(body: str) -> PlayContentEvent:
+        tree = fromstring(body)
+        result = {}
+        for child in tree[0][0]:
+            result[child.tag] = child.text
+        return PLAYER_STATE_PARSER.validate_python(result)
+
+    return parse
+
+
+# parsing as done by Client.async_get_player_state and MediaReceiver.async_update before, without entity protection
+legacy_parse = _tree_parse(ET.fromstring)
+# the same with the parser the notify server uses
+defused_parse = _tree_parse(Et.fromstring)
+
+
+def _measure(name: str, parse: Callable[[str], PlayContentEvent]) -> float:
+    def run() -> None:
+        for body in POLL_RESPONSES:
+            parse(body)
+
+    seconds = min(timeit.repeat(run, number=ROUNDS, repeat=5))
+    microseconds = seconds / (ROUNDS * len(POLL_RESPONSES)) * 1e6
+    print(f"{name:<28} {microseconds:8.2f} us/response")
+    return microseconds
+
+
+def main() -> None:
+    for body in POLL_RESPONSES:
+        expected = legacy_parse(body)
+        for parse in (defused_parse, parse_player_state):
+            parsed = parse(body)
+            assert parsed == expected
+            assert parsed.fields_set == expected.fields_set
+
+    single_pass = _measure("single pass", parse_player_state)
+    for name, parse in [("element tree + pydantic", legacy_parse), ("defusedxml tree + pydantic", defused_parse)]:
+        microseconds = _measure(name, parse)
+        print(f"{'':<28} {microseconds / single_pass:8.1f}x single pass")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare collecting the set fields of parsed events by serializing them against the cached field set.
+
+Usage: ``python -m benchmarks.set_keys``
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from custom_components.magentatv.api.event_model import EventModel, parse_changes
+
+from .corpus import EVENTS
+
+ROUNDS = 500
+# the state machine looks at the field set of an event about this often
+LOOKUPS_PER_EVENT = 2
+
+
+def legacy_set_keys(event: EventModel):
+    """set_keys() as implemented before the field set was cached."""
+    return event.model_dump(exclude_unset=True, by_alias=False).keys()
+
+
+def _parsed_events() -> list[EventModel]:
+    # fresh objects every time, the cached field set must not survive from a previous run
+    return [event for changes in EVENTS for event in parse_changes(changes).values()]
+
+
+def _measure(name: str, set_keys) -> float:
+    timings = []
+    for _ in range(5):
+        batches = [_parsed_events() for _ in range(ROUNDS)]
+        start = timeit.default_timer()
+        for events in batches:
+            for event in events:
+                for _ in range(LOOKUPS_PER_EVENT):
+                    set_keys(event)
+        timings.append(timeit.default_timer() - start)
+    per_event = min(timings) / (ROUNDS * len(EVENTS)) * 1e9
+    print(f"{name:<36} {per_event:8.0f} ns/event")
+    return per_event
+
+
+def main() -> None:
+    for event in _parsed_events():
+        assert legacy_set_keys(event) == event.set_keys()
+
+    legacy_ns = _measure("model_dump(exclude_unset=True)", legacy_set_keys)
+    cached_ns = _measure("cached fields_set", EventModel.set_keys)
+    print(f"{'speedup':<36} {legacy_ns / cached_ns:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
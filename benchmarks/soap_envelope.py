@@ -0,0 +1,113 @@
+"""Compare building SOAP requests from scratch with rendering precompiled templates.
+
+Usage: ``python -m benchmarks.soap_envelope``
+"""
+
+from __future__ import annotations
+
+import timeit
+from collections.abc import Mapping
+from xml.sax.saxutils import escape
+
+from async_upnp_client.const import HttpRequest
+
+from custom_components.magentatv.api.soap import SoapRequestTemplate, slot
+
+HOST = "192.168.1.23"
+PORT = 8081
+TERMINAL_ID = "0CBC6611F5540BD0809A388DC95A615B"
+VERIFICATION_CODE = "A1C9F2B8E4D7A3C2B1E0F9D8C7B6A5E4"
+USER_ID = "5F4DCC3B5AA765D61D8327DEB882CF99"
+ROUNDS = 100_000
+
+
+def legacy_request(service: str, action: str, attributes: Mapping[str, str]) -> HttpRequest:
+    """Request building as done by Client._async_send_upnp_soap before templates were introduced."""
+    attributes = "".join([f"   <{k}>{escape(v)}</{k}>\n" for k, v in attributes.items()])
+    full_body = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n'
+        " <s:Body>\n"
+        f'  <u:{action} xmlns:u="urn:schemas-upnp-org:service:{service}:1">\n'
+        f"{attributes}"
+        f"  </u:{action}>\n"
+        " </s:Body>\n"
+        "</s:Envelope>"
+    )
+    return HttpRequest(
+        method="POST",
+        url=f"http://{HOST}:{PORT}/upnp/service/{service}/Control",
+        headers={
+            "SOAPACTION": f"urn:schemas-upnp-org:service:{service}:1#{action}",
+            "HOST": f"{HOST}:{PORT}",
+            "Content-Type": 'text/xml; charset="utf-8"',
+        },
+        body=full_body,
+    )
+
+
+def legacy_send_key() -> HttpRequest:
+    return legacy_request(
+        "X-CTC_RemoteControl",
+        "X_CTC_RemoteKey",
+        {
+            "InstanceID": "0",
+            "KeyCode": f"keyCode=0x0031^{TERMINAL_ID}:{VERIFICATION_CODE}^userID:{USER_ID}",
+        },
+    )
+
+
+def legacy_get_player_state() -> HttpRequest:
+    return legacy_request(
+        "X-CTC_RemotePairing",
+        "X-getPlayerState",
+        {"pairingDeviceID": TERMINAL_ID, "verificationCode": VERIFICATION_CODE},
+    )
+
+
+REMOTE_KEY_TEMPLATE = SoapRequestTemplate(
+    HOST,
+    PORT,
+    "X-CTC_RemoteControl",
+    "X_CTC_RemoteKey",
+    {"InstanceID": "0", "KeyCode": f"{slot('command')}^{TERMINAL_ID}:{VERIFICATION_CODE}^userID:{USER_ID}"},
+)
+PLAYER_STATE_TEMPLATE = SoapRequestTemplate(
+    HOST,
+    PORT,
+    "X-CTC_RemotePairing",
+    "X-getPlayerState",
+    {"pairingDeviceID": TERMINAL_ID, "verificationCode": VERIFICATION_CODE},
+)
+
+
+def template_send_key() -> HttpRequest:
+    return REMOTE_KEY_TEMPLATE.request(command="keyCode=0x0031")
+
+
+def template_get_player_state() -> HttpRequest:
+    return PLAYER_STATE_TEMPLATE.request()
+
+
+def _measure(name: str, func) -> float:
+    seconds = min(timeit.repeat(func, number=ROUNDS, repeat=5))
+    per_call = seconds / ROUNDS * 1e9
+    print(f"{name:<36} {per_call:8.0f} ns/request")
+    return per_call
+
+
+def main() -> None:
+    assert legacy_send_key() == template_send_key()
+    assert legacy_get_player_state() == template_get_player_state()
+
+    for action, legacy, template in [
+        ("X_CTC_RemoteKey", legacy_send_key, template_send_key),
+        ("X-getPlayerState", legacy_get_player_state, template_get_player_state),
+    ]:
+        legacy_ns = _measure(f"{action} (string building)", legacy)
+        template_ns = _measure(f"{action} (template)", template)
+        print(f"{'speedup':<36} {legacy_ns / template_ns:8.1f}x\n")
+
+
+if __name__ == "__main__":
+    main()
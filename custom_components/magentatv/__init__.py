@@ -10,28 +10,37 @@ from asyncio import Lock
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.config_entries import SOURCE_IGNORE, ConfigEntry
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
 from homeassistant.core import Event, HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.typing import ConfigType
 
 from custom_components.magentatv.api import NotifyServer
+from custom_components.magentatv.api.notify_server import DEFAULT_IDLE_LINGER
 
 from .const import (
     CONF_ADVERTISE_ADDRESS,
     CONF_ADVERTISE_PORT,
+    CONF_COALESCING_WINDOW,
+    CONF_IDLE_LINGER,
     CONF_LISTEN_ADDRESS,
     CONF_LISTEN_PORT,
     CONF_USER_ID,
     DATA_ADVERTISE_ADDRESS,
     DATA_ADVERTISE_PORT,
+    DATA_COALESCING_WINDOW,
+    DATA_IDLE_LINGER,
     DATA_LISTEN_ADDRESS,
     DATA_LISTEN_PORT,
     DATA_NOTIFICATION_SERVER,
+    DATA_STARTUP_COORDINATOR,
     DATA_USER_ID,
     DOMAIN,
     LOGGER,
+    listen_address,
 )
+from .startup import StartupCoordinator
 
 PLATFORMS: list[Platform] = [Platform.MEDIA_PLAYER]
 
@@ -47,10 +56,12 @@ CONFIG_SCHEMA: vol.Schema = vol.Schema(
         DOMAIN: vol.Schema(
             {
                 vol.Optional(CONF_LISTEN_PORT, default="11223"): cv.port,
-                vol.Optional(CONF_LISTEN_ADDRESS, default="0.0.0.0"): str,
+                vol.Optional(CONF_LISTEN_ADDRESS, default="0.0.0.0"): vol.All(cv.ensure_list, [listen_address]),
                 vol.Optional(CONF_ADVERTISE_PORT): cv.port,
                 vol.Optional(CONF_ADVERTISE_ADDRESS): str,
                 vol.Optional(CONF_USER_ID): int,  # optional -> not required to
+                vol.Optional(CONF_IDLE_LINGER): vol.All(vol.Coerce(float), vol.Range(min=0, max=3600)),
+                vol.Optional(CONF_COALESCING_WINDOW): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
             },
             extra=vol.PREVENT_EXTRA,
         )
@@ -73,6 +84,8 @@ async def async_setup(hass: HomeAssistant, entry: ConfigType):
             CONF_LISTEN_PORT: DATA_LISTEN_PORT,
             CONF_ADVERTISE_ADDRESS: DATA_ADVERTISE_ADDRESS,
             CONF_ADVERTISE_PORT: DATA_ADVERTISE_PORT,
+            CONF_IDLE_LINGER: DATA_IDLE_LINGER,
+            CONF_COALESCING_WINDOW: DATA_COALESCING_WINDOW,
         }
         for k, v in mapping.items():
             if k in config:
@@ -87,6 +100,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
     LOGGER.info("MagentaTV setup entry")
 
+    try:
+        await async_get_startup_coordinator(hass)
+    except OSError as err:
+        # e.g. the listen port is in use, retried by Home Assistant
+        raise ConfigEntryNotReady(f"Failed to start the notify server: {err}") from err
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     return True
@@ -108,15 +127,17 @@ async def async_get_notification_server(hass: HomeAssistant) -> NotifyServer:
         else:
             LOGGER.info("Setup Notify Server for MagentaTV")
 
+            listen_port = domain_data.get(DATA_LISTEN_PORT, 11223)
             domain_data[DATA_NOTIFICATION_SERVER] = notify_server = NotifyServer(
-                listen=(
-                    domain_data.get(DATA_LISTEN_ADDRESS, "0.0.0.0"),
-                    domain_data.get(DATA_LISTEN_PORT, 11223),
-                ),
+                listen=[
+                    (address, port or listen_port)
+                    for address, port in domain_data.get(DATA_LISTEN_ADDRESS, [("0.0.0.0", None)])
+                ],
                 advertise=(
                     domain_data.get(DATA_ADVERTISE_ADDRESS, None),
                     domain_data.get(DATA_ADVERTISE_PORT, None),
                 ),
+                idle_linger=domain_data.get(DATA_IDLE_LINGER, DEFAULT_IDLE_LINGER),
             )
 
             async def async_close_connection(_: Event) -> None:
@@ -126,3 +147,21 @@ async def async_get_notification_server(hass: HomeAssistant) -> NotifyServer:
             hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_connection)
 
             return notify_server
+
+
+async def async_get_startup_coordinator(hass: HomeAssistant) -> StartupCoordinator:
+    """Coordinator of the receivers configured at startup, the notify server is started once for all of them.
+
+    Raises OSError if the notify server cannot listen, the server is started again by the next call.
+    """
+    # does nothing while the server is running
+    await (await async_get_notification_server(hass)).async_start()
+
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_STARTUP_COORDINATOR not in domain_data:
+        domain_data[DATA_STARTUP_COORDINATOR] = StartupCoordinator(
+            entry.entry_id
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.source != SOURCE_IGNORE and entry.disabled_by is None
+        )
+    return domain_data[DATA_STARTUP_COORDINATOR]
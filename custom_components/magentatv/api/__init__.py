@@ -1,7 +1,8 @@
-from .client import Client
+from .client import Client, KeyTiming
 from .const import KeyCode
 from .event_model import EitChangedEvent, PlayContentEvent
 from .notify_server import Callback, NotifyServer
+from .poll_scheduler import PollScheduler
 from .state_machine import MediaReceiverStateMachine, State
 
 __all__ = [
@@ -11,6 +12,8 @@ __all__ = [
     "EitChangedEvent",
     "PlayContentEvent",
     "MediaReceiverStateMachine",
+    "PollScheduler",
     "State",
     "KeyCode",
+    "KeyTiming",
 ]
@@ -0,0 +1,143 @@
+"""Selection of the callback address advertised to a receiver when subscribing."""
+
+from __future__ import annotations
+
+import ipaddress
+import time
+from collections.abc import Callable, Sequence
+from typing import NamedTuple
+
+from .const import LOGGER
+
+DEFAULT_ADVERTISE_CACHE_TTL = 600
+
+
+class ListenAddress(NamedTuple):
+    """Address the notify server listens on.
+
+    The interface may carry the prefix length of its network ("10.1.0.5/24"), receivers within that network are
+    then called back on this address.
+    """
+
+    interface: ipaddress.IPv4Interface
+    port: int
+
+    @classmethod
+    def parse(cls, address: str, port: int) -> ListenAddress:
+        return cls(ipaddress.IPv4Interface(address), port)
+
+    @property
+    def host(self) -> str:
+        return str(self.interface.ip)
+
+    @property
+    def wildcard(self) -> bool:
+        return self.interface.ip.is_unspecified
+
+
+def select_advertise_address(
+    target_host: str, listen: Sequence[ListenAddress], local_ip: Callable[[], str]
+) -> tuple[str, int]:
+    """Callback address for a receiver.
+
+    Prefers the listen address whose network contains the receiver. Otherwise the local address routing to the
+    receiver (local_ip) is used, together with the port of the socket listening on it.
+    """
+    assert listen
+
+    try:
+        target = ipaddress.IPv4Address(target_host)
+    except ValueError:
+        # a host name, only the routing can tell
+        target = None
+    if target is not None:
+        for address in listen:
+            if not address.wildcard and target in address.interface.network:
+                return address.host, address.port
+
+    host = local_ip()
+    for address in listen:
+        if address.host == host:
+            return host, address.port
+    for address in listen:
+        if address.wildcard:
+            return host, address.port
+
+    fallback = listen[0]
+    LOGGER.warning(
+        "%s is routed through %s, which is not listened on. Advertising %s:%s instead",
+        target_host,
+        host,
+        fallback.host,
+        fallback.port,
+    )
+    return fallback.host, fallback.port
+
+
+class AdvertiseCacheStats:
+    """Counters about the lookups of an AdvertiseAddressCache"""
+
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+    def __repr__(self) -> str:
+        return (
+            f"AdvertiseCacheStats(hits={self.hits}, misses={self.misses}, invalidations={self.invalidations}, "
+            f"hit_rate={self.hit_rate:.2f})"
+        )
+
+
+class AdvertiseAddressCache:
+    """Callback addresses by receiver host, kept for ttl seconds.
+
+    Resolving the address may require a routing lookup, which is not worth repeating for every subscription.
+    Entries are invalidated when subscribing fails, as the network configuration may have changed.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_ADVERTISE_CACHE_TTL, clock: Callable[[], float] = time.monotonic) -> None:
+        assert ttl > 0
+
+        self._ttl = ttl
+        self._clock = clock
+        self._addresses: dict[str, tuple[float, tuple[str, int]]] = {}
+        self._stats = AdvertiseCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._addresses)
+
+    @property
+    def stats(self) -> AdvertiseCacheStats:
+        return self._stats
+
+    def get(self, host: str, resolve: Callable[[], tuple[str, int]]) -> tuple[str, int]:
+        """Cached address of host, resolved again once it expired."""
+        entry = self._addresses.get(host)
+        now = self._clock()
+        if entry is not None and now - entry[0] < self._ttl:
+            self._stats.hits += 1
+            return entry[1]
+
+        self._stats.misses += 1
+        address = resolve()
+        self._addresses[host] = (now, address)
+        return address
+
+    def invalidate(self, host: str | None = None) -> None:
+        """Forget the address of host, or all addresses, e.g. after the network configuration changed."""
+        if host is None:
+            removed = len(self._addresses)
+            self._addresses.clear()
+        else:
+            removed = int(self._addresses.pop(host, None) is not None)
+        self._stats.invalidations += removed
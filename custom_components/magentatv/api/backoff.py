@@ -0,0 +1,54 @@
+import random
+from collections.abc import Callable
+
+
+class ExponentialBackoff:
+    """Exponentially growing delay with random jitter, used to space out retries towards unresponsive receivers."""
+
+    _failures: int = 0
+    _base: float = 0
+    _delay: float = 0
+
+    def __init__(
+        self,
+        initial: float,
+        maximum: float,
+        factor: float = 2.0,
+        jitter: float = 0.1,
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        assert 0 < initial <= maximum
+        assert factor >= 1
+        assert 0 <= jitter < 1
+
+        self._initial = initial
+        self._maximum = maximum
+        self._factor = factor
+        self._jitter = jitter
+        self._rand = rand
+
+        self._failures = 0
+        self._base = 0
+        self._delay = 0
+
+    @property
+    def active(self) -> bool:
+        return self._failures > 0
+
+    @property
+    def delay(self) -> float:
+        """Delay returned by the last call to next(), 0 when not backing off."""
+        return self._delay
+
+    def next(self) -> float:
+        """Register a failure and return the delay until the next attempt."""
+        self._base = min(self._base * self._factor, self._maximum) if self._failures else self._initial
+        self._failures += 1
+        # spread +/- jitter around the base delay, so receivers failing at the same time do not retry in lockstep
+        self._delay = self._base * (1 + self._jitter * (2 * self._rand() - 1))
+        return self._delay
+
+    def reset(self) -> None:
+        self._failures = 0
+        self._base = 0
+        self._delay = 0
@@ -3,27 +3,54 @@
 from __future__ import annotations
 
 import asyncio
-import xml.etree.ElementTree as ET
-from collections.abc import Mapping
+import re
+from collections.abc import Callable, Mapping, Sequence
+from typing import NamedTuple
 from urllib.parse import urlencode
-from xml.sax.saxutils import escape
 
-from async_upnp_client.aiohttp import AiohttpRequester
 from async_upnp_client.const import HttpRequest, HttpResponse
 from async_upnp_client.exceptions import UpnpCommunicationError, UpnpConnectionError, UpnpConnectionTimeoutError
 
+from .backoff import ExponentialBackoff
 from .const import LOGGER, KeyCode
+from .event_model import PlayContentEvent
 from .exceptions import (
     CommunicationException,
     CommunicationTimeoutException,
     NotPairedException,
     PairingTimeoutException,
 )
+from .fanout import EventFanout, ListenerStats
 from .notify_server import NotifyServer
+from .player_state_parser import parse_player_state
+from .session import (
+    DEFAULT_KEEPALIVE_TIMEOUT,
+    DEFAULT_LIMIT_PER_HOST,
+    ConnectionPool,
+    ConnectionPoolStats,
+    track_written,
+)
+from .soap import SoapRequestTemplate, slot
+from .subscription import Callback, Subscription
 from .utils import magenta_hash
 
 PAIRING_EVENT_TIMEOUT = 5
 PAIRING_ATTEMPTS = 3
+PAIRING_BACKOFF_INITIAL = 1
+PAIRING_BACKOFF_MAXIMUM = 30
+DEFAULT_INTER_KEY_DELAY = 0.1
+# UPnP error "Action not Authorized", the receiver does not accept the verification code
+UPNP_ERROR_NOT_AUTHORIZED = 606
+
+_UPNP_ERROR_CODE = re.compile(r"<errorCode>\s*(\d+)\s*</errorCode>")
+
+
+class KeyTiming(NamedTuple):
+    """Timing of a single key of a key sequence, in seconds."""
+
+    key: KeyCode
+    sent: float  # offset to the start of the sequence
+    latency: float  # time until the receiver acknowledged the key
 
 
 class Client:
@@ -36,8 +63,15 @@ class Client:
         user_id: str,
         instance_id: str,
         notify_server: NotifyServer,
+        connection_limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+        connection_keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        verification_code: str | None = None,
     ) -> None:
-        """Sample API Client."""
+        """Sample API Client.
+
+        A verification_code of an earlier pairing with the same instance and user is reused by async_pair, skipping
+        the pairing handshake until the receiver rejects it.
+        """
         self._host = host
         self._port = port
         self._url = "http://" + self._host + ":" + str(self._port)
@@ -47,40 +81,72 @@ class Client:
         self._terminal_id = magenta_hash(instance_id)
 
         self._user_id = magenta_hash(user_id)
-        self._requester = AiohttpRequester(http_headers={"User-Agent": "Homeassistant MagentaTV Integration"})
+        # one keep-alive pool per receiver, shared by polling, key sends and pairing
+        self._connection_pool = ConnectionPool(
+            limit_per_host=connection_limit_per_host,
+            keepalive_timeout=connection_keepalive_timeout,
+            http_headers={"User-Agent": "Homeassistant MagentaTV Integration"},
+        )
 
         self._verification_code = None
+        self._stored_verification_code = verification_code
+        self._soap_templates: dict[tuple[str, str], SoapRequestTemplate] = {}
 
-        self._event_registration_id = None
+        self._event_subscription: Subscription | None = None
         self._pairing_event = asyncio.Event()
+        self._pairing_backoff = ExponentialBackoff(initial=PAIRING_BACKOFF_INITIAL, maximum=PAIRING_BACKOFF_MAXIMUM)
 
-        self._event_listeners = []
+        self._event_fanout = EventFanout()
 
-    def subscribe(self, callback):
-        if callback not in self._event_listeners:
-            self._event_listeners.append(callback)
+    def subscribe(self, callback: Callback) -> None:
+        self._event_fanout.add(callback)
+
+    def unsubscribe(self, callback: Callback) -> None:
+        self._event_fanout.remove(callback)
+
+    @property
+    def listener_stats(self) -> Mapping[Callback, ListenerStats]:
+        return self._event_fanout.stats
+
+    @property
+    def connection_stats(self) -> ConnectionPoolStats:
+        return self._connection_pool.stats
 
     async def async_close(self):
-        if self._event_registration_id:
-            await self._notify_server.async_unsubscribe(self._event_registration_id)
-            self._event_registration_id = None
+        self._event_fanout.close()
+        await self._async_reset_pairing()
+        await self._connection_pool.async_close()
+
+    async def _async_reset_pairing(self):
+        if self._event_subscription:
+            await self._notify_server.async_unsubscribe(self._event_subscription, self._on_event)
+            self._event_subscription = None
         self._pairing_event.clear()
         self._verification_code = None
+        # templates may contain the verification code
+        self._soap_templates.clear()
 
     async def _on_event(self, changes):
+        # the receiver is reachable, do not hold back further pairing attempts
+        self._pairing_backoff.reset()
+
         # is paired:
         if self._pairing_event.is_set():
-            # notify listeners
-            asyncio.gather(*[listener(changes) for listener in self._event_listeners])
+            # notify listeners without waiting for them, the next event must not be held up by a slow listener
+            self._event_fanout.publish(changes)
         elif "messageBody" in changes:
             body = changes.get("messageBody")
             if "X-pairingCheck:" in body:
                 pairing_code = changes.get("messageBody").removeprefix("X-pairingCheck:")
                 self._verification_code = magenta_hash(pairing_code + self._terminal_id + self._user_id)
+                self._soap_templates.clear()
                 self._pairing_event.set()
 
     async def _register_for_events(self):
-        self._event_registration_id = await self._notify_server._async_subscribe_to_service(
+        if self._event_subscription is not None:
+            # still registered from a previous attempt
+            return
+        self._event_subscription = await self._notify_server._async_subscribe_to_service(
             (self._host, self._port),
             "X-CTC_RemotePairing",
             self._on_event,
@@ -88,10 +154,13 @@ class Client:
         LOGGER.debug(
             "Registered for events on %s. ID: %s",
             self._host,
-            self._event_registration_id,
+            self._event_subscription.sid,
         )
 
     async def async_pair(self) -> str:
+        if self._stored_verification_code is not None and not self._pairing_event.is_set():
+            return await self._async_restore_pairing(self._stored_verification_code)
+
         attempts = 0
         while not self._pairing_event.is_set():
             attempts += 1
@@ -108,11 +177,11 @@ class Client:
                 await self._async_verify_pairing()
                 LOGGER.info("Pairing Verified. Success !")
             except UpnpConnectionError as ex:
-                await self.async_close()
+                await self._async_reset_pairing()
                 LOGGER.debug("Could not connect", exc_info=ex)
                 raise CommunicationException("No connection could be made to the receiver") from ex
             except (asyncio.TimeoutError, PairingTimeoutException) as ex:
-                await self.async_close()
+                await self._async_reset_pairing()
                 # pairing was not successfull, reset the client to start fresh
                 LOGGER.debug("Pairing Timed out", exc_info=ex)
                 if attempts > PAIRING_ATTEMPTS:
@@ -120,10 +189,39 @@ class Client:
                     raise PairingTimeoutException(
                         f"No pairingCode received from the receiver within {attempts} attempts waiting {PAIRING_EVENT_TIMEOUT} each"
                     ) from ex
+                delay = self._pairing_backoff.next()
+                LOGGER.debug("Retrying pairing in %.1fs", delay)
+                await asyncio.sleep(delay)
+
+        self._pairing_backoff.reset()
 
         self.assert_paired()
         return self._verification_code
 
+    async def _async_restore_pairing(self, verification_code: str) -> str:
+        # paired before, events are delivered to the listeners right away
+        self._verification_code = verification_code
+        self._soap_templates.clear()
+        self._pairing_event.set()
+        try:
+            await self._register_for_events()
+        except UpnpConnectionError as ex:
+            await self._async_reset_pairing()
+            LOGGER.debug("Could not connect", exc_info=ex)
+            raise CommunicationException("No connection could be made to the receiver") from ex
+        except Exception:
+            # not subscribed to the events, restore the pairing again on the next attempt
+            await self._async_reset_pairing()
+            raise
+        LOGGER.info("Restored pairing with %s", self._host)
+        return verification_code
+
+    def is_subscription_healthy(self) -> bool:
+        """Whether the receiver is expected to deliver events."""
+        return self._event_subscription is not None and self._notify_server.is_subscription_healthy(
+            self._event_subscription
+        )
+
     def is_paired(self) -> bool:
         return self._verification_code is not None
 
@@ -131,76 +229,77 @@ class Client:
         if self._verification_code is None:
             raise NotPairedException("Client needs to be paired in order to use this function")
 
-    async def async_get_player_state(self) -> str:
+    async def async_get_player_state(self) -> PlayContentEvent:
         self.assert_paired()
-        response = await self._async_send_upnp_soap(
+        template = self._soap_template(
             "X-CTC_RemotePairing",
             "X-getPlayerState",
-            {
+            lambda: {
                 "pairingDeviceID": self._terminal_id,
                 "verificationCode": self._verification_code,
             },
         )
-        assert response.status_code == 200
-        tree = ET.fromstring(text=response.body)
-        result = {}
-        for child in tree[0][0]:
-            result[child.tag] = child.text
-
-        return result
+        response = await self._async_send_soap_request(template.request())
+        if response.status_code != 200:
+            error_code = _upnp_error_code(response)
+            if error_code != UPNP_ERROR_NOT_AUTHORIZED:
+                raise CommunicationException(
+                    f"Player state request failed with status {response.status_code}, UPnP error {error_code}"
+                )
+            # the receiver does not accept the verification code (anymore), pair again
+            LOGGER.info("Player state request not authorized, pairing required")
+            self._stored_verification_code = None
+            await self._async_reset_pairing()
+            raise NotPairedException("The receiver rejected the verification code")
+        return parse_player_state(response.body)
 
     async def _async_send_pairing_request(self):
-        response = await self._async_send_upnp_soap(
+        template = self._soap_template(
             "X-CTC_RemotePairing",
             "X-pairingRequest",
-            {
+            lambda: {
                 "pairingDeviceID": self._terminal_id,
                 "friendlyName": "Homeassistant Integration",
                 "userID": self._user_id,
             },
         )
+        response = await self._async_send_soap_request(template.request())
         assert response.status_code == 200
 
     async def _async_verify_pairing(self):
         self.assert_paired()
 
-        response = await self._async_send_upnp_soap(
+        template = self._soap_template(
             "X-CTC_RemotePairing",
             "X-pairingCheck",
-            {
+            lambda: {
                 "pairingDeviceID": self._terminal_id,
                 "verificationCode": self._verification_code,
             },
         )
+        response = await self._async_send_soap_request(template.request())
 
         assert response.status_code == 200
         assert "<pairingResult>0</pairingResult>" in response.body
 
+    def _soap_template(
+        self, service: str, action: str, arguments: Callable[[], Mapping[str, str]]
+    ) -> SoapRequestTemplate:
+        """Get the cached request template of the action. Arguments are only evaluated when building the template."""
+        key = (service, action)
+        template = self._soap_templates.get(key)
+        if template is None:
+            template = SoapRequestTemplate(self._host, self._port, service, action, arguments())
+            self._soap_templates[key] = template
+        return template
+
     async def _async_send_upnp_soap(self, service: str, action: str, attributes: Mapping[str, str]) -> HttpResponse:
+        template = SoapRequestTemplate(self._host, self._port, service, action, attributes)
+        return await self._async_send_soap_request(template.request())
+
+    async def _async_send_soap_request(self, request: HttpRequest) -> HttpResponse:
         try:
-            attributes = "".join([f"   <{k}>{escape(v)}</{k}>\n" for k, v in attributes.items()])
-            full_body = (
-                '<?xml version="1.0" encoding="utf-8"?>\n'
-                '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n'
-                " <s:Body>\n"
-                f'  <u:{action} xmlns:u="urn:schemas-upnp-org:service:{service}:1">\n'
-                f"{attributes}"
-                f"  </u:{action}>\n"
-                " </s:Body>\n"
-                "</s:Envelope>"
-            )
-            return await self._requester.async_http_request(
-                http_request=HttpRequest(
-                    method="POST",
-                    url=f"{self._url}/upnp/service/{service}/Control",
-                    headers={
-                        "SOAPACTION": f"urn:schemas-upnp-org:service:{service}:1#{action}",
-                        "HOST": f"{self._host}:{self._port}",
-                        "Content-Type": 'text/xml; charset="utf-8"',
-                    },
-                    body=full_body,
-                )
-            )
+            return await self._connection_pool.requester.async_http_request(http_request=request)
         except UpnpConnectionTimeoutError as ex:
             raise CommunicationTimeoutException() from ex
         except UpnpCommunicationError as ex:
@@ -240,29 +339,80 @@ class Client:
         )
         LOGGER.debug("%s: %s", "Play", response.body)
 
-    async def async_send_key(self, key: KeyCode):
-        self.assert_paired()
-        response = await self._async_send_upnp_soap(
+    def _remote_key_template(self) -> SoapRequestTemplate:
+        return self._soap_template(
             "X-CTC_RemoteControl",
             "X_CTC_RemoteKey",
-            {
+            lambda: {
                 "InstanceID": "0",
-                "KeyCode": f"keyCode={key.value}^{self._terminal_id}:{self._verification_code}^userID:{self._user_id}",
+                "KeyCode": f"{slot('command')}^{self._terminal_id}:{self._verification_code}^userID:{self._user_id}",
             },
         )
+
+    async def async_send_key(self, key: KeyCode):
+        self.assert_paired()
+        response = await self._async_send_soap_request(
+            self._remote_key_template().request(command=f"keyCode={key.value}")
+        )
         LOGGER.info("%s - %s: %s", "RemoteKey", key, response)
         assert response.status_code == 200
 
+    async def async_send_keys(
+        self, sequence: Sequence[KeyCode], inter_key_delay: float = DEFAULT_INTER_KEY_DELAY
+    ) -> list[KeyTiming]:
+        """Send a sequence of keys, e.g. the digits of a channel number.
+
+        Keys are dispatched in order, spaced by inter_key_delay, without waiting for the acknowledgement of the
+        previous key. A key is only sent once the previous request has been written, as the requests may use
+        different connections. The whole sequence therefore takes about one round trip plus the spacing delays.
+        If a key fails, the keys not sent yet are dropped, a partial channel number would tune to another channel.
+        """
+        self.assert_paired()
+        assert inter_key_delay >= 0
+
+        template = self._remote_key_template()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        written: list[asyncio.Future[None]] = [loop.create_future() for _ in sequence]
+
+        async def _async_send(index: int, key: KeyCode) -> KeyTiming:
+            if index > 0:
+                await written[index - 1]
+            delay = start + index * inter_key_delay - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sent = loop.time()
+            with track_written(written[index]):
+                response = await self._async_send_soap_request(template.request(command=f"keyCode={key.value}"))
+            assert response.status_code == 200
+            return KeyTiming(key=key, sent=sent - start, latency=loop.time() - sent)
+
+        tasks = [loop.create_task(_async_send(index, key)) for index, key in enumerate(sequence)]
+        try:
+            timings = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        LOGGER.info(
+            "%s - %s: %.3fs",
+            "RemoteKeys",
+            [key.name for key in sequence],
+            max((timing.sent + timing.latency for timing in timings), default=0),
+        )
+        return list(timings)
+
     async def async_send_character_input(self, character_input: str):
         self.assert_paired()
         assert "^" not in character_input  # broken
-        response = await self._async_send_upnp_soap(
-            "X-CTC_RemoteControl",
-            "X_CTC_RemoteKey",
-            {
-                "InstanceID": "0",
-                "KeyCode": f"characterInput={character_input}^{self._terminal_id}:{self._verification_code}^userID:{self._user_id}",
-            },
+        response = await self._async_send_soap_request(
+            self._remote_key_template().request(command=f"characterInput={character_input}")
         )
         LOGGER.info("%s - '%s': %s", "Send Character Input", character_input, response.body)
         assert response.status_code == 200
+
+
+def _upnp_error_code(response: HttpResponse) -> int | None:
+    """Error code of the UPnP fault in the body of a failed SOAP response"""
+    match = _UPNP_ERROR_CODE.search(response.body or "")
+    return int(match.group(1)) if match else None
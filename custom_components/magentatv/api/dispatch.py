@@ -0,0 +1,130 @@
+"""Delivery of received events to the callbacks, decoupled from answering the NOTIFY request."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping
+
+DEFAULT_MAX_DEPTH = 20
+
+
+class DispatchStats:
+    """Counters about the events passing DispatchQueues"""
+
+    depth: int = 0
+    max_depth: int = 0
+    dispatched: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    max_latency: float = 0
+    total_latency: float = 0
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.max_depth = 0
+        self.dispatched = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.max_latency = 0
+        self.total_latency = 0
+
+    @property
+    def average_latency(self) -> float:
+        """Average seconds from receiving an event until its callbacks finished."""
+        return self.total_latency / self.dispatched if self.dispatched else 0
+
+    def __repr__(self) -> str:
+        return (
+            f"DispatchStats(depth={self.depth}, max_depth={self.max_depth}, dispatched={self.dispatched}, "
+            f"coalesced={self.coalesced}, dropped={self.dropped}, average_latency={self.average_latency:.4f}, "
+            f"max_latency={self.max_latency:.4f})"
+        )
+
+
+class DispatchQueue:
+    """Hands the events of one subscription to a handler, one after another and in the order they were received.
+
+    While the handler is behind, pending events whose state variables are all contained in a newer event are
+    superseded and dropped. If the handler still does not keep up, the oldest events are dropped beyond max_depth.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Mapping[str, str]], Awaitable[None]],
+        stats: DispatchStats | None = None,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert max_depth > 0
+
+        self._handler = handler
+        self._stats = stats or DispatchStats()
+        self._max_depth = max_depth
+        self._clock = clock
+
+        self._pending: deque[tuple[float, Mapping[str, str]]] = deque()
+        self._task: asyncio.Task | None = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    @property
+    def stats(self) -> DispatchStats:
+        return self._stats
+
+    def put(self, changes: Mapping[str, str]) -> None:
+        """Queue an event without waiting for its delivery."""
+        if self._pending:
+            self._coalesce(changes)
+        if len(self._pending) >= self._max_depth:
+            self._pending.popleft()
+            self._stats.depth -= 1
+            self._stats.dropped += 1
+
+        self._pending.append((self._clock(), changes))
+        self._stats.depth += 1
+        self._stats.max_depth = max(self._stats.max_depth, self._stats.depth)
+
+        if self._task is None:
+            self._idle.clear()
+            self._task = asyncio.get_running_loop().create_task(self._async_run())
+
+    def _coalesce(self, changes: Mapping[str, str]) -> None:
+        variables = changes.keys()
+        pending = deque(event for event in self._pending if not event[1].keys() <= variables)
+        superseded = len(self._pending) - len(pending)
+        if superseded:
+            self._pending = pending
+            self._stats.depth -= superseded
+            self._stats.coalesced += superseded
+
+    async def _async_run(self) -> None:
+        try:
+            while self._pending:
+                received, changes = self._pending.popleft()
+                self._stats.depth -= 1
+                await self._handler(changes)
+
+                latency = self._clock() - received
+                self._stats.dispatched += 1
+                self._stats.total_latency += latency
+                self._stats.max_latency = max(self._stats.max_latency, latency)
+        finally:
+            self._task = None
+            self._idle.set()
+
+    async def async_join(self) -> None:
+        """Wait until all queued events have been delivered."""
+        await self._idle.wait()
+
+    def close(self) -> None:
+        """Drop pending events and stop the delivery."""
+        self._stats.depth -= len(self._pending)
+        self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,128 @@
+"""Buffer for events arriving before their subscription is known."""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+
+DEFAULT_TTL = 30
+DEFAULT_MAX_EVENTS_PER_SID = 10
+DEFAULT_MAX_EVENTS = 100
+
+
+class EventBufferStats:
+    """Counters about the events held by an EventBuffer"""
+
+    buffered: int = 0
+    replayed: int = 0
+    dropped_expired: int = 0
+    dropped_overflow: int = 0
+    discarded: int = 0  # events of subscriptions replaced while recovering from a lapse
+
+    def __init__(self) -> None:
+        self.buffered = 0
+        self.replayed = 0
+        self.dropped_expired = 0
+        self.dropped_overflow = 0
+        self.discarded = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"EventBufferStats(buffered={self.buffered}, replayed={self.replayed}, "
+            f"dropped_expired={self.dropped_expired}, dropped_overflow={self.dropped_overflow}, "
+            f"discarded={self.discarded})"
+        )
+
+
+class EventBuffer:
+    """Events of unknown sids, kept until the subscription is registered.
+
+    A receiver may send the initial event of a subscription before the SUBSCRIBE response has been processed.
+    Events of sids that never get registered (old subscriptions, other devices) are dropped after ttl seconds.
+    When a sid holds more than max_events_per_sid or the buffer more than max_events events, the oldest ones are
+    dropped.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        max_events_per_sid: int = DEFAULT_MAX_EVENTS_PER_SID,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert ttl > 0
+        assert 0 < max_events_per_sid <= max_events
+
+        self._ttl = ttl
+        self._max_events_per_sid = max_events_per_sid
+        self._max_events = max_events
+        self._clock = clock
+
+        # sids in order of their first buffered event
+        self._events: dict[str, deque[tuple[float, Mapping[str, str]]]] = {}
+        self._size = 0
+        self._stats = EventBufferStats()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def stats(self) -> EventBufferStats:
+        return self._stats
+
+    def append(self, sid: str, changes: Mapping[str, str]) -> None:
+        now = self._clock()
+        self._expire(now)
+
+        events = self._events.get(sid)
+        if events is not None and len(events) >= self._max_events_per_sid:
+            self._drop_oldest(sid)
+        elif self._size >= self._max_events:
+            self._drop_oldest(next(iter(self._events)))
+
+        self._events.setdefault(sid, deque()).append((now, changes))
+        self._size += 1
+        self._stats.buffered += 1
+
+    def pop(self, sid: str) -> list[Mapping[str, str]]:
+        """Remove and return the events buffered for sid that have not expired yet."""
+        self._expire(self._clock())
+        events = self._events.pop(sid, None)
+        if not events:
+            return []
+        self._size -= len(events)
+        self._stats.replayed += len(events)
+        return [changes for _, changes in events]
+
+    def discard(self, sid: str) -> None:
+        """Drop the events of a sid that will not be registered anymore."""
+        events = self._events.pop(sid, None)
+        if events:
+            self._size -= len(events)
+            self._stats.discarded += len(events)
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._size = 0
+
+    def _expire(self, now: float) -> None:
+        if not self._size:
+            return
+        deadline = now - self._ttl
+        for sid in list(self._events):
+            events = self._events[sid]
+            while events and events[0][0] <= deadline:
+                events.popleft()
+                self._size -= 1
+                self._stats.dropped_expired += 1
+            if not events:
+                del self._events[sid]
+
+    def _drop_oldest(self, sid: str) -> None:
+        events = self._events[sid]
+        events.popleft()
+        if not events:
+            del self._events[sid]
+        self._size -= 1
+        self._stats.dropped_overflow += 1
@@ -1,6 +1,11 @@
-from typing import Literal
+from collections.abc import Mapping
+from functools import cached_property
+from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+
+STB_PLAY_CONTENT = "STB_playContent"
+STB_EIT_CHANGED = "STB_EitChanged"
 
 
 class EventModel(BaseModel):
@@ -10,8 +15,13 @@ class EventModel(BaseModel):
 
     model_config = ConfigDict(populate_by_name=False, frozen=True)
 
-    def set_keys(self):
-        return self.model_dump(exclude_unset=True, by_alias=False).keys()
+    @cached_property
+    def fields_set(self) -> frozenset[str]:
+        """Names of the fields explicitly set when parsing, computed once without serializing the model."""
+        return frozenset(self.model_fields_set)
+
+    def set_keys(self) -> frozenset[str]:
+        return self.fields_set
 
 
 class PlayContentEvent(EventModel):
@@ -52,3 +62,100 @@ class EitChangedEvent(EventModel):
     @classmethod
     def filter_empty_program_info(cls, value) -> list[ProgramInfo | None]:
         return [x if x else None for x in value]
+
+    @property
+    def programs(self) -> list[ProgramInfo | None]:
+        return self.program_info
+
+
+class LazyEitChangedEvent(EitChangedEvent):
+    """EitChangedEvent validating the program info only when it is accessed through programs.
+
+    Most EIT events are only used for the channel number, the program info is needed for the media title.
+    """
+
+    program_info: list[Any]
+
+    @cached_property
+    def programs(self) -> list[ProgramInfo | None]:
+        return _PROGRAM_INFO_PARSER.validate_python(self.program_info)
+
+
+# building a TypeAdapter compiles its validator, so they are created once and shared by all receivers
+EVENT_PARSERS: dict[str, TypeAdapter[Any]] = {
+    STB_PLAY_CONTENT: TypeAdapter(PlayContentEvent),
+    STB_EIT_CHANGED: TypeAdapter(LazyEitChangedEvent),
+}
+
+# X-getPlayerState responses carry the same fields as STB_playContent events
+PLAYER_STATE_PARSER: TypeAdapter[PlayContentEvent] = EVENT_PARSERS[STB_PLAY_CONTENT]
+
+_PROGRAM_INFO_PARSER: TypeAdapter[list[ProgramInfo | None]] = TypeAdapter(list[ProgramInfo | None])
+
+
+def parse_event(variable: str, value: str | bytes) -> EventModel:
+    """Parse the json value of a single state variable. Raises KeyError for unknown variables."""
+    return EVENT_PARSERS[variable].validate_json(value)
+
+
+def parse_changes(changes: Mapping[str, str]) -> dict[str, EventModel]:
+    """Parse all known state variables of a NOTIFY request, unknown variables are skipped."""
+    return {
+        variable: parser.validate_json(changes[variable])
+        for variable, parser in EVENT_PARSERS.items()
+        if variable in changes
+    }
+
+
+class LazyEvent:
+    """Raw json value of a state variable, parsed on first access.
+
+    Equality is based on the raw value, so repeated events are detected without decoding them.
+    """
+
+    __slots__ = ("variable", "raw", "_hash", "_parsed")
+
+    def __init__(self, variable: str, raw: str) -> None:
+        self.variable = variable
+        self.raw = raw
+        self._hash = hash(raw)
+        self._parsed: EventModel | None = None
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LazyEvent):
+            return NotImplemented
+        return self._hash == other._hash and self.variable == other.variable and self.raw == other.raw
+
+    @property
+    def parsed(self) -> EventModel:
+        if self._parsed is None:
+            self._parsed = parse_event(self.variable, self.raw)
+        return self._parsed
+
+
+class EventDecoder:
+    """Parses the changes of consecutive NOTIFY requests of a receiver.
+
+    The receivers repeat identical events a lot, for those the previously parsed event is returned again.
+    """
+
+    def __init__(self) -> None:
+        self._last_events: dict[str, LazyEvent] = {}
+
+    def decode(self, changes: Mapping[str, str]) -> dict[str, EventModel]:
+        """Same as parse_changes(), only parsing values that differ from the last event of the same variable."""
+        events = {}
+        for variable in EVENT_PARSERS:
+            if variable not in changes:
+                continue
+            event = LazyEvent(variable, changes[variable])
+            last_event = self._last_events.get(variable)
+            if last_event is not None and last_event == event:
+                event = last_event
+            events[variable] = event.parsed
+            # remember only events that could be parsed
+            self._last_events[variable] = event
+        return events
@@ -16,3 +16,7 @@ class PairingTimeoutException(MagentaTvException):
 
 class NotPairedException(MagentaTvException):
     """Error to indicate that platform is not ready for the requested resource."""
+
+
+class SubscriptionLapsedException(CommunicationException):
+    """Error to indicate that the receiver does not know the event subscription anymore."""
@@ -0,0 +1,130 @@
+"""Delivery of the events of a receiver to several listeners, isolated from each other."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import time
+from collections.abc import Callable, Mapping
+
+from .const import LOGGER
+from .dispatch import DEFAULT_MAX_DEPTH, DispatchQueue
+from .subscription import Callback
+
+DEFAULT_LISTENER_TIMEOUT = 10
+# upper bounds in seconds of the latency histogram buckets, slower calls are counted in an additional bucket
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+class ListenerStats:
+    """Counters and latency histogram of the calls of a single listener"""
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    max_latency: float = 0
+    total_latency: float = 0
+    histogram: list[int]
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.max_latency = 0
+        self.total_latency = 0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, latency: float) -> None:
+        self.calls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    @property
+    def average_latency(self) -> float:
+        return self.total_latency / self.calls if self.calls else 0
+
+    def __repr__(self) -> str:
+        return (
+            f"ListenerStats(calls={self.calls}, errors={self.errors}, timeouts={self.timeouts}, "
+            f"average_latency={self.average_latency:.4f}, max_latency={self.max_latency:.4f}, "
+            f"histogram={self.histogram})"
+        )
+
+
+class _Listener:
+    def __init__(self, callback: Callback, timeout: float, clock: Callable[[], float], max_depth: int) -> None:
+        self.callback = callback
+        self.stats = ListenerStats()
+        self.queue = DispatchQueue(self._async_call, max_depth=max_depth, clock=clock)
+        self._timeout = timeout
+        self._clock = clock
+
+    async def _async_call(self, changes: Mapping[str, str]) -> None:
+        start = self._clock()
+        try:
+            await asyncio.wait_for(self.callback(changes), timeout=self._timeout)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            LOGGER.warning("Listener %s did not handle event within %ss: %s", self.callback, self._timeout, changes)
+        except Exception as ex:
+            # a failing listener must neither affect the other listeners nor the following events
+            self.stats.errors += 1
+            LOGGER.error("Listener %s failed to handle event: %s", self.callback, changes, exc_info=ex)
+        finally:
+            self.stats.observe(self._clock() - start)
+
+
+class EventFanout:
+    """Hands every published event to all listeners without waiting for them.
+
+    Each listener receives the events in order through its own DispatchQueue, so a slow or failing listener does
+    not delay the others. A listener call exceeding timeout seconds is cancelled.
+    """
+
+    def __init__(
+        self,
+        timeout: float = DEFAULT_LISTENER_TIMEOUT,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert timeout > 0
+
+        self._timeout = timeout
+        self._max_depth = max_depth
+        self._clock = clock
+        self._listeners: dict[Callback, _Listener] = {}
+
+    def __len__(self) -> int:
+        return len(self._listeners)
+
+    def __contains__(self, callback: object) -> bool:
+        return callback in self._listeners
+
+    @property
+    def stats(self) -> Mapping[Callback, ListenerStats]:
+        return {callback: listener.stats for callback, listener in self._listeners.items()}
+
+    def add(self, callback: Callback) -> None:
+        if callback not in self._listeners:
+            self._listeners[callback] = _Listener(callback, self._timeout, self._clock, self._max_depth)
+
+    def remove(self, callback: Callback) -> None:
+        listener = self._listeners.pop(callback, None)
+        if listener is not None:
+            listener.queue.close()
+
+    def publish(self, changes: Mapping[str, str]) -> None:
+        """Queue an event for all listeners."""
+        for listener in self._listeners.values():
+            listener.queue.put(changes)
+
+    async def async_join(self) -> None:
+        """Wait until all listeners handled the published events."""
+        for listener in list(self._listeners.values()):
+            await listener.queue.async_join()
+
+    def close(self) -> None:
+        """Drop the events not delivered yet, the listeners stay registered."""
+        for listener in self._listeners.values():
+            listener.queue.close()
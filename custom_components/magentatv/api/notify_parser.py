@@ -0,0 +1,110 @@
+"""Incremental parsing of NOTIFY request bodies.
+
+The body is fed to the xml parser chunk by chunk while it is received, instead of buffering, decoding and
+repairing the complete body first. Only the changed state variables are collected, no element tree is built.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import AsyncIterator
+
+from async_upnp_client.client import NS
+from defusedxml.ElementTree import DefusedXMLParser
+
+DEFAULT_CHUNK_SIZE = 2048
+
+_PROPERTY_TAG = f"{{{NS['event']}}}property"
+
+
+class AmpersandRepair:
+    """Escapes bare ampersands of a byte stream, chunk by chunk.
+
+    The receivers do not escape ampersands in event values. An ampersand at the end of a chunk that might still
+    turn out to start an entity reference is held back until the next chunk decides it.
+    """
+
+    # https://regex101.com/r/ojU2H9/1
+    _invalid_ampersand_re = re.compile(rb"&(?![a-z0-9]+;)")
+    _undecided_tail_re = re.compile(rb"&[a-z0-9]*\Z")
+
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self._pending:
+            chunk = self._pending + chunk
+            self._pending = b""
+        if b"&" not in chunk:
+            return chunk
+
+        tail = self._undecided_tail_re.search(chunk)
+        if tail:
+            self._pending = chunk[tail.start() :]
+            chunk = chunk[: tail.start()]
+        return self._invalid_ampersand_re.sub(b"&amp;", chunk)
+
+    def flush(self) -> bytes:
+        pending, self._pending = self._pending, b""
+        return self._invalid_ampersand_re.sub(b"&amp;", pending)
+
+
+class _ChangesCollector:
+    """Parser target collecting the state variables of <e:propertyset><e:property>...</e:property></e:propertyset>"""
+
+    def __init__(self) -> None:
+        self._changes: dict[str, str] = {}
+        self._depth = 0
+        self._in_property = False
+        self._name: str | None = None
+        self._text: list[str] = []
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        self._depth += 1
+        if self._depth == 2:
+            self._in_property = tag == _PROPERTY_TAG
+        elif self._depth == 3 and self._in_property:
+            self._name = tag
+            self._text = []
+
+    def end(self, tag: str) -> None:
+        if self._depth == 3 and self._name is not None:
+            self._changes[self._name] = "".join(self._text)
+            self._name = None
+        self._depth -= 1
+
+    def data(self, data: str) -> None:
+        if self._depth == 3 and self._name is not None:
+            self._text.append(data)
+
+    def close(self) -> dict[str, str]:
+        return self._changes
+
+
+class NotifyBodyParser:
+    """Push parser turning a NOTIFY body into the changed state variables.
+
+    Entity declarations and external references are rejected by defusedxml, like with the buffered parser.
+    Raises defusedxml.ElementTree.ParseError for malformed bodies.
+    """
+
+    def __init__(self) -> None:
+        self._repair = AmpersandRepair()
+        self._parser = DefusedXMLParser(target=_ChangesCollector())
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._repair.feed(chunk)
+        if data:
+            self._parser.feed(data)
+
+    def close(self) -> dict[str, str]:
+        self._parser.feed(self._repair.flush())
+        return self._parser.close()
+
+
+async def async_parse_notify_body(chunks: AsyncIterator[bytes]) -> dict[str, str]:
+    """Parse a body while it is received, e.g. from request.content.iter_chunked()"""
+    parser = NotifyBodyParser()
+    async for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
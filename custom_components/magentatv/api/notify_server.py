@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import re
 import socket
-from ast import List
-from collections.abc import Awaitable, Callable, Mapping
+import time
+from collections.abc import Mapping, Sequence
 from functools import wraps
 from http import HTTPStatus
 
@@ -17,13 +18,21 @@ from async_upnp_client.const import HttpRequest
 from async_upnp_client.exceptions import UpnpCommunicationError, UpnpConnectionTimeoutError
 from async_upnp_client.utils import get_local_ip
 
+from .advertise import AdvertiseAddressCache, AdvertiseCacheStats, ListenAddress, select_advertise_address
 from .const import LOGGER
+from .dispatch import DispatchStats
+from .event_buffer import EventBuffer, EventBufferStats
 from .exceptions import (
     CommunicationException,
     CommunicationTimeoutException,
+    SubscriptionLapsedException,
 )
+from .notify_parser import DEFAULT_CHUNK_SIZE, async_parse_notify_body
+from .subscription import Callback, Subscription, SubscriptionRegistry, SubscriptionStats, parse_timeout_header
 
-Callback = Callable[[Mapping[str, str]], Awaitable[None]]
+DEFAULT_MAX_CONCURRENT_RENEWALS = 5
+# seconds the server keeps listening after the last subscription is gone
+DEFAULT_IDLE_LINGER = 60
 
 
 def wrap_exceptions(f):
@@ -39,57 +48,114 @@ def wrap_exceptions(f):
     return applicator
 
 
+class LifecycleStats:
+    """Counters about the listener sockets of a NotifyServer"""
+
+    binds: int = 0
+    unbinds: int = 0
+    reused: int = 0
+
+    def __init__(self) -> None:
+        self.binds = 0
+        self.unbinds = 0
+        self.reused = 0
+
+    def __repr__(self) -> str:
+        return f"LifecycleStats(binds={self.binds}, unbinds={self.unbinds}, reused={self.reused})"
+
+
 class NotifyServer:
     """Notification server listening for subscribed events and invoking the corresponding callbacks"""
 
     # https://regex101.com/r/ojU2H9/1
     _invalid_ampersand_re = re.compile(r"&(?![a-z0-9]+;)")
 
-    _listen_ip_port = (tuple[str, int],)
+    _listen_addresses: list[ListenAddress]
     _advertise_ip_port = tuple[str | None, int | None] | None
+    _advertise_addresses: AdvertiseAddressCache
 
     _subscription_timeout: int
 
     _requester: AiohttpRequester
 
-    _socket = socket.socket | None
+    _sockets: list[socket.socket]
+    _servers: list[asyncio.Server]
     _aiohttp_server: web.Server | None
     _resubscribe_task: asyncio.Task = None
+    _linger_task: asyncio.Task | None
+    _renewal_tasks: dict[str, asyncio.Task]
 
-    _subscription_registry: dict[str, tuple[str, str, Callback]] = {}
-    _buffer: dict[str, List[Mapping[str, str]]]
+    _subscription_registry: SubscriptionRegistry
+    _pending_subscriptions: dict[tuple[tuple[str, int], str], asyncio.Future[Subscription]]
+    _release_tasks: set[asyncio.Task]
+    _failed_subscriptions: set[str]
+    _buffer: EventBuffer
 
     start_stop_lock = asyncio.Lock()
     subscription_lock = asyncio.Lock()
 
     def __init__(
         self,
-        listen: tuple[str, int],
+        listen: tuple[str, int] | Sequence[tuple[str, int]],
         advertise: tuple[str | None, int | None] | None = None,
         subscription_timeout: int = 300,
+        streaming_parser: bool = True,
+        max_concurrent_renewals: int = DEFAULT_MAX_CONCURRENT_RENEWALS,
+        idle_linger: float = DEFAULT_IDLE_LINGER,
     ) -> None:
         """Sample API Client.
         Telekom uses 8058 as local port.
+
+        The server listens on one or several (address, port) pairs. An address may carry the prefix length of its
+        network ("10.1.0.5/24"), receivers within that network are told to send their events to this address.
+        Unless advertise overrides them, the callback address of a receiver is cached for a while and chosen again
+        when subscribing to it fails.
+
+        With streaming_parser, NOTIFY bodies are parsed while they are received. Otherwise the complete body is
+        buffered first, which allows logging it.
+
+        Subscriptions are renewed shortly before the timeout granted by the receiver runs out, at most
+        max_concurrent_renewals at a time.
+
+        After the last subscription is gone, the server keeps listening for idle_linger seconds, so pairing attempts
+        and reloads subscribing again shortly after do not rebind the sockets.
         """
 
         assert listen is not None
         assert subscription_timeout is not None
+        assert max_concurrent_renewals > 0
+        assert idle_linger >= 0
 
-        self._listen_ip_port = listen
+        if isinstance(listen[0], str):
+            listen = [listen]
+        self._listen_addresses = [ListenAddress.parse(address, port) for address, port in listen]
         self._advertise_ip_port = advertise
+        self._advertise_addresses = AdvertiseAddressCache()
 
         self._subscription_timeout = subscription_timeout
+        self._streaming_parser = streaming_parser
+        self._idle_linger = idle_linger
 
         self._requester = AiohttpRequester(http_headers={"User-Agent": "Homeassistant MagentaTV Integration"})
 
-        self._socket = None
+        self._sockets = []
         self._aiohttp_server = None
-        self._server = None
+        self._servers = []
 
         self._resubscribe_task = None
-
-        self._subscription_registry = {}
-        self._buffer = {}
+        self._linger_task = None
+        self._lifecycle_stats = LifecycleStats()
+        self._renewal_tasks = {}
+        self._renewal_semaphore = asyncio.Semaphore(max_concurrent_renewals)
+        self._schedule_changed = asyncio.Event()
+        self._subscription_stats = SubscriptionStats()
+        self._dispatch_stats = DispatchStats()
+
+        self._subscription_registry = SubscriptionRegistry()
+        self._pending_subscriptions = {}
+        self._release_tasks = set()
+        self._failed_subscriptions = set()
+        self._buffer = EventBuffer()
 
     @staticmethod
     def create_socket(source_ip, source_port: int) -> socket.socket:
@@ -102,39 +168,129 @@ class NotifyServer:
         sock.bind((source_ip, source_port))
         return sock
 
-    async def _async_subscribe_to_service(self, target, service: str, callback: Callback) -> str:
+    @property
+    def subscription_stats(self) -> SubscriptionStats:
+        return self._subscription_stats
+
+    @property
+    def buffer_stats(self) -> EventBufferStats:
+        return self._buffer.stats
+
+    @property
+    def dispatch_stats(self) -> DispatchStats:
+        return self._dispatch_stats
+
+    @property
+    def lifecycle_stats(self) -> LifecycleStats:
+        return self._lifecycle_stats
+
+    @property
+    def advertise_cache_stats(self) -> AdvertiseCacheStats:
+        return self._advertise_addresses.stats
+
+    async def _async_subscribe_to_service(self, target, service: str, callback: Callback) -> Subscription:
+        """Subscribe callback to the events of a service.
+
+        Callbacks for a service the receiver is already subscribed to share the existing subscription.
+        Every call has to be matched by a call to async_unsubscribe with the same callback.
+        """
+        if self._linger_task is not None:
+            # subscribed again while lingering, keep the running server
+            self._linger_task.cancel()
+            self._linger_task = None
+            self._lifecycle_stats.reused += 1
         await self.async_start()
-        sid = await self._async_subscribe(target, service)
-        self._subscription_registry[sid] = (target, service, callback)
 
-        for changes in self._buffer.pop(sid, []):
-            await callback(changes)
+        subscription = self._subscription_registry.get_service(target, service)
+        if subscription is not None:
+            subscription.callbacks.append(callback)
+            return subscription
+
+        key = (target, service)
+        pending = self._pending_subscriptions.get(key)
+        if pending is None:
+            # first subscriber, the subscription is done on its behalf
+            pending = self._pending_subscriptions[key] = asyncio.ensure_future(
+                self._async_create_subscription(target, service, callback)
+            )
+            pending.add_done_callback(lambda _: self._pending_subscriptions.pop(key, None))
+            try:
+                # cancelling the first subscriber must not cancel the subscription shared with the others
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                pending.add_done_callback(lambda _: self._release_cancelled_subscriber(pending, callback))
+                raise
+
+        # a subscription for the same service is in progress, share it
+        subscription = await asyncio.shield(pending)
+        subscription.callbacks.append(callback)
+        return subscription
+
+    def _release_cancelled_subscriber(self, pending: asyncio.Future[Subscription], callback: Callback) -> None:
+        """Remove the callback of a first subscriber cancelled while subscribing.
+
+        Runs after the other waiters were handed the subscription, so it is only cancelled if nobody else shares it.
+        """
+        if pending.cancelled() or pending.exception() is not None:
+            return
+        task = asyncio.get_running_loop().create_task(self.async_unsubscribe(pending.result(), callback))
+        self._release_tasks.add(task)
+        task.add_done_callback(self._release_tasks.discard)
 
-        return sid
+    async def _async_create_subscription(self, target, service: str, callback: Callback) -> Subscription:
+        sid, timeout = await self._async_subscribe(target, service)
+        subscription = Subscription(sid, target, service, callback, dispatch_stats=self._dispatch_stats)
+        subscription.on_granted(timeout)
+        self._subscription_registry.add(subscription)
+        self._schedule_changed.set()
 
-    async def async_unsubscribe(self, sid: str):
+        self._replay_buffer(subscription)
+
+        return subscription
+
+    def _replay_buffer(self, subscription: Subscription) -> None:
+        for changes in self._buffer.pop(subscription.sid):
+            subscription.queue.put(changes)
+
+    async def async_unsubscribe(self, subscription: Subscription, callback: Callback):
+        """Remove a callback, the subscription is cancelled with its last callback."""
         async with self.subscription_lock:
-            if sid in self._subscription_registry:
-                target, service, _ = self._subscription_registry.pop(sid)
+            if callback in subscription.callbacks:
+                subscription.callbacks.remove(callback)
+            if subscription.callbacks:
+                return
+
+            sid = subscription.sid
+            self._failed_subscriptions.discard(sid)
+            if subscription in self._subscription_registry:
+                self._subscription_registry.remove(subscription)
+                subscription.queue.close()
                 await self._async_unsubscribe(
-                    target,
-                    service,
+                    subscription.target,
+                    subscription.service,
                     sid,
                 )
 
-        if self._is_running() and not await self._async_has_subscriptions():
+        if self._is_running() and not self._has_subscriptions():
+            if not self._idle_linger:
+                LOGGER.info("No more subscriptions. Shutting down")
+                await self.async_stop()
+            elif self._linger_task is None:
+                LOGGER.debug("No more subscriptions. Shutting down in %ss unless subscribed again", self._idle_linger)
+                self._linger_task = asyncio.get_running_loop().create_task(self._async_linger())
+
+    async def _async_linger(self) -> None:
+        await asyncio.sleep(self._idle_linger)
+        self._linger_task = None
+        if not self._has_subscriptions():
             LOGGER.info("No more subscriptions. Shutting down")
             await self.async_stop()
 
     @wrap_exceptions
-    async def _async_subscribe(self, target, service) -> str:
+    async def _async_subscribe(self, target, service) -> tuple[str, int | None]:
         url = f"http://{target[0]}:{target[1]}/upnp/service/{service}/Event"
 
-        adv_host, adv_port = self._advertise_ip_port or (None, None)
-        if adv_host is None:
-            adv_host = get_local_ip(target_url=url)
-        if adv_port is None:
-            adv_port = self._listen_ip_port[1]
+        adv_host, adv_port = self._advertise_address(target, url)
 
         try:
             response = await self._requester.async_http_request(
@@ -151,15 +307,40 @@ class NotifyServer:
                 )
             )
         except UpnpConnectionTimeoutError as ex:
-            LOGGER.error("Failed to subscribe %s on %s at %s", service, target, url, exc_info=ex)
+            # the callers decide how loud this is, a switched off receiver times out on every attempt
+            LOGGER.debug("Failed to subscribe %s on %s at %s: %s", service, target, url, ex)
+            self._advertise_addresses.invalidate(target[0])
             raise ex
+        except UpnpCommunicationError:
+            # the callback address may be outdated, e.g. after the network configuration changed
+            self._advertise_addresses.invalidate(target[0])
+            raise
+        if response.status_code != 200:
+            self._advertise_addresses.invalidate(target[0])
         assert response.status_code == 200
         sid = response.headers["SID"]
-        LOGGER.debug("Subscribed %s on %s at %s", sid, service, target)
-        return sid
+        timeout = parse_timeout_header(response.headers.get("TIMEOUT"), self._subscription_timeout)
+        LOGGER.debug("Subscribed %s on %s at %s for %ss", sid, service, target, timeout)
+        return sid, timeout
+
+    def _advertise_address(self, target: tuple[str, int], url: str) -> tuple[str, int]:
+        """Callback address for the receiver."""
+        adv_host, adv_port = self._advertise_ip_port or (None, None)
+        if adv_host and adv_port:
+            # fully configured, nothing to detect
+            return adv_host, adv_port
+
+        def resolve() -> tuple[str, int]:
+            host, port = select_advertise_address(
+                target[0], self._listen_addresses, lambda: get_local_ip(target_url=url)
+            )
+            LOGGER.debug("Advertising %s:%s to %s", adv_host or host, adv_port or port, target)
+            return adv_host or host, adv_port or port
+
+        return self._advertise_addresses.get(target[0], resolve)
 
     @wrap_exceptions
-    async def _async_resubscribe(self, target, service, sid) -> str:
+    async def _async_resubscribe(self, target, service, sid) -> tuple[str, int | None]:
         try:
             response = await self._requester.async_http_request(
                 http_request=HttpRequest(
@@ -172,10 +353,14 @@ class NotifyServer:
                     body=None,
                 )
             )
+            if response.status_code == HTTPStatus.PRECONDITION_FAILED:
+                # the receiver does not know the sid (anymore), e.g. after a reboot
+                raise SubscriptionLapsedException(f"Subscription {sid} is unknown to {target}")
             assert response.status_code == 200
-            return response.headers["SID"]
+            timeout = parse_timeout_header(response.headers.get("TIMEOUT"), self._subscription_timeout)
+            return response.headers["SID"], timeout
         except UpnpConnectionTimeoutError as ex:
-            LOGGER.error("Failed to resubscribe %s on %s at %s", sid, service, target, exc_info=ex)
+            LOGGER.debug("Failed to resubscribe %s on %s at %s: %s", sid, service, target, ex)
             raise ex
 
     @wrap_exceptions
@@ -196,16 +381,20 @@ class NotifyServer:
         except UpnpConnectionTimeoutError as ex:
             LOGGER.warning("Failed to unsubscribe %s on %s at %s", sid, service, target, exc_info=ex)
 
-    async def _async_has_subscriptions(self) -> bool:
-        async with self.subscription_lock:
-            if self._subscription_registry:
-                for regs in self._subscription_registry.values():
-                    if len(regs) > 0:
-                        return True
-            return False
+    def _has_subscriptions(self) -> bool:
+        return len(self._subscription_registry) > 0 or len(self._pending_subscriptions) > 0
+
+    def is_subscription_healthy(self, subscription: Subscription) -> bool:
+        """Whether events are expected to be delivered for the subscription."""
+        return (
+            bool(self._is_running())
+            and subscription in self._subscription_registry
+            and not subscription.expired
+            and subscription.sid not in self._failed_subscriptions
+        )
 
     def _is_running(self) -> bool:
-        return self._resubscribe_task or self._aiohttp_server or self._server or self._socket
+        return self._resubscribe_task or self._aiohttp_server or self._servers or self._sockets
 
     async def async_stop(self):
         async with self.start_stop_lock:
@@ -214,26 +403,27 @@ class NotifyServer:
                 return
 
             LOGGER.info("Stopping Notify Server")
+            if self._linger_task:
+                self._linger_task.cancel()
+                self._linger_task = None
             if self._resubscribe_task:
                 self._resubscribe_task.cancel()
                 self._resubscribe_task = None
+            for task in self._renewal_tasks.values():
+                task.cancel()
+            self._renewal_tasks = {}
 
-            if await self._async_has_subscriptions():
+            if self._has_subscriptions():
                 await self._async_unsubscribe_all()
 
             if self._aiohttp_server:
                 await self._aiohttp_server.shutdown(5)
                 self._aiohttp_server = None
 
-            if self._server:
-                self._server.close()
-                self._server = None
-
-            if self._socket:
-                self._socket.close()
-                self._socket = None
+            self._close_servers()
 
-            self._buffer = {}
+            self._buffer.clear()
+            self._failed_subscriptions = set()
 
     async def async_start(self):
         async with self.start_stop_lock:
@@ -241,28 +431,43 @@ class NotifyServer:
                 # already running
                 return
 
-            self._socket = NotifyServer.create_socket(*self._listen_ip_port)
-
-            LOGGER.debug("Starting Notify Server on %s:%s ...", *self._listen_ip_port)
-
+            # a single aiohttp server handles the requests of all sockets
             self._aiohttp_server = web.Server(self._handle_request)
-            try:
-                self._server = await asyncio.get_event_loop().create_server(
-                    self._aiohttp_server,
-                    # host=_source[0],
-                    # port=_source[1],
-                    sock=self._socket,
-                )
-            except OSError as err:
-                LOGGER.error(
-                    "Failed to create HTTP server at %s:%d: %s",
-                    *self._listen_ip_port,
-                    err,
-                )
-                raise err
+            for address in self._listen_addresses:
+                LOGGER.debug("Starting Notify Server on %s:%s ...", address.host, address.port)
+                try:
+                    sock = NotifyServer.create_socket(address.host, address.port)
+                    self._sockets.append(sock)
+                    self._lifecycle_stats.binds += 1
+                    self._servers.append(
+                        await asyncio.get_event_loop().create_server(
+                            self._aiohttp_server,
+                            sock=sock,
+                        )
+                    )
+                except OSError as err:
+                    LOGGER.error(
+                        "Failed to create HTTP server at %s:%d: %s",
+                        address.host,
+                        address.port,
+                        err,
+                    )
+                    self._close_servers()
+                    self._aiohttp_server = None
+                    raise err
 
             await self._start_resubscriber()
 
+    def _close_servers(self) -> None:
+        for server in self._servers:
+            server.close()
+        self._servers = []
+
+        for sock in self._sockets:
+            sock.close()
+            self._lifecycle_stats.unbinds += 1
+        self._sockets = []
+
     async def _start_resubscriber(self):
         loop = asyncio.get_event_loop()
         self._resubscribe_task = loop.create_task(self._async_resubscribe_all())
@@ -270,50 +475,181 @@ class NotifyServer:
     async def _async_unsubscribe_all(self):
         async with self.subscription_lock:
             LOGGER.debug("Unsubscribing all subscriptions")
-            for sid in list(self._subscription_registry):
-                target, service, _ = self._subscription_registry.pop(sid)
+            for subscription in self._subscription_registry:
+                self._subscription_registry.remove(subscription)
+                subscription.queue.close()
                 await self._async_unsubscribe(
-                    target,
-                    service,
-                    sid,
+                    subscription.target,
+                    subscription.service,
+                    subscription.sid,
                 )
 
     async def _async_resubscribe_all(self):
+        """Start the renewal of each subscription when it is due, without waiting for other renewals."""
         while True:
-            await asyncio.sleep(self._subscription_timeout - 5)
-            for sid, (target, service, _) in self._subscription_registry.items():
-                await self._async_resubscribe(target, service, sid)
+            self._schedule_changed.clear()
+            next_renewal = None
+            for subscription in self._subscription_registry:
+                if subscription.sid in self._renewal_tasks or subscription.renew_at is None:
+                    continue
+                if subscription.renewal_due():
+                    self._start_renewal(subscription)
+                elif next_renewal is None or subscription.renew_at < next_renewal:
+                    next_renewal = subscription.renew_at
+
+            # sleep until the next renewal is due, or the subscriptions change
+            timeout = None if next_renewal is None else max(next_renewal - time.monotonic(), 0)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._schedule_changed.wait(), timeout)
+
+    def _start_renewal(self, subscription: Subscription) -> None:
+        sid = subscription.sid
+        task = asyncio.get_running_loop().create_task(self._async_renew(subscription))
+        self._renewal_tasks[sid] = task
+
+        def on_done(_: asyncio.Task) -> None:
+            if self._renewal_tasks.get(sid) is task:
+                del self._renewal_tasks[sid]
+            self._schedule_changed.set()
+
+        task.add_done_callback(on_done)
+
+    async def _async_renew(self, subscription: Subscription) -> None:
+        async with self._renewal_semaphore:
+            if subscription not in self._subscription_registry:
+                # unsubscribed while waiting
+                return
+            try:
+                if subscription.sid in self._failed_subscriptions:
+                    # renewing failed before, the receiver most likely forgot the subscription
+                    await self._async_recover(subscription)
+                    return
+                try:
+                    _, timeout = await self._async_resubscribe(
+                        subscription.target, subscription.service, subscription.sid
+                    )
+                except (SubscriptionLapsedException, CommunicationTimeoutException, UpnpConnectionTimeoutError):
+                    self._subscription_stats.lapsed += 1
+                    # the receiver may not reach the callback address anymore
+                    self._advertise_addresses.invalidate(subscription.target[0])
+                    LOGGER.info(
+                        "Subscription %s on %s at %s lapsed, subscribing again",
+                        subscription.sid,
+                        subscription.service,
+                        subscription.target,
+                    )
+                    await self._async_recover(subscription)
+                    return
+            except Exception as ex:
+                # whatever went wrong, the renewal has to be retried, less often the longer it keeps failing
+                first_failure = not subscription.retrying
+                self._failed_subscriptions.add(subscription.sid)
+                delay = subscription.on_renewal_failed()
+                if first_failure:
+                    LOGGER.warning(
+                        "Failed to renew subscription %s on %s at %s, retrying in %.0fs: %r",
+                        subscription.sid,
+                        subscription.service,
+                        subscription.target,
+                        delay,
+                        ex,
+                    )
+                else:
+                    LOGGER.debug(
+                        "Failed to renew subscription %s on %s at %s again, retrying in %.0fs",
+                        subscription.sid,
+                        subscription.service,
+                        subscription.target,
+                        delay,
+                        exc_info=ex,
+                    )
+            else:
+                LOGGER.debug("Renewed subscription %s for %ss", subscription.sid, timeout)
+                self._failed_subscriptions.discard(subscription.sid)
+                subscription.on_granted(timeout)
+
+    async def _async_recover(self, subscription: Subscription) -> None:
+        """Replace a lapsed subscription by a new one for the same service and callbacks."""
+        old_sid = subscription.sid
+        sid, timeout = await self._async_subscribe(subscription.target, subscription.service)
+        if subscription not in self._subscription_registry:
+            # unsubscribed in the meantime
+            await self._async_unsubscribe(subscription.target, subscription.service, sid)
+            return
+
+        self._failed_subscriptions.discard(old_sid)
+        self._buffer.discard(old_sid)
+
+        self._subscription_registry.rekey(subscription, sid)
+        subscription.on_granted(timeout)
+        self._subscription_stats.recovered += 1
+        LOGGER.info(
+            "Recovered subscription %s on %s at %s as %s", old_sid, subscription.service, subscription.target, sid
+        )
+
+        # events sent right after subscribing may have arrived before the new sid was known
+        self._replay_buffer(subscription)
 
     async def _handle_request(self, request: aiohttp.web.BaseRequest) -> aiohttp.web.Response:
         """Handle incoming requests."""
         headers = request.headers
-        body = await request.text()
 
         if request.method != "NOTIFY":
             LOGGER.debug("Not notify")
             return aiohttp.web.Response(status=405)
 
-        LOGGER.debug(
-            "Incoming request:\nNOTIFY\n%s\n\n%s",
-            "\n".join([key + ": " + value for key, value in headers.items()]),
-            body,
-        )
-
-        status = await self._handle_notify(headers, body)
+        if self._streaming_parser:
+            LOGGER.debug(
+                "Incoming request:\nNOTIFY\n%s",
+                "\n".join([key + ": " + value for key, value in headers.items()]),
+            )
+            status = await self._handle_notify_stream(headers, request.content)
+        else:
+            body = await request.text()
+            LOGGER.debug(
+                "Incoming request:\nNOTIFY\n%s\n\n%s",
+                "\n".join([key + ": " + value for key, value in headers.items()]),
+                body,
+            )
+            status = await self._handle_notify(headers, body)
         LOGGER.debug("NOTIFY response status: %s", status)
         LOGGER.debug("Sending response: %s", status)
 
         return aiohttp.web.Response(status=status)
 
-    async def _handle_notify(self, headers: Mapping[str, str], body: str) -> HTTPStatus:
-        """Handle a NOTIFY request."""
-        # ensure valid request
+    @staticmethod
+    def _validate_notify_headers(headers: Mapping[str, str]) -> HTTPStatus | None:
         if "NT" not in headers or "NTS" not in headers:
             return HTTPStatus.BAD_REQUEST
 
         if headers["NT"] != "upnp:event" or headers["NTS"] != "upnp:propchange" or "SID" not in headers:
             return HTTPStatus.PRECONDITION_FAILED
 
+        return None
+
+    async def _handle_notify_stream(self, headers: Mapping[str, str], content: aiohttp.StreamReader) -> HTTPStatus:
+        """Handle a NOTIFY request, parsing the body while it is received."""
+        # ensure valid request before reading the body
+        if status := self._validate_notify_headers(headers):
+            return status
+
+        try:
+            changes = await async_parse_notify_body(content.iter_chunked(DEFAULT_CHUNK_SIZE))
+        except Et.ParseError as ex:
+            LOGGER.error("Failed to parse event of %s", headers.get("SID"), exc_info=ex)
+            raise ex
+        LOGGER.debug("Event changes: %s", changes)
+
+        self._notify_subscribed_callbacks(headers.get("SID"), changes)
+
+        return HTTPStatus.OK
+
+    async def _handle_notify(self, headers: Mapping[str, str], body: str) -> HTTPStatus:
+        """Handle a NOTIFY request."""
+        # ensure valid request
+        if status := self._validate_notify_headers(headers):
+            return status
+
         # decode event and send updates to service
         changes = {}
 
@@ -331,15 +667,15 @@ class NotifyServer:
             LOGGER.error("Failed to parse event:\n%s", body, exc_info=ex)
             raise ex
 
-        await self._notify_subscribed_callbacks(headers.get("SID"), changes)
+        self._notify_subscribed_callbacks(headers.get("SID"), changes)
 
         return HTTPStatus.OK
 
-    async def _notify_subscribed_callbacks(self, sid: str, changes) -> Mapping[str, str]:
+    def _notify_subscribed_callbacks(self, sid: str, changes: Mapping[str, str]) -> None:
+        """Queue the event for the callbacks, the receiver does not have to wait for them to finish."""
         subscription = self._subscription_registry.get(sid)
         if subscription:
-            (_, _, callback) = subscription
-            await callback(changes)
+            subscription.queue.put(changes)
         else:
             # subscriber not yet subscribed -> save to buffer
-            self._buffer.setdefault(sid, []).append(changes)
+            self._buffer.append(sid, changes)
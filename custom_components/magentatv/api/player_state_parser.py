@@ -0,0 +1,71 @@
+"""Single-pass parsing of X-getPlayerState responses.
+
+The response is fed to expat once, the values of the known response elements are collected while parsing and
+handed to the compiled PlayContentEvent validator. No element tree is built.
+"""
+
+from __future__ import annotations
+
+from xml.parsers import expat
+
+from defusedxml import EntitiesForbidden, ExternalReferenceForbidden
+
+from .event_model import PLAYER_STATE_PARSER, PlayContentEvent
+
+# response elements carrying a PlayContentEvent field, other elements are skipped like the model ignores them.
+# Without namespace processing the envelope elements keep their prefix ("s:Body"), so they never match.
+_FIELD_TAGS = frozenset(field.alias or name for name, field in PlayContentEvent.model_fields.items())
+
+
+def _forbid_entity_declaration(name, is_parameter_entity, value, base, sysid, pubid, notation_name):
+    raise EntitiesForbidden(name, value, base, sysid, pubid, notation_name)
+
+
+def _forbid_unparsed_entity_declaration(name, base, sysid, pubid, notation_name):
+    raise EntitiesForbidden(name, None, base, sysid, pubid, notation_name)
+
+
+def _forbid_external_reference(context, base, sysid, pubid):
+    raise ExternalReferenceForbidden(context, base, sysid, pubid)
+
+
+class _PlayerStateCollector:
+    """Expat handlers collecting the values of the response element by tag"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, str | None] = {}
+        self._tag: str | None = None
+
+    def start(self, tag: str, attrib: list[str]) -> None:
+        if tag in _FIELD_TAGS:
+            self._tag = tag
+            # an empty element is unset on the receiver, not an empty string
+            self.values[tag] = None
+
+    def end(self, tag: str) -> None:
+        self._tag = None
+
+    def data(self, data: str) -> None:
+        if self._tag is not None:
+            self.values[self._tag] = data
+
+
+def parse_player_state(body: str | bytes) -> PlayContentEvent:
+    """Parse the SOAP response of X-getPlayerState.
+
+    Entity declarations and external references are rejected like defusedxml does. Raises
+    xml.parsers.expat.ExpatError for malformed responses and pydantic.ValidationError for invalid values.
+    """
+    collector = _PlayerStateCollector()
+    parser = expat.ParserCreate()
+    # the values are short, deliver each of them in a single data call
+    parser.buffer_text = True
+    parser.ordered_attributes = True
+    parser.StartElementHandler = collector.start
+    parser.EndElementHandler = collector.end
+    parser.CharacterDataHandler = collector.data
+    parser.EntityDeclHandler = _forbid_entity_declaration
+    parser.UnparsedEntityDeclHandler = _forbid_unparsed_entity_declaration
+    parser.ExternalEntityRefHandler = _forbid_external_reference
+    parser.Parse(body, True)
+    return PLAYER_STATE_PARSER.validate_python(collector.values)
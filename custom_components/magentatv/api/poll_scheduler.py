@@ -0,0 +1,95 @@
+import time
+from collections.abc import Callable
+
+from .backoff import ExponentialBackoff
+
+DEFAULT_MIN_INTERVAL = 10
+DEFAULT_MAX_INTERVAL = 120
+DEFAULT_EVENT_FRESHNESS = 600
+DEFAULT_MAX_BACKOFF = 600
+
+
+class PollScheduler:
+    """Decides whether polling the player state is necessary.
+
+    Polls are only a backup in case events have been missed. While the event subscription is healthy and events
+    arrived recently, polls are stretched to max_interval. As soon as events stop arriving or the subscription
+    fails, polling falls back to min_interval.
+
+    Receivers in deep sleep or not reachable at all are polled with exponential backoff instead.
+    The backoff is reset as soon as an event of the receiver arrives.
+    """
+
+    _last_poll: float | None = None
+    _last_event: float | None = None
+
+    def __init__(
+        self,
+        min_interval: float = DEFAULT_MIN_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        event_freshness: float = DEFAULT_EVENT_FRESHNESS,
+        backoff: ExponentialBackoff | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert 0 < min_interval <= max_interval
+
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._event_freshness = event_freshness
+        self._backoff = backoff or ExponentialBackoff(initial=2 * min_interval, maximum=DEFAULT_MAX_BACKOFF)
+        self._clock = clock
+
+        self._last_poll = None
+        self._last_event = None
+        self._subscription_healthy = False
+
+    def on_event(self) -> None:
+        self._last_event = self._clock()
+        # the receiver is obviously awake
+        self._backoff.reset()
+
+    def on_poll(self, idle: bool = False) -> None:
+        """Register a successful poll. Idle receivers (deep sleep) are polled with backoff."""
+        self._last_poll = self._clock()
+        if idle:
+            self._backoff.next()
+        else:
+            self._backoff.reset()
+
+    def on_unreachable(self) -> None:
+        """Register a failed poll or pairing attempt."""
+        self._last_poll = self._clock()
+        self._backoff.next()
+
+    def on_subscription_state(self, healthy: bool) -> None:
+        if not healthy:
+            # events received through a lapsed subscription are not an indicator anymore
+            self._last_event = None
+        self._subscription_healthy = healthy
+
+    def _events_fresh(self, now: float) -> bool:
+        return (
+            self._subscription_healthy
+            and self._last_event is not None
+            and now - self._last_event <= self._event_freshness
+        )
+
+    def _interval(self, now: float) -> float:
+        if self._backoff.active:
+            return self._backoff.delay
+        if self._events_fresh(now):
+            return self._max_interval
+        return self._min_interval
+
+    @property
+    def interval(self) -> float:
+        """Currently effective poll interval in seconds."""
+        return self._interval(self._clock())
+
+    def should_poll(self) -> bool:
+        if self._last_poll is None:
+            return True
+        now = self._clock()
+        interval = self._interval(now)
+        # the caller checks every min_interval, tolerate the jitter of its timer
+        return now - self._last_poll >= interval - self._min_interval / 2
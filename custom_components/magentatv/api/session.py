@@ -0,0 +1,131 @@
+"""Keep-alive connection pool used for all HTTP requests towards a single receiver."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import Iterator, Mapping
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import aiohttp
+from async_upnp_client.aiohttp import AiohttpSessionRequester
+
+DEFAULT_LIMIT_PER_HOST = 4
+DEFAULT_KEEPALIVE_TIMEOUT = 30.0
+DEFAULT_REQUEST_TIMEOUT = 5
+
+# future of the request sent by the current task, resolved once the request is written to its connection
+_request_written: ContextVar[asyncio.Future[None] | None] = ContextVar("request_written", default=None)
+
+
+@contextlib.contextmanager
+def track_written(written: asyncio.Future[None]) -> Iterator[None]:
+    """Resolve written once the request sent within the block has been written to the connection.
+
+    The requests of a pool may use different connections, waiting for the previous request to be written keeps their
+    order without waiting for the response. If the request fails before being written, written is cancelled, so the
+    following requests are not sent either.
+    """
+    token = _request_written.set(written)
+    try:
+        yield
+    except BaseException:
+        if not written.done():
+            written.cancel()
+        raise
+    finally:
+        _request_written.reset(token)
+        if not written.done():
+            written.set_result(None)
+
+
+class ConnectionPoolStats:
+    """Counters about the connections handed out by a ConnectionPool"""
+
+    opened: int = 0
+    reused: int = 0
+
+    def __init__(self) -> None:
+        self.opened = 0
+        self.reused = 0
+
+    def __repr__(self) -> str:
+        return f"ConnectionPoolStats(opened={self.opened}, reused={self.reused})"
+
+
+class ConnectionPool:
+    """Lazily created aiohttp session keeping idle connections to the receiver open.
+
+    The underlying session is created on first use, as it has to be bound to the running event loop,
+    and is transparently recreated after it has been closed.
+    """
+
+    _session: aiohttp.ClientSession | None
+    _requester: AiohttpSessionRequester | None
+
+    def __init__(
+        self,
+        limit_per_host: int = DEFAULT_LIMIT_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        request_timeout: int = DEFAULT_REQUEST_TIMEOUT,
+        http_headers: Mapping[str, str] | None = None,
+    ) -> None:
+        assert limit_per_host > 0
+        assert keepalive_timeout > 0
+
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._request_timeout = request_timeout
+        self._http_headers = http_headers
+
+        self._session = None
+        self._requester = None
+        self._stats = ConnectionPoolStats()
+
+    @property
+    def stats(self) -> ConnectionPoolStats:
+        return self._stats
+
+    @property
+    def requester(self) -> AiohttpSessionRequester:
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            self._requester = AiohttpSessionRequester(
+                session=self._session,
+                with_sleep=False,
+                timeout=self._request_timeout,
+                http_headers=self._http_headers,
+            )
+        return self._requester
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_request_chunk_sent.append(self._on_request_chunk_sent)
+
+        connector = aiohttp.TCPConnector(
+            limit_per_host=self._limit_per_host,
+            # idle connections are evicted after this many seconds
+            keepalive_timeout=self._keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+
+    async def _on_connection_create_end(self, session: aiohttp.ClientSession, context: SimpleNamespace, params) -> None:
+        self._stats.opened += 1
+
+    async def _on_connection_reuseconn(self, session: aiohttp.ClientSession, context: SimpleNamespace, params) -> None:
+        self._stats.reused += 1
+
+    async def _on_request_chunk_sent(self, session: aiohttp.ClientSession, context: SimpleNamespace, params) -> None:
+        # called by the sending task right before the body is handed to the transport, the waiters run afterwards
+        written = _request_written.get()
+        if written is not None and not written.done():
+            written.set_result(None)
+
+    async def async_close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+        self._requester = None
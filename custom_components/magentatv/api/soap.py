@@ -0,0 +1,73 @@
+"""Precompiled SOAP request templates.
+
+The envelope, control url and headers of a (service, action) pair are rendered once.
+Values that change between requests are marked with :func:`slot` and are the only parts filled in per request.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from xml.sax.saxutils import escape
+
+from async_upnp_client.const import HttpRequest
+
+# marker surrounding slot names, survives xml escaping and is not valid in xml documents anyway
+_SLOT_MARK = "\x00"
+
+
+def slot(name: str) -> str:
+    """Placeholder for a value that is filled in when rendering the template."""
+    return f"{_SLOT_MARK}{name}{_SLOT_MARK}"
+
+
+def build_envelope(service: str, action: str, arguments: Mapping[str, str]) -> str:
+    arguments = "".join([f"   <{k}>{escape(v)}</{k}>\n" for k, v in arguments.items()])
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" s:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">\n'
+        " <s:Body>\n"
+        f'  <u:{action} xmlns:u="urn:schemas-upnp-org:service:{service}:1">\n'
+        f"{arguments}"
+        f"  </u:{action}>\n"
+        " </s:Body>\n"
+        "</s:Envelope>"
+    )
+
+
+class SoapRequestTemplate:
+    """SOAP request of a single (service, action) pair with all static parts prebuilt."""
+
+    url: str
+    headers: Mapping[str, str]
+
+    def __init__(self, host: str, port: int, service: str, action: str, arguments: Mapping[str, str]) -> None:
+        self.service = service
+        self.action = action
+        self.url = f"http://{host}:{port}/upnp/service/{service}/Control"
+        self.headers = {
+            "SOAPACTION": f"urn:schemas-upnp-org:service:{service}:1#{action}",
+            "HOST": f"{host}:{port}",
+            "Content-Type": 'text/xml; charset="utf-8"',
+        }
+
+        parts = build_envelope(service, action, arguments).split(_SLOT_MARK)
+        # even indices are literal xml, odd indices are slot names
+        self._literals = tuple(parts[0::2])
+        self._slots = tuple(parts[1::2])
+
+    @property
+    def slots(self) -> tuple[str, ...]:
+        return self._slots
+
+    def render(self, **values: str) -> str:
+        if not self._slots:
+            return self._literals[0]
+
+        chunks = [self._literals[0]]
+        for name, literal in zip(self._slots, self._literals[1:], strict=True):
+            chunks.append(escape(values[name]))
+            chunks.append(literal)
+        return "".join(chunks)
+
+    def request(self, **values: str) -> HttpRequest:
+        return HttpRequest(method="POST", url=self.url, headers=self.headers, body=self.render(**values))
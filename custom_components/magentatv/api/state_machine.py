@@ -2,10 +2,33 @@ import datetime as dt
 from enum import Enum
 from logging import Logger, getLogger
 
+from pydantic import ValidationError
+
 from .event_model import EitChangedEvent, PlayContentEvent, ProgramInfo
 
 LOGGER: Logger = getLogger(__package__ + ".state_machine")
 
+# field sets of the player state poll responses
+_POLL_KEYS_DEEP_SLEEP = frozenset({"play_back_state"})
+_POLL_KEYS_TV_RUNNING = frozenset(
+    {
+        "chan_key",
+        "duration",
+        "media_code",
+        "media_type",
+        "play_back_state",
+        "play_position",
+    }
+)
+_POLL_KEYS_OFF = frozenset(
+    {
+        "chan_key",
+        "media_code",
+        "media_type",
+        "play_back_state",
+    }
+)
+
 
 class State(str, Enum):
     """State of media receiver."""
@@ -23,8 +46,8 @@ class MediaReceiverStateMachine:
     position_last_update: dt.datetime | None
     chan_key: int | None = None
 
-    program_current: ProgramInfo | None = None
-    program_next: ProgramInfo | None = None
+    # event carrying the current program info, only validated when the programs are accessed
+    _program_info_event: EitChangedEvent | None = None
 
     _last_poll_player_state: PlayContentEvent | None = None
     _last_event_play_content = None
@@ -50,12 +73,12 @@ class MediaReceiverStateMachine:
         self._last_event_eit_changed = data
 
     def _on_event_eit_changed_changed(self, data: EitChangedEvent) -> None:
-        if "channel_num" in data.set_keys():
+        data_keys = data.set_keys()
+        if "channel_num" in data_keys:
             self.chan_key = data.channel_num
 
-        if "program_info" in data.set_keys():
-            self.program_current = data.program_info[0] or None
-            self.program_next = data.program_info[1] or None
+        if "program_info" in data_keys:
+            self._program_info_event = data
 
     def on_event_play_content(self, data: PlayContentEvent) -> None:
         LOGGER.debug("On Event PlayContent: %s", data)
@@ -126,21 +149,14 @@ class MediaReceiverStateMachine:
         data_keys = data.set_keys()
 
         # deep sleep ?
-        if {"play_back_state"} == set(data_keys):
+        if data_keys == _POLL_KEYS_DEEP_SLEEP:
             if data.play_back_state == 0:
                 self.state = State.OFF
                 self._clear_non_state_attributes()
             return
 
         # tv running
-        if {
-            "chan_key",
-            "duration",
-            "media_code",
-            "media_type",
-            "play_back_state",
-            "play_position",
-        } <= data_keys:
+        if data_keys >= _POLL_KEYS_TV_RUNNING:
             if data.fast_speed == 0:
                 self.state = State.PAUSED
             else:
@@ -153,12 +169,7 @@ class MediaReceiverStateMachine:
             self.position_last_update = dt.datetime.now()
             return
 
-        if {
-            "chan_key",
-            "media_code",
-            "media_type",
-            "play_back_state",
-        } == set(data_keys):
+        if data_keys == _POLL_KEYS_OFF:
             if self._last_poll_player_state is not None:
                 # this is an update and NOT the initial poll
                 if not self._ignore_next_poll_event:
@@ -174,9 +185,36 @@ class MediaReceiverStateMachine:
         self.position = None
         self.position_last_update = None
 
-        self.program_current = None
-        self.program_next = None
+        self._program_info_event = None
+
+    def _program(self, index: int) -> ProgramInfo | None:
+        if self._program_info_event is None:
+            return None
+        try:
+            programs = self._program_info_event.programs
+        except ValidationError as ex:
+            LOGGER.warning("Invalid program info in event %s", self._program_info_event, exc_info=ex)
+            self._program_info_event = None
+            return None
+        # the receiver may send fewer than two programs, e.g. only the current one
+        if index >= len(programs):
+            return None
+        return programs[index] or None
+
+    @property
+    def program_current(self) -> ProgramInfo | None:
+        return self._program(0)
+
+    @property
+    def program_next(self) -> ProgramInfo | None:
+        return self._program(1)
 
     @property
     def available(self) -> bool:
         return self._available
+
+    @property
+    def deep_sleep(self) -> bool:
+        """Whether the last poll reported the receiver to be in deep sleep."""
+        data = self._last_poll_player_state
+        return data is not None and data.set_keys() == _POLL_KEYS_DEEP_SLEEP and data.play_back_state == 0
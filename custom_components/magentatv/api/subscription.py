@@ -0,0 +1,183 @@
+"""Bookkeeping of UPnP event subscriptions held by the NotifyServer."""
+
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+
+from .backoff import ExponentialBackoff
+from .const import LOGGER
+from .dispatch import DispatchQueue, DispatchStats
+
+Callback = Callable[[Mapping[str, str]], Awaitable[None]]
+
+# renew this many seconds before the subscription expires, at most half of the granted timeout
+RENEWAL_MARGIN = 30
+# delay between renewal attempts of a subscription whose renewal failed, growing up to RENEWAL_RETRY_MAXIMUM while
+# the receiver stays unreachable, e.g. switched off
+RENEWAL_RETRY_DELAY = 10
+RENEWAL_RETRY_MAXIMUM = 600
+
+_timeout_re = re.compile(r"Second-(\d+|infinite)", re.IGNORECASE)
+
+
+def parse_timeout_header(value: str | None, default: int) -> int | None:
+    """Seconds granted by a TIMEOUT header ("Second-300"), None for infinite subscriptions."""
+    match = _timeout_re.fullmatch(value.strip()) if value else None
+    if match is None:
+        return default
+    if match.group(1).lower() == "infinite":
+        return None
+    return int(match.group(1))
+
+
+class SubscriptionStats:
+    """Counters about lapsed subscriptions of a NotifyServer"""
+
+    lapsed: int = 0
+    recovered: int = 0
+
+    def __init__(self) -> None:
+        self.lapsed = 0
+        self.recovered = 0
+
+    def __repr__(self) -> str:
+        return f"SubscriptionStats(lapsed={self.lapsed}, recovered={self.recovered})"
+
+
+class Subscription:
+    """Event subscription of a single service of a receiver.
+
+    All callbacks interested in the same service of a receiver share one subscription, it is cancelled when the
+    last callback is removed.
+    The sid changes when a lapsed subscription is replaced by a new one, so hold on to the object, not the sid.
+    """
+
+    sid: str
+    target: tuple[str, int]
+    service: str
+    callbacks: list[Callback]
+    queue: DispatchQueue
+
+    expires: float | None
+    renew_at: float | None
+
+    def __init__(
+        self,
+        sid: str,
+        target: tuple[str, int],
+        service: str,
+        callback: Callback,
+        clock: Callable[[], float] = time.monotonic,
+        dispatch_stats: DispatchStats | None = None,
+        retry_backoff: ExponentialBackoff | None = None,
+    ) -> None:
+        self.sid = sid
+        self.target = target
+        self.service = service
+        self.callbacks = [callback]
+        self.queue = DispatchQueue(self._async_notify_callbacks, stats=dispatch_stats)
+        self._clock = clock
+        self._retry_backoff = retry_backoff or ExponentialBackoff(
+            initial=RENEWAL_RETRY_DELAY, maximum=RENEWAL_RETRY_MAXIMUM
+        )
+
+        self.expires = None
+        self.renew_at = None
+
+    def __repr__(self) -> str:
+        return f"Subscription(sid={self.sid}, target={self.target}, service={self.service})"
+
+    async def _async_notify_callbacks(self, changes: Mapping[str, str]) -> None:
+        for callback in list(self.callbacks):
+            try:
+                await callback(changes)
+            except Exception as ex:
+                # a failing callback must neither affect the other callbacks nor the following events
+                LOGGER.error("Failed to handle event of %s: %s", self.sid, changes, exc_info=ex)
+
+    def on_granted(self, timeout: int | None) -> None:
+        """Register a successful (re)subscription for timeout seconds, None meaning it never expires."""
+        self._retry_backoff.reset()
+        if timeout is None:
+            self.expires = None
+            self.renew_at = None
+            return
+        now = self._clock()
+        self.expires = now + timeout
+        self.renew_at = self.expires - min(RENEWAL_MARGIN, timeout / 2)
+
+    def on_renewal_failed(self) -> float:
+        """Schedule the next renewal attempt after a failed one, returns the delay in seconds."""
+        delay = self._retry_backoff.next()
+        self.renew_at = self._clock() + delay
+        return delay
+
+    @property
+    def retrying(self) -> bool:
+        """Whether renewing failed since the subscription was granted the last time."""
+        return self._retry_backoff.active
+
+    @property
+    def retry_delay(self) -> float:
+        return self._retry_backoff.delay
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and self._clock() >= self.expires
+
+    def renewal_due(self) -> bool:
+        return self.renew_at is not None and self._clock() >= self.renew_at
+
+
+class SubscriptionRegistry:
+    """Subscriptions indexed by sid, by target and by (target, service)"""
+
+    def __init__(self) -> None:
+        self._by_sid: dict[str, Subscription] = {}
+        self._by_target: dict[tuple[str, int], dict[str, Subscription]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_sid)
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(list(self._by_sid.values()))
+
+    def __contains__(self, subscription: object) -> bool:
+        return isinstance(subscription, Subscription) and self._by_sid.get(subscription.sid) is subscription
+
+    def get(self, sid: str) -> Subscription | None:
+        return self._by_sid.get(sid)
+
+    def get_service(self, target: tuple[str, int], service: str) -> Subscription | None:
+        return self._by_target.get(target, {}).get(service)
+
+    def for_target(self, target: tuple[str, int]) -> list[Subscription]:
+        return list(self._by_target.get(target, {}).values())
+
+    def add(self, subscription: Subscription) -> None:
+        assert subscription.sid not in self._by_sid
+        assert self.get_service(subscription.target, subscription.service) is None
+        self._by_sid[subscription.sid] = subscription
+        self._by_target.setdefault(subscription.target, {})[subscription.service] = subscription
+
+    def remove(self, subscription: Subscription) -> None:
+        if subscription not in self:
+            return
+        del self._by_sid[subscription.sid]
+        services = self._by_target[subscription.target]
+        del services[subscription.service]
+        if not services:
+            del self._by_target[subscription.target]
+
+    def rekey(self, subscription: Subscription, sid: str) -> None:
+        """Change the sid of a registered subscription."""
+        assert subscription in self
+        del self._by_sid[subscription.sid]
+        subscription.sid = sid
+        self._by_sid[sid] = subscription
+
+    def clear(self) -> None:
+        self._by_sid.clear()
+        self._by_target.clear()
@@ -39,7 +39,7 @@ from custom_components.magentatv import async_get_notification_server
 from custom_components.magentatv.api.exceptions import PairingTimeoutException
 
 from .api import Client
-from .const import CONF_USER_ID, DATA_USER_ID, DOMAIN, LOGGER
+from .const import CONF_USER_ID, CONF_VERIFICATION_CODE, DATA_USER_ID, DOMAIN, LOGGER
 
 FlowInput = Mapping[str, Any] | None
 ST = "urn:schemas-upnp-org:device:MediaRenderer:1"
@@ -326,6 +326,7 @@ class MagentaTvFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 CONF_UNIQUE_ID: self._udn,
                 CONF_URL: self.descriptor_url,
                 CONF_USER_ID: self.user_id,
+                CONF_VERIFICATION_CODE: self.verification_code,
             },
         )
 
@@ -1,4 +1,5 @@
 """Constants for homeassistant-magentatv."""
+import ipaddress
 from logging import Logger, getLogger
 from typing import Any
 
@@ -19,6 +20,9 @@ CONF_LISTEN_ADDRESS = "listen_address"
 CONF_ADVERTISE_PORT = "advertise_port"
 CONF_ADVERTISE_ADDRESS = "advertise_address"
 CONF_USER_ID = "user_id"
+CONF_VERIFICATION_CODE = "verification_code"
+CONF_COALESCING_WINDOW = "coalescing_window"
+CONF_IDLE_LINGER = "idle_linger"
 
 
 DATA_USER_ID = CONF_USER_ID
@@ -26,9 +30,20 @@ DATA_LISTEN_ADDRESS = CONF_LISTEN_ADDRESS
 DATA_LISTEN_PORT = CONF_LISTEN_PORT
 DATA_ADVERTISE_ADDRESS = CONF_ADVERTISE_ADDRESS
 DATA_ADVERTISE_PORT = CONF_ADVERTISE_PORT
+DATA_COALESCING_WINDOW = CONF_COALESCING_WINDOW
+DATA_IDLE_LINGER = CONF_IDLE_LINGER
 DATA_NOTIFICATION_SERVER = "notification_server"
+DATA_STARTUP_COORDINATOR = "startup_coordinator"
+
+# seconds during which the state changes of an event burst are published as a single state write
+DEFAULT_COALESCING_WINDOW = 0.5
+
+ATTR_POLL_INTERVAL = "poll_interval"
+ATTR_STATE_WRITES_PER_MINUTE = "state_writes_per_minute"
 
 SERVICE_SEND_KEY = "send_key"
+SERVICE_SEND_KEYS = "send_keys"
+SERVICE_TUNE_CHANNEL = "tune_channel"
 SERVICE_SEND_TEXT = "send_text"
 
 
@@ -39,9 +54,25 @@ def key_code(value: Any) -> KeyCode:
 
     # This is expected to be the most common case, so check it first.
     if isinstance(value, str):
-        return KeyCode[value]
+        try:
+            return KeyCode[value]
+        except KeyError as ex:
+            raise vol.Invalid(f"Unknown key code {value}") from ex
 
     elif isinstance(value, KeyCode):
         return value
 
     raise vol.Invalid("value is not a valid Key Code")
+
+
+def listen_address(value: Any) -> tuple[str, int | None]:
+    """Validate a listen address ("10.1.0.5", "10.1.0.5/24" or "10.1.0.5/24:11224") into address and port."""
+    if not isinstance(value, str):
+        raise vol.Invalid("value is not a string")
+
+    address, _, port = value.partition(":")
+    try:
+        ipaddress.IPv4Interface(address)
+        return address, vol.Range(min=1, max=65535)(int(port)) if port else None
+    except ValueError as ex:
+        raise vol.Invalid(f"value is not a valid listen address: {ex}") from ex
@@ -0,0 +1,186 @@
+"""Polling and event handling of a receiver, shared by all of its entities."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import Client, KeyCode, MediaReceiverStateMachine, PollScheduler
+from .api.event_model import STB_EIT_CHANGED, STB_PLAY_CONTENT, EventDecoder
+from .api.exceptions import (
+    CommunicationException,
+    CommunicationTimeoutException,
+    NotPairedException,
+    PairingTimeoutException,
+)
+from .const import CONF_VERIFICATION_CODE, DEFAULT_COALESCING_WINDOW, LOGGER
+from .startup import StartupCoordinator
+
+SCAN_INTERVAL = timedelta(seconds=10)  # only backup in case events have been missed
+CHANNEL_TUNE_TIMEOUT = 10  # seconds to wait for the receiver to report the new channel
+
+
+class MagentaTvCoordinator(DataUpdateCoordinator[MediaReceiverStateMachine]):
+    """Keeps the state of a receiver for any number of entities.
+
+    The receiver is polled once per interval and subscribed to once, no matter how many entities listen.
+    Events are applied to the state machine right away, the listeners are updated at most once per coalescing
+    window.
+    """
+
+    config_entry: ConfigEntry
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        client: Client,
+        startup_coordinator: StartupCoordinator | None = None,
+        coalescing_window: float = DEFAULT_COALESCING_WINDOW,
+    ) -> None:
+        super().__init__(
+            hass,
+            LOGGER,
+            config_entry=config_entry,
+            name=config_entry.title,
+            update_interval=SCAN_INTERVAL,
+        )
+        self.client = client
+        self.state_machine = MediaReceiverStateMachine()
+        self.poll_scheduler = PollScheduler(min_interval=SCAN_INTERVAL.total_seconds())
+        self._event_decoder = EventDecoder()
+
+        self._startup_coordinator = startup_coordinator
+        self._warm_up: asyncio.Task | None = None
+
+        # futures waiting for the receiver to report a channel number, see async_tune_channel
+        self._channel_waiters: dict[int, list[asyncio.Future[None]]] = {}
+
+        self._listener_debouncer: Debouncer | None = None
+        if coalescing_window > 0:
+            self._listener_debouncer = Debouncer(
+                hass,
+                LOGGER,
+                cooldown=coalescing_window,
+                immediate=False,
+                function=self.async_update_listeners,
+            )
+
+        # subscibe for player events
+        self.client.subscribe(self._async_on_event)
+
+    async def async_warm_up(self) -> None:
+        """First poll of the receiver, done once for all of its entities, together with the other receivers when
+        starting up."""
+        if self._warm_up is None:
+            if self._startup_coordinator is None:
+                warm_up = self.async_refresh()
+            else:
+                warm_up = self._startup_coordinator.async_run(self.config_entry.entry_id, self.async_refresh, self.name)
+            self._warm_up = self.config_entry.async_create_background_task(
+                self.hass, warm_up, name=f"{self.name} warm up"
+            )
+        await asyncio.shield(self._warm_up)
+
+    async def async_close(self) -> None:
+        await self.async_shutdown()
+        if self._listener_debouncer is not None:
+            self._listener_debouncer.async_cancel()
+        self.client.unsubscribe(self._async_on_event)
+        await self.client.async_close()
+
+    async def _async_on_event(self, changes):
+        LOGGER.debug("%s: Event %s", self.name, changes)
+        events = self._event_decoder.decode(changes)
+        if events:
+            self.poll_scheduler.on_event()
+
+        if STB_PLAY_CONTENT in events:
+            self.state_machine.on_event_play_content(events[STB_PLAY_CONTENT])
+        elif STB_EIT_CHANGED in events:
+            parsed = events[STB_EIT_CHANGED]
+            self.state_machine.on_event_eit_changed(parsed)
+            self._resolve_channel_waiters(parsed.channel_num)
+        elif "messageBody" in changes and "X-pairingCheck" in changes["messageBody"]:
+            return  # ignore event
+        else:
+            raise NotImplementedError()
+
+        if self._listener_debouncer is None:
+            self.async_update_listeners()
+        else:
+            # zapping sends several events within a few hundred milliseconds, publish only the state after the burst
+            self._listener_debouncer.async_schedule_call()
+
+    async def _async_update_data(self) -> MediaReceiverStateMachine:
+        # polling is only a backup, skip it while events are flowing or the receiver is asleep/unreachable
+        self.poll_scheduler.on_subscription_state(self.client.is_subscription_healthy())
+        if not self.poll_scheduler.should_poll():
+            return self.state_machine
+
+        try:
+            if not self.client.is_paired():
+                await self._async_pair()
+
+            try:
+                parsed = await self.client.async_get_player_state()
+            except NotPairedException:
+                # the stored verification code is not accepted anymore
+                await self._async_pair()
+                try:
+                    parsed = await self.client.async_get_player_state()
+                except NotPairedException as ex:
+                    raise UpdateFailed("The receiver rejected the verification code of a new pairing") from ex
+            self.state_machine.on_poll_player_state(parsed)
+            self.poll_scheduler.on_poll(idle=self.state_machine.deep_sleep)
+        except (PairingTimeoutException, CommunicationTimeoutException, CommunicationException):
+            self.state_machine.on_connection_error()
+            self.poll_scheduler.on_unreachable()
+            # raise ex
+        return self.state_machine
+
+    async def _async_pair(self) -> None:
+        verification_code = await self.client.async_pair()
+        if verification_code != self.config_entry.data.get(CONF_VERIFICATION_CODE):
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                data={**self.config_entry.data, CONF_VERIFICATION_CODE: verification_code},
+            )
+
+    async def async_tune_channel(self, channel: int) -> float | None:
+        """Enter the channel number and wait for the receiver to report the channel change.
+
+        Returns the tune latency in seconds, None if the receiver did not confirm the change in time.
+        """
+        keys = [KeyCode[f"NUM{digit}"] for digit in str(channel)]
+
+        # register before sending, the event might arrive before the keys are acknowledged
+        waiter = self.hass.loop.create_future()
+        self._channel_waiters.setdefault(channel, []).append(waiter)
+        start = self.hass.loop.time()
+        try:
+            await self.client.async_send_keys(keys)
+            await asyncio.wait_for(waiter, timeout=CHANNEL_TUNE_TIMEOUT)
+        except asyncio.TimeoutError:
+            LOGGER.warning("%s: Channel change to %s was not confirmed by the receiver", self.name, channel)
+            return None
+        finally:
+            waiters = self._channel_waiters.get(channel, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                self._channel_waiters.pop(channel, None)
+
+        latency = self.hass.loop.time() - start
+        LOGGER.info("%s: Tuned to channel %s in %.3fs", self.name, channel, latency)
+        return latency
+
+    def _resolve_channel_waiters(self, channel: int | None) -> None:
+        for waiter in self._channel_waiters.pop(channel, []):
+            if not waiter.done():
+                waiter.set_result(None)
@@ -0,0 +1,57 @@
+"""Diagnostics support for MagentaTV."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .api import NotifyServer
+from .const import CONF_USER_ID, CONF_VERIFICATION_CODE, DATA_NOTIFICATION_SERVER, DOMAIN
+from .coordinator import MagentaTvCoordinator
+
+TO_REDACT = {CONF_USER_ID, CONF_VERIFICATION_CODE}
+
+
+def _counters(stats: object, *properties: str) -> dict[str, Any]:
+    """Counters of a stats object, including the derived values named by properties"""
+    return {**vars(stats), **{name: getattr(stats, name) for name in properties}}
+
+
+def _notify_server_diagnostics(notify_server: NotifyServer) -> dict[str, Any]:
+    return {
+        "subscriptions": _counters(notify_server.subscription_stats),
+        "event_buffer": _counters(notify_server.buffer_stats),
+        "dispatch": _counters(notify_server.dispatch_stats, "average_latency"),
+        "lifecycle": _counters(notify_server.lifecycle_stats),
+        "advertise_cache": _counters(notify_server.advertise_cache_stats, "hit_rate"),
+    }
+
+
+def _receiver_diagnostics(coordinator: MagentaTvCoordinator) -> dict[str, Any]:
+    client = coordinator.client
+    return {
+        "available": coordinator.state_machine.available,
+        "poll_interval": coordinator.poll_scheduler.interval,
+        "last_update_success": coordinator.last_update_success,
+        "connections": _counters(client.connection_stats),
+        "listeners": {
+            getattr(callback, "__qualname__", repr(callback)): _counters(stats, "average_latency")
+            for callback, stats in client.listener_stats.items()
+        },
+    }
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    notify_server: NotifyServer | None = hass.data.get(DOMAIN, {}).get(DATA_NOTIFICATION_SERVER)
+    coordinator: MagentaTvCoordinator | None = getattr(entry, "runtime_data", None)
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "receiver": None if coordinator is None else _receiver_diagnostics(coordinator),
+        # shared by all receivers
+        "notify_server": None if notify_server is None else _notify_server_diagnostics(notify_server),
+    }
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import datetime as dt
+from collections import deque
 from collections.abc import Mapping
-from datetime import timedelta
+from typing import Any
 
+import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components.media_player import (
     MediaPlayerDeviceClass,
@@ -24,30 +26,32 @@ from homeassistant.const import (
     CONF_URL,
     EVENT_HOMEASSISTANT_STOP,
 )
-from homeassistant.core import Event, HomeAssistant
+from homeassistant.core import Event, HomeAssistant, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers import entity_platform, instance_id
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from pydantic import TypeAdapter
-
-from custom_components.magentatv import async_get_notification_server
-from custom_components.magentatv.api.event_model import EitChangedEvent, PlayContentEvent
-from custom_components.magentatv.api.exceptions import (
-    CommunicationException,
-    CommunicationTimeoutException,
-    PairingTimeoutException,
-)
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from custom_components.magentatv import async_get_notification_server, async_get_startup_coordinator
+from custom_components.magentatv.api.client import DEFAULT_INTER_KEY_DELAY
 
-from .api import Client, KeyCode, MediaReceiverStateMachine, NotifyServer, State
+from .api import Client, KeyCode, NotifyServer, State
 from .const import (
+    ATTR_POLL_INTERVAL,
+    ATTR_STATE_WRITES_PER_MINUTE,
     CONF_USER_ID,
+    CONF_VERIFICATION_CODE,
+    DATA_COALESCING_WINDOW,
+    DEFAULT_COALESCING_WINDOW,
     DOMAIN,
-    LOGGER,
     SERVICE_SEND_KEY,
+    SERVICE_SEND_KEYS,
+    SERVICE_TUNE_CHANNEL,
     key_code,
 )
+from .coordinator import MagentaTvCoordinator
 
-SCAN_INTERVAL = timedelta(seconds=10)  # only backup in case events have been missed
 PARALLEL_UPDATES = 0
 
 STATE_MAP: Mapping[State, MediaPlayerState] = {
@@ -76,6 +80,8 @@ async def async_setup_entry(
         user_id=config_entry.data.get(CONF_USER_ID),
         instance_id=(await instance_id.async_get(hass)),
         notify_server=await async_get_notification_server(hass=hass),
+        # paired by the config flow or a previous run, saves the pairing handshake on startup
+        verification_code=config_entry.data.get(CONF_VERIFICATION_CODE),
     )
 
     async def async_close_connection(event: Event) -> None:
@@ -84,12 +90,19 @@ async def async_setup_entry(
 
     config_entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_close_connection))
 
-    entities.append(
-        MediaReceiver(
-            config_entry=config_entry,
-            client=_client,  # notify_server=_notify_server
-        )
+    # one poll and one event subscription for all entities of the receiver
+    coordinator = MagentaTvCoordinator(
+        hass,
+        config_entry,
+        client=_client,
+        startup_coordinator=await async_get_startup_coordinator(hass),
+        coalescing_window=hass.data.get(DOMAIN, {}).get(DATA_COALESCING_WINDOW, DEFAULT_COALESCING_WINDOW),
     )
+    config_entry.async_on_unload(coordinator.async_close)
+    # read by the diagnostics
+    config_entry.runtime_data = coordinator
+
+    entities.append(MediaReceiver(coordinator))
     async_add_entities(entities, update_before_add=False)
 
     platform = entity_platform.async_get_current_platform()
@@ -103,6 +116,27 @@ async def async_setup_entry(
         "send_key",
     )
 
+    platform.async_register_entity_service(
+        SERVICE_SEND_KEYS,
+        {
+            vol.Required("key_codes"): vol.All(cv.ensure_list, [key_code]),
+            vol.Optional("inter_key_delay", default=DEFAULT_INTER_KEY_DELAY): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=5)
+            ),
+        },
+        "send_keys",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    platform.async_register_entity_service(
+        SERVICE_TUNE_CHANNEL,
+        {
+            vol.Required("channel"): cv.positive_int,
+        },
+        "tune_channel",
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     ## Currently not working
     # platform.async_register_entity_service(
     #     SERVICE_SEND_TEXT,
@@ -113,23 +147,28 @@ async def async_setup_entry(
     # )
 
 
-class MediaReceiver(MediaPlayerEntity):
+class MediaReceiver(CoordinatorEntity[MagentaTvCoordinator], MediaPlayerEntity):
     """Representation of a Denon Media Player Device."""
 
     _last_events: list[dict] = []
 
+    # change with every poll and state write, not worth a recorder row
+    _unrecorded_attributes = frozenset({ATTR_POLL_INTERVAL, ATTR_STATE_WRITES_PER_MINUTE})
+
     _client: Client
     _notify_server: NotifyServer
 
     def __init__(
         self,
-        config_entry: ConfigEntry,
-        client: Client,
+        coordinator: MagentaTvCoordinator,
         # notify_server: NotifyServer,
     ) -> None:
         """Initialize the device."""
+        super().__init__(coordinator)
 
-        self._client = client
+        config_entry = coordinator.config_entry
+        self._client = coordinator.client
+        self._state_machine = coordinator.state_machine
         # self._notify_server = notify_server
 
         self._attr_unique_id = config_entry.data.get(CONF_ID)
@@ -148,58 +187,55 @@ class MediaReceiver(MediaPlayerEntity):
         self._attr_device_class = MediaPlayerDeviceClass.RECEIVER
         assert config_entry.unique_id
 
-        self._state_machine = MediaReceiverStateMachine()
-
-    async def _async_on_event(self, changes):
-        LOGGER.debug("%s: Event %s", self.entity_id, changes)
-        if "STB_playContent" in changes:
-            ta = TypeAdapter(PlayContentEvent)
-            parsed = ta.validate_json(changes["STB_playContent"])
-            self._state_machine.on_event_play_content(parsed)
-        elif "STB_EitChanged" in changes:
-            ta = TypeAdapter(EitChangedEvent)
-            parsed = ta.validate_json(changes["STB_EitChanged"])
-            self._state_machine.on_event_eit_changed(parsed)
-        elif "messageBody" in changes and "X-pairingCheck" in changes["messageBody"]:
-            return  # ignore event
-        else:
-            raise NotImplementedError()
+        # loop times of the state writes published within the last minute
+        self._state_writes: deque[float] = deque()
+        self._warmed_up = False
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # until the receivers started together, the entity stays unavailable, see _async_warm_up
+        if self._warmed_up:
+            self._async_publish_state()
+
+    @callback
+    def _async_publish_state(self) -> None:
+        self._state_writes.append(self.hass.loop.time())
         self.async_write_ha_state()
 
+    def _state_writes_per_minute(self) -> int:
+        deadline = self.hass.loop.time() - 60
+        while self._state_writes and self._state_writes[0] <= deadline:
+            self._state_writes.popleft()
+        return len(self._state_writes)
+
     async def async_added_to_hass(self) -> None:
         """Register for telnet events."""
 
         # await self._notify_server.async_start()
 
-        # subscibe for player events
-        self._client.subscribe(self._async_on_event)
-
-        # trigger manual update
-        await self.async_update()
-        self.async_write_ha_state()
-
-    async def async_will_remove_from_hass(self) -> None:
-        await self._client.async_close()
-        # await self._notify_server.async_stop()
+        await super().async_added_to_hass()
+        # the warm-up may wait for the other receivers, do not hold up adding the entity
+        self.coordinator.config_entry.async_create_background_task(
+            self.hass, self._async_warm_up(), name=f"{self.name} entity warm up"
+        )
 
-    async def async_update(self) -> None:
-        try:
-            if not self._client.is_paired():
-                await self._client.async_pair()
+    async def _async_warm_up(self) -> None:
+        # first poll, shared with the other entities of the receiver
+        await self.coordinator.async_warm_up()
+        self._warmed_up = True
+        self._async_publish_state()
 
-            result = await self._client.async_get_player_state()
-            ta = TypeAdapter(PlayContentEvent)
-            parsed = ta.validate_python(result)
-            self._state_machine.on_poll_player_state(parsed)
-        except (PairingTimeoutException, CommunicationTimeoutException, CommunicationException):
-            self._state_machine.on_connection_error()
-            # raise ex
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        return {
+            ATTR_POLL_INTERVAL: round(self.coordinator.poll_scheduler.interval, 1),
+            ATTR_STATE_WRITES_PER_MINUTE: self._state_writes_per_minute(),
+        }
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        return self._attr_available and self._state_machine.available
+        return super().available and self._state_machine.available
 
     @property
     def state(self) -> MediaPlayerState | None:
@@ -232,6 +268,7 @@ class MediaReceiver(MediaPlayerEntity):
         else:
             features = features | MediaPlayerEntityFeature.TURN_OFF | MediaPlayerEntityFeature.VOLUME_STEP
             features = features | MediaPlayerEntityFeature.NEXT_TRACK | MediaPlayerEntityFeature.PREVIOUS_TRACK
+            features = features | MediaPlayerEntityFeature.PLAY_MEDIA
 
             if self.state in [MediaPlayerState.PAUSED]:
                 features = features | MediaPlayerEntityFeature.PLAY
@@ -293,5 +330,27 @@ class MediaReceiver(MediaPlayerEntity):
     async def send_key(self, key_code: KeyCode) -> None:
         await self._client.async_send_key(key_code)
 
+    async def send_keys(self, key_codes: list[KeyCode], inter_key_delay: float) -> ServiceResponse:
+        timings = await self._client.async_send_keys(key_codes, inter_key_delay=inter_key_delay)
+        return {
+            "timings": [
+                {"key_code": timing.key.name, "sent": timing.sent, "latency": timing.latency} for timing in timings
+            ]
+        }
+
+    async def async_play_media(self, media_type: MediaType | str, media_id: str, **kwargs: Any) -> None:
+        """Tune to a channel by its number."""
+        if media_type != MediaType.CHANNEL or not media_id.isdigit():
+            raise ServiceValidationError(f"Only channel numbers can be played, got {media_type}: {media_id}")
+        await self.async_tune_channel(int(media_id))
+
+    async def tune_channel(self, channel: int) -> ServiceResponse:
+        latency = await self.async_tune_channel(channel)
+        return {"channel": channel, "confirmed": latency is not None, "latency": latency}
+
+    async def async_tune_channel(self, channel: int) -> float | None:
+        """Enter the channel number and wait for the receiver to report the channel change."""
+        return await self.coordinator.async_tune_channel(channel)
+
     async def send_text(self, text: str) -> None:
         await self._client.async_send_character_input(text)
@@ -0,0 +1,100 @@
+"""Shared warm-up phase of all receivers configured when Home Assistant starts."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from typing import NamedTuple
+
+from .const import LOGGER
+
+DEFAULT_MAX_PARALLEL_STARTUPS = 4
+# seconds a receiver waits for the others before its entity is made available anyway
+DEFAULT_STARTUP_TIMEOUT = 60
+
+
+class ReceiverStartup(NamedTuple):
+    """Startup timing of a single receiver, in seconds."""
+
+    queued: float  # waiting for a free slot
+    warm_up: float  # pairing, subscribing and the first poll
+
+    @property
+    def total(self) -> float:
+        return self.queued + self.warm_up
+
+
+class StartupCoordinator:
+    """Warms up the receivers concurrently, at most max_parallel at a time.
+
+    The receivers expected at startup wait for each other, so their entities become available together. Receivers
+    added later are warmed up without waiting.
+    """
+
+    def __init__(
+        self,
+        expected: Iterable[str],
+        max_parallel: int = DEFAULT_MAX_PARALLEL_STARTUPS,
+        timeout: float = DEFAULT_STARTUP_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        assert max_parallel > 0
+
+        self._expected = frozenset(expected)
+        self._pending = set(self._expected)
+        self._timeout = timeout
+        self._clock = clock
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._started = clock()
+        self._timings: dict[str, ReceiverStartup] = {}
+        self._names: dict[str, str] = {}
+        self._done = asyncio.Event()
+        if not self._pending:
+            self._done.set()
+
+    @property
+    def timings(self) -> dict[str, ReceiverStartup]:
+        return self._timings
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    async def async_run(self, receiver: str, warm_up: Callable[[], Awaitable[None]], name: str | None = None) -> None:
+        """Warm up a receiver, then wait for the other receivers expected at startup."""
+        self._names[receiver] = name or receiver
+        queued = self._clock()
+        async with self._semaphore:
+            started = self._clock()
+            try:
+                await warm_up()
+            finally:
+                self._timings[receiver] = ReceiverStartup(queued=started - queued, warm_up=self._clock() - started)
+                LOGGER.debug("Warmed up %s: %s", self._names[receiver], self._timings[receiver])
+                self._on_finished(receiver)
+
+        if receiver not in self._expected or self.done:
+            return
+        remaining = self._started + self._timeout - self._clock()
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self._done.wait(), max(remaining, 0))
+
+    def _on_finished(self, receiver: str) -> None:
+        if receiver not in self._pending:
+            return
+        self._pending.discard(receiver)
+        if self._pending:
+            return
+
+        self._done.set()
+        LOGGER.info(
+            "Started %s receiver(s) in %.1fs: %s",
+            len(self._timings),
+            self._clock() - self._started,
+            ", ".join(
+                f"{self._names[entry]} {timing.total:.1f}s (queued {timing.queued:.1f}s)"
+                for entry, timing in self._timings.items()
+            ),
+        )
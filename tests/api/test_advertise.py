@@ -0,0 +1,57 @@
+from custom_components.magentatv.api.advertise import AdvertiseAddressCache, ListenAddress, select_advertise_address
+
+LISTEN = [ListenAddress.parse("10.1.0.5/24", 11223), ListenAddress.parse("10.2.0.5/24", 11224)]
+
+
+def no_routing() -> str:
+    raise AssertionError("routing should not be consulted")
+
+
+def test_selects_address_of_receiver_network():
+    assert select_advertise_address("10.1.0.20", LISTEN, no_routing) == ("10.1.0.5", 11223)
+    assert select_advertise_address("10.2.0.20", LISTEN, no_routing) == ("10.2.0.5", 11224)
+
+
+def test_falls_back_to_routed_address():
+    listen = [ListenAddress.parse("10.1.0.5", 11223), ListenAddress.parse("10.2.0.5", 11224)]
+    assert select_advertise_address("10.3.0.20", listen, lambda: "10.2.0.5") == ("10.2.0.5", 11224)
+
+
+def test_wildcard_advertises_routed_address():
+    listen = [ListenAddress.parse("0.0.0.0", 11223)]
+    assert select_advertise_address("10.3.0.20", listen, lambda: "192.168.1.2") == ("192.168.1.2", 11223)
+    assert select_advertise_address("receiver.local", listen, lambda: "192.168.1.2") == ("192.168.1.2", 11223)
+
+
+def test_unlistened_route_uses_first_address():
+    assert select_advertise_address("10.3.0.20", LISTEN, lambda: "192.168.1.2") == ("10.1.0.5", 11223)
+
+
+def test_cache_expires_and_invalidates():
+    now = 0.0
+    cache = AdvertiseAddressCache(ttl=60, clock=lambda: now)
+    resolved = []
+
+    def resolve():
+        resolved.append(now)
+        return ("10.1.0.5", 11223)
+
+    assert cache.get("10.1.0.20", resolve) == ("10.1.0.5", 11223)
+    assert cache.get("10.1.0.20", resolve) == ("10.1.0.5", 11223)
+    assert resolved == [0.0]
+
+    now = 60.0
+    cache.get("10.1.0.20", resolve)
+    assert resolved == [0.0, 60.0]
+
+    cache.get("10.1.0.21", resolve)
+    cache.invalidate("10.1.0.20")
+    cache.get("10.1.0.20", resolve)
+    assert len(resolved) == 4
+    cache.invalidate()
+    assert len(cache) == 0
+
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 4
+    assert cache.stats.invalidations == 3
+    assert cache.stats.hit_rate == 0.2
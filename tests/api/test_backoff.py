@@ -0,0 +1,30 @@
+from custom_components.magentatv.api.backoff import ExponentialBackoff
+
+
+def test_backoff_grows_exponentially_up_to_maximum():
+    backoff = ExponentialBackoff(initial=10, maximum=100, jitter=0)
+    assert backoff.active is False
+    assert backoff.delay == 0
+
+    assert [backoff.next() for _ in range(6)] == [10, 20, 40, 80, 100, 100]
+    assert backoff.active is True
+    assert backoff.delay == 100
+
+
+def test_backoff_reset():
+    backoff = ExponentialBackoff(initial=10, maximum=100, jitter=0)
+    backoff.next()
+    backoff.next()
+    backoff.reset()
+
+    assert backoff.active is False
+    assert backoff.delay == 0
+    assert backoff.next() == 10
+
+
+def test_backoff_jitter_bounds():
+    low = ExponentialBackoff(initial=10, maximum=100, jitter=0.2, rand=lambda: 0.0)
+    high = ExponentialBackoff(initial=10, maximum=100, jitter=0.2, rand=lambda: 1.0)
+
+    assert low.next() == 8
+    assert high.next() == 12
@@ -0,0 +1,172 @@
+import asyncio
+import re
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from aiohttp import web
+from async_upnp_client.const import HttpResponse
+
+from custom_components.magentatv.api import Client, KeyCode
+from custom_components.magentatv.api.exceptions import CommunicationException, NotPairedException
+from custom_components.magentatv.api.subscription import Subscription
+
+PLAYER_STATE = (
+    '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+    '<u:X-getPlayerStateResponse xmlns:u="urn:schemas-upnp-org:service:X-CTC_RemotePairing:1">'
+    "<playBackState>1</playBackState><chanKey>5</chanKey>"
+    "</u:X-getPlayerStateResponse></s:Body></s:Envelope>"
+)
+
+
+def upnp_fault(error_code: int) -> str:
+    return (
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body><s:Fault>'
+        "<faultcode>s:Client</faultcode><faultstring>UPnPError</faultstring><detail>"
+        '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">'
+        f"<errorCode>{error_code}</errorCode></UPnPError>"
+        "</detail></s:Fault></s:Body></s:Envelope>"
+    )
+
+
+def make_client(verification_code=None) -> tuple[Client, Mock]:
+    notify_server = Mock()
+
+    async def subscribe(target, service, callback):
+        return Subscription("uuid:1", target, service, callback)
+
+    notify_server._async_subscribe_to_service = AsyncMock(side_effect=subscribe)
+    client = Client(
+        host="10.0.0.2",
+        port=8081,
+        user_id="1234567890",
+        instance_id="abcdef",
+        notify_server=notify_server,
+        verification_code=verification_code,
+    )
+    client._async_send_pairing_request = AsyncMock()
+    client._async_verify_pairing = AsyncMock()
+    return client, notify_server
+
+
+async def test_restores_stored_verification_code():
+    client, notify_server = make_client(verification_code="CODE")
+    client._async_send_soap_request = AsyncMock(return_value=HttpResponse(200, {}, PLAYER_STATE))
+
+    assert await client.async_pair() == "CODE"
+    assert client.is_paired()
+    client._async_send_pairing_request.assert_not_awaited()
+    notify_server._async_subscribe_to_service.assert_awaited_once()
+
+    player_state = await client.async_get_player_state()
+    assert player_state.play_back_state == 1
+    assert player_state.chan_key == 5
+    assert "<verificationCode>CODE</verificationCode>" in client._async_send_soap_request.await_args[0][0].body
+
+    received = []
+
+    async def listener(changes):
+        received.append(changes)
+
+    client.subscribe(listener)
+    await client._on_event({"STB_playContent": "{}"})
+    await client._event_fanout.async_join()
+    assert received == [{"STB_playContent": "{}"}]
+
+
+async def test_restores_pairing_again_when_subscribing_fails():
+    client, notify_server = make_client(verification_code="CODE")
+    subscribe = notify_server._async_subscribe_to_service.side_effect
+    attempts = []
+
+    async def subscribe_once_unreachable(target, service, callback):
+        attempts.append(target)
+        if len(attempts) == 1:
+            raise asyncio.TimeoutError()
+        return await subscribe(target, service, callback)
+
+    notify_server._async_subscribe_to_service.side_effect = subscribe_once_unreachable
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.async_pair()
+    assert not client.is_paired()
+    assert not client.is_subscription_healthy()
+
+    assert await client.async_pair() == "CODE"
+    assert client.is_paired()
+    assert notify_server._async_subscribe_to_service.await_count == 2
+
+
+async def test_pairs_again_when_stored_code_is_rejected():
+    client, notify_server = make_client(verification_code="CODE")
+    client._async_send_soap_request = AsyncMock(return_value=HttpResponse(500, {}, upnp_fault(606)))
+    notify_server.async_unsubscribe = AsyncMock()
+
+    await client.async_pair()
+    with pytest.raises(NotPairedException):
+        await client.async_get_player_state()
+    assert not client.is_paired()
+
+    async def send_pairing_request():
+        asyncio.get_running_loop().create_task(client._on_event({"messageBody": "X-pairingCheck:4321"}))
+
+    client._async_send_pairing_request.side_effect = send_pairing_request
+    verification_code = await client.async_pair()
+
+    client._async_send_pairing_request.assert_awaited_once()
+    assert verification_code not in [None, "CODE"]
+
+
+@pytest.mark.parametrize("response", [HttpResponse(500, {}, upnp_fault(501)), HttpResponse(503, {}, "")])
+async def test_keeps_pairing_when_player_state_request_fails(response):
+    client, _ = make_client(verification_code="CODE")
+    client._async_send_soap_request = AsyncMock(return_value=response)
+
+    await client.async_pair()
+    with pytest.raises(CommunicationException):
+        await client.async_get_player_state()
+    assert client.is_paired()
+
+
+async def test_send_keys_arrive_in_order_without_waiting_for_acknowledgements(socket_enabled):
+    received = []
+
+    async def handle(request: web.Request) -> web.Response:
+        received.append(re.search(r"keyCode=(\w+)", await request.text()).group(1))
+        # acknowledged slower than the keys are sent
+        await asyncio.sleep(0.2)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post("/{path:.*}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    client, _ = make_client(verification_code="CODE")
+    client._host, client._port = "127.0.0.1", port
+    client._verification_code = "CODE"
+    # as many keys as the pool has connections, so none waits for a free connection
+    sequence = [KeyCode.NUM1, KeyCode.NUM1, KeyCode.NUM2, KeyCode.NUM1]
+    try:
+        timings = await client.async_send_keys(sequence, inter_key_delay=0)
+    finally:
+        await client.async_close()
+        await runner.cleanup()
+
+    assert received == [key.value for key in sequence]
+    # the keys were not waiting for the previous acknowledgement
+    assert max(timing.sent for timing in timings) < 0.2
+
+
+async def test_send_keys_drops_remaining_keys_when_a_key_fails():
+    client, _ = make_client(verification_code="CODE")
+    client._verification_code = "CODE"
+    client._async_send_soap_request = AsyncMock(side_effect=CommunicationException())
+
+    with pytest.raises(CommunicationException):
+        await client.async_send_keys([KeyCode.NUM1, KeyCode.NUM0, KeyCode.NUM4], inter_key_delay=0)
+    await asyncio.sleep(0.01)
+
+    client._async_send_soap_request.assert_awaited_once()
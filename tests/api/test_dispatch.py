@@ -0,0 +1,105 @@
+import asyncio
+
+from custom_components.magentatv.api.dispatch import DispatchQueue
+from custom_components.magentatv.api.subscription import Subscription
+
+
+async def test_delivers_events_in_order():
+    received = []
+
+    async def handler(changes):
+        received.append(changes)
+
+    queue = DispatchQueue(handler)
+    for i in range(3):
+        # every event arrives with its own request
+        queue.put({"STB_playContent": str(i)})
+        await asyncio.sleep(0)
+        queue.put({"STB_EitChanged": str(i)})
+        await asyncio.sleep(0)
+    await queue.async_join()
+
+    assert [list(changes.values())[0] for changes in received] == ["0", "0", "1", "1", "2", "2"]
+    assert queue.stats.dispatched == 6
+    assert queue.stats.depth == 0
+
+
+async def test_coalesces_superseded_events_while_behind():
+    release = asyncio.Event()
+    received = []
+
+    async def handler(changes):
+        await release.wait()
+        received.append(changes)
+
+    queue = DispatchQueue(handler)
+    queue.put({"STB_playContent": "0"})
+    # the first event is being handled, the following ones queue up
+    await asyncio.sleep(0)
+    queue.put({"STB_playContent": "1"})
+    queue.put({"STB_EitChanged": "1"})
+    queue.put({"STB_playContent": "2"})
+    queue.put({"STB_EitChanged": "2", "messageBody": ""})
+    assert queue.depth == 2
+    assert queue.stats.max_depth == 2
+
+    release.set()
+    await queue.async_join()
+    assert received == [
+        {"STB_playContent": "0"},
+        {"STB_playContent": "2"},
+        {"STB_EitChanged": "2", "messageBody": ""},
+    ]
+    assert queue.stats.coalesced == 2
+    assert queue.stats.dropped == 0
+
+
+async def test_drops_oldest_events_beyond_max_depth():
+    release = asyncio.Event()
+    received = []
+
+    async def handler(changes):
+        await release.wait()
+        received.append(changes)
+
+    queue = DispatchQueue(handler, max_depth=2)
+    queue.put({"STB_playContent": "0"})
+    await asyncio.sleep(0)
+    for i in range(1, 5):
+        queue.put({f"variable{i}": str(i)})
+
+    release.set()
+    await queue.async_join()
+    assert received == [{"STB_playContent": "0"}, {"variable3": "3"}, {"variable4": "4"}]
+    assert queue.stats.dropped == 2
+
+
+async def test_reports_latency():
+    async def handler(changes):
+        await asyncio.sleep(0.02)
+
+    queue = DispatchQueue(handler)
+    queue.put({"STB_playContent": "0"})
+    queue.put({"STB_EitChanged": "0"})
+    await queue.async_join()
+
+    assert queue.stats.max_latency >= 0.04
+    assert 0.02 <= queue.stats.average_latency <= queue.stats.max_latency
+
+
+async def test_failing_callback_does_not_stop_delivery():
+    received = []
+
+    async def failing(changes):
+        raise ValueError()
+
+    async def working(changes):
+        received.append(changes)
+
+    subscription = Subscription("uuid:1", ("10.0.0.2", 8081), "X-CTC_RemotePairing", failing)
+    subscription.callbacks.append(working)
+    subscription.queue.put({"STB_playContent": "0"})
+    subscription.queue.put({"STB_EitChanged": "0"})
+    await subscription.queue.async_join()
+
+    assert received == [{"STB_playContent": "0"}, {"STB_EitChanged": "0"}]
@@ -0,0 +1,77 @@
+from custom_components.magentatv.api.event_buffer import EventBuffer
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_replays_events_in_order():
+    buffer = EventBuffer(clock=FakeClock())
+    buffer.append("uuid:1", {"STB_playContent": "1"})
+    buffer.append("uuid:2", {"STB_playContent": "2"})
+    buffer.append("uuid:1", {"STB_EitChanged": "3"})
+
+    assert buffer.pop("uuid:1") == [{"STB_playContent": "1"}, {"STB_EitChanged": "3"}]
+    assert buffer.pop("uuid:1") == []
+    assert len(buffer) == 1
+    assert buffer.stats.buffered == 3
+    assert buffer.stats.replayed == 2
+
+
+def test_expires_events_after_ttl():
+    clock = FakeClock()
+    buffer = EventBuffer(ttl=30, clock=clock)
+    buffer.append("uuid:stray", {"STB_playContent": "1"})
+    clock.now += 20
+    buffer.append("uuid:1", {"STB_playContent": "2"})
+
+    clock.now += 15
+    assert buffer.pop("uuid:stray") == []
+    assert buffer.pop("uuid:1") == [{"STB_playContent": "2"}]
+    assert len(buffer) == 0
+    assert buffer.stats.dropped_expired == 1
+
+
+def test_discarded_events_are_not_counted_as_expired():
+    buffer = EventBuffer(clock=FakeClock())
+    buffer.append("uuid:old", {"STB_playContent": "1"})
+    buffer.append("uuid:old", {"STB_playContent": "2"})
+
+    buffer.discard("uuid:old")
+    assert len(buffer) == 0
+    assert buffer.stats.discarded == 2
+    assert buffer.stats.dropped_expired == 0
+
+
+def test_caps_events_per_sid():
+    buffer = EventBuffer(max_events_per_sid=3, clock=FakeClock())
+    for i in range(5):
+        buffer.append("uuid:1", {"STB_playContent": str(i)})
+
+    assert len(buffer) == 3
+    assert buffer.stats.dropped_overflow == 2
+    assert buffer.pop("uuid:1") == [{"STB_playContent": str(i)} for i in range(2, 5)]
+
+
+def test_caps_total_events():
+    buffer = EventBuffer(max_events_per_sid=2, max_events=4, clock=FakeClock())
+    for i in range(10):
+        buffer.append(f"uuid:{i}", {"STB_playContent": str(i)})
+
+    assert len(buffer) == 4
+    assert buffer.stats.dropped_overflow == 6
+    # the oldest sids have been dropped
+    assert buffer.pop("uuid:0") == []
+    assert buffer.pop("uuid:9") == [{"STB_playContent": "9"}]
+
+
+def test_overflow_of_single_sid():
+    buffer = EventBuffer(max_events_per_sid=1, max_events=1, clock=FakeClock())
+    buffer.append("uuid:1", {"STB_playContent": "1"})
+    buffer.append("uuid:1", {"STB_playContent": "2"})
+    assert buffer.pop("uuid:1") == [{"STB_playContent": "2"}]
+    assert len(buffer) == 0
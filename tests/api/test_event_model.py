@@ -1,6 +1,16 @@
-from pydantic import TypeAdapter
+import pytest
+from pydantic import TypeAdapter, ValidationError
 
 from custom_components.magentatv.api import EitChangedEvent, PlayContentEvent
+from custom_components.magentatv.api.event_model import (
+    PLAYER_STATE_PARSER,
+    STB_EIT_CHANGED,
+    STB_PLAY_CONTENT,
+    EventDecoder,
+    LazyEvent,
+    parse_changes,
+    parse_event,
+)
 
 
 def test_play_content_event_event_deserializes():
@@ -136,3 +146,91 @@ def test_eit_change_event_issue282():
         "program_info": [None, None],
     }
     assert True
+
+
+def test_parse_changes_dispatches_by_variable():
+    changes = {
+        STB_PLAY_CONTENT: '{"new_play_mode":4,"playBackState":1,"mediaType":1,"mediaCode":"3733"}',
+        STB_EIT_CHANGED: '{"type":"EVENT_EIT_CHANGE","instance_id":28,"channel_code":"421","mediaId":"4806","program_info":[{},{}]}',
+        "messageBody": "X-pairingCheck:1234",
+    }
+    events = parse_changes(changes)
+    assert events.keys() == {STB_PLAY_CONTENT, STB_EIT_CHANGED}
+    assert isinstance(events[STB_PLAY_CONTENT], PlayContentEvent)
+    assert events[STB_PLAY_CONTENT].media_code == "3733"
+    assert isinstance(events[STB_EIT_CHANGED], EitChangedEvent)
+    assert events[STB_EIT_CHANGED].channel_code == 421
+
+
+def test_parse_changes_without_known_variables():
+    assert parse_changes({"messageBody": "X-pairingCheck:1234"}) == {}
+
+
+def test_parse_event_unknown_variable():
+    with pytest.raises(KeyError):
+        parse_event("STB_unknown", "{}")
+
+
+def test_player_state_parser():
+    obj = PLAYER_STATE_PARSER.validate_python({"playBackState": "1", "duration": "0", "playPostion": "12"})
+    assert obj == PlayContentEvent(playBackState=1, duration=0, playPostion=12)
+
+
+def test_set_keys_matches_set_fields():
+    data = '{"type":"EVENT_EIT_CHANGE","instance_id":28,"channel_code":"421","mediaId":"4806","program_info":[{},{}]}'
+    obj = parse_event(STB_EIT_CHANGED, data)
+    assert obj.set_keys() == {"type", "instance_id", "channel_code", "media_id", "program_info"}
+    assert obj.set_keys() == obj.model_dump(exclude_unset=True).keys()
+    # computed once per event
+    assert obj.set_keys() is obj.set_keys()
+
+
+def test_set_keys_does_not_affect_equality():
+    first = PLAYER_STATE_PARSER.validate_python({"playBackState": "0"})
+    second = PLAYER_STATE_PARSER.validate_python({"playBackState": "0"})
+    assert first.set_keys() == frozenset({"play_back_state"})
+    assert first == second
+    assert hash(first) == hash(second)
+
+
+def test_eit_changed_program_info_is_validated_lazily():
+    data = '{"type":"EVENT_EIT_CHANGE","instance_id":23,"channel_code":"391","channel_num":"4","mediaId":"3713","program_info":[{"event_id":"31788","start_time":"2023/05/29 09:30:00","duration":"01:40:00","running_status":4,"free_CA_mode":false,"short_event":[{"language_code":"DEU","event_name":"Ich glaub\' mich knutscht ein Elch!","text_char":""}]},{}]}'
+    lazy = parse_event(STB_EIT_CHANGED, data)
+    assert isinstance(lazy, EitChangedEvent)
+    assert "programs" not in lazy.__dict__
+
+    eager = TypeAdapter(EitChangedEvent).validate_json(data)
+    assert lazy.channel_num == eager.channel_num == 4
+    assert lazy.programs == eager.programs == eager.program_info
+    assert lazy.programs[0].short_event[0].event_name == "Ich glaub' mich knutscht ein Elch!"
+    assert lazy.programs[1] is None
+
+
+def test_eit_changed_invalid_program_info_fails_on_access():
+    data = '{"type":"EVENT_EIT_CHANGE","channel_num":"4","program_info":[{"event_id":"1"},{}]}'
+    event = parse_event(STB_EIT_CHANGED, data)
+    assert event.channel_num == 4
+    with pytest.raises(ValidationError):
+        event.programs  # noqa: B018
+
+
+def test_event_decoder_reuses_repeated_events():
+    decoder = EventDecoder()
+    first = decoder.decode({STB_PLAY_CONTENT: '{"new_play_mode":20,"playBackState":1}'})[STB_PLAY_CONTENT]
+    # a copy of the same payload, not the same str object
+    repeated = decoder.decode({STB_PLAY_CONTENT: "".join(['{"new_play_mode":20,', '"playBackState":1}'])})
+    assert repeated[STB_PLAY_CONTENT] is first
+
+    changed = decoder.decode({STB_PLAY_CONTENT: '{"new_play_mode":4,"playBackState":1}'})[STB_PLAY_CONTENT]
+    assert changed is not first
+    assert changed.new_play_mode == 4
+
+    assert decoder.decode({"messageBody": "X-pairingCheck:1234"}) == {}
+
+
+def test_lazy_event_equality():
+    event = LazyEvent(STB_PLAY_CONTENT, '{"new_play_mode":0}')
+    assert event == LazyEvent(STB_PLAY_CONTENT, '{"new_play_mode":0}')
+    assert event != LazyEvent(STB_EIT_CHANGED, '{"new_play_mode":0}')
+    assert event != LazyEvent(STB_PLAY_CONTENT, '{"new_play_mode":4}')
+    assert hash(event) == hash(LazyEvent(STB_PLAY_CONTENT, '{"new_play_mode":0}'))
@@ -0,0 +1,96 @@
+import asyncio
+
+from custom_components.magentatv.api.fanout import EventFanout
+
+
+async def test_delivers_events_in_order_to_all_listeners():
+    received = {"a": [], "b": []}
+
+    async def listener_a(changes):
+        received["a"].append(changes)
+
+    async def listener_b(changes):
+        await asyncio.sleep(0)
+        received["b"].append(changes)
+
+    fanout = EventFanout()
+    fanout.add(listener_a)
+    fanout.add(listener_b)
+    fanout.add(listener_a)
+    assert len(fanout) == 2
+
+    events = [{"STB_playContent": "0"}, {"STB_EitChanged": "0"}, {"messageBody": "X-pairingCheck:1234"}]
+    for changes in events:
+        fanout.publish(changes)
+    await fanout.async_join()
+
+    assert received == {"a": events, "b": events}
+    assert fanout.stats[listener_a].calls == 3
+    assert sum(fanout.stats[listener_b].histogram) == 3
+
+
+async def test_slow_listener_does_not_delay_others():
+    release = asyncio.Event()
+    received = []
+
+    async def slow(changes):
+        await release.wait()
+
+    async def fast(changes):
+        received.append(changes)
+
+    fanout = EventFanout()
+    fanout.add(slow)
+    fanout.add(fast)
+    fanout.publish({"STB_playContent": "0"})
+    await asyncio.sleep(0)
+    fanout.publish({"STB_EitChanged": "0"})
+    await asyncio.sleep(0.01)
+
+    assert received == [{"STB_playContent": "0"}, {"STB_EitChanged": "0"}]
+
+    release.set()
+    await fanout.async_join()
+    assert fanout.stats[slow].calls == 2
+
+
+async def test_listener_timeout_and_error_are_isolated():
+    received = []
+
+    async def hanging(changes):
+        await asyncio.Event().wait()
+
+    async def failing(changes):
+        raise ValueError()
+
+    async def working(changes):
+        received.append(changes)
+
+    fanout = EventFanout(timeout=0.01)
+    for listener in [hanging, failing, working]:
+        fanout.add(listener)
+
+    fanout.publish({"STB_playContent": "0"})
+    await fanout.async_join()
+
+    assert received == [{"STB_playContent": "0"}]
+    assert fanout.stats[hanging].timeouts == 1
+    assert fanout.stats[hanging].histogram[-1] == 0
+    assert fanout.stats[failing].errors == 1
+    assert fanout.stats[working].errors == 0
+
+
+async def test_removed_listener_receives_no_events():
+    received = []
+
+    async def listener(changes):
+        received.append(changes)
+
+    fanout = EventFanout()
+    fanout.add(listener)
+    fanout.remove(listener)
+    fanout.publish({"STB_playContent": "0"})
+    await fanout.async_join()
+
+    assert received == []
+    assert listener not in fanout
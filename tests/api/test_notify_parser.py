@@ -0,0 +1,79 @@
+import re
+
+import defusedxml.ElementTree as Et
+import pytest
+from defusedxml import EntitiesForbidden
+
+from custom_components.magentatv.api.notify_parser import AmpersandRepair, NotifyBodyParser, async_parse_notify_body
+
+BODY = (
+    b'<?xml version="1.0"?>\n'
+    b'<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">'
+    b"<e:property><STB_playContent>"
+    b'{"new_play_mode":4,"playBackState":1,"mediaType":1,"mediaCode":"3733"}'
+    b"</STB_playContent></e:property>"
+    b"<e:property><STB_EitChanged>"
+    b'{"type":"EVENT_EIT_CHANGE","program_info":[{"short_event":[{"event_name":"Dokumentation & Reportage",'
+    b'"text_char":"Tom &amp; Jerry &#38; Co &M&Ms"}]}]}'
+    b"</STB_EitChanged></e:property>"
+    b"<e:property><messageBody></messageBody></e:property>"
+    b"</e:propertyset>"
+)
+
+EXPECTED = {
+    "STB_playContent": '{"new_play_mode":4,"playBackState":1,"mediaType":1,"mediaCode":"3733"}',
+    "STB_EitChanged": '{"type":"EVENT_EIT_CHANGE","program_info":[{"short_event":[{"event_name":"Dokumentation & '
+    'Reportage","text_char":"Tom & Jerry &#38; Co &M&Ms"}]}]}',
+    "messageBody": "",
+}
+
+
+def _chunks(data: bytes, size: int) -> list[bytes]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def _parse(chunks: list[bytes]) -> dict[str, str]:
+    parser = NotifyBodyParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 4096])
+def test_parses_body_in_chunks(size):
+    assert _parse(_chunks(BODY, size)) == EXPECTED
+
+
+def test_ampersand_repair_matches_regex_for_every_split():
+    invalid_ampersand_re = re.compile(r"&(?![a-z0-9]+;)")
+    data = b"a & b &amp; c &#38; d &lt &gt; &x1; && &"
+    expected = invalid_ampersand_re.sub("&amp;", data.decode()).encode()
+
+    for split in range(len(data) + 1):
+        repair = AmpersandRepair()
+        result = repair.feed(data[:split]) + repair.feed(data[split:]) + repair.flush()
+        assert result == expected, split
+
+
+def test_ampersand_repair_passes_chunks_without_ampersand():
+    chunk = b"<e:property>no ampersand</e:property>"
+    assert AmpersandRepair().feed(chunk) is chunk
+
+
+def test_malformed_body():
+    with pytest.raises(Et.ParseError):
+        _parse([b"<e:propertyset><e:property>"])
+
+
+def test_entities_are_forbidden():
+    body = b'<?xml version="1.0"?><!DOCTYPE x [<!ENTITY a "b">]><x>&a;</x>'
+    with pytest.raises(EntitiesForbidden):
+        _parse([body])
+
+
+async def test_async_parse_notify_body():
+    async def iter_chunked():
+        for chunk in _chunks(BODY, 100):
+            yield chunk
+
+    assert await async_parse_notify_body(iter_chunked()) == EXPECTED
@@ -0,0 +1,428 @@
+import asyncio
+import logging
+import time
+
+import aiohttp
+import pytest
+from async_upnp_client.exceptions import UpnpConnectionTimeoutError
+
+from custom_components.magentatv.api import NotifyServer, notify_server
+from custom_components.magentatv.api.exceptions import (
+    CommunicationException,
+    CommunicationTimeoutException,
+    SubscriptionLapsedException,
+)
+from custom_components.magentatv.api.subscription import RENEWAL_RETRY_DELAY, Subscription
+
+GRANTED_TIMEOUT = 0.4
+
+
+async def callback(changes):
+    pass
+
+
+def register(server: NotifyServer, sid: str, host: str, timeout: float = GRANTED_TIMEOUT) -> Subscription:
+    subscription = Subscription(sid, (host, 8081), "X-CTC_RemotePairing", callback)
+    subscription.on_granted(timeout)
+    server._subscription_registry.add(subscription)
+    return subscription
+
+
+def stop_resubscriber(server: NotifyServer) -> None:
+    server._resubscribe_task.cancel()
+    for task in server._renewal_tasks.values():
+        task.cancel()
+
+
+async def test_renews_subscriptions_concurrently():
+    server = NotifyServer(listen=("127.0.0.1", 11223), max_concurrent_renewals=5)
+
+    subscriptions = [register(server, f"uuid:{i}", f"10.0.0.{i}") for i in range(25)]
+
+    renewals: dict[str, int] = {}
+    running = 0
+    max_running = 0
+
+    async def resubscribe(target, service, sid):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            if sid == "uuid:0":
+                # a slow receiver must not delay the others
+                await asyncio.sleep(1)
+            await asyncio.sleep(0.01)
+            if sid == "uuid:1":
+                raise CommunicationException()
+            renewals[sid] = renewals.get(sid, 0) + 1
+            return sid, GRANTED_TIMEOUT
+        finally:
+            running -= 1
+
+    server._async_resubscribe = resubscribe
+    server._resubscribe_task = asyncio.create_task(server._async_resubscribe_all())
+    try:
+        for _ in range(8):
+            await asyncio.sleep(0.1)
+            for subscription in subscriptions[2:]:
+                assert server.is_subscription_healthy(subscription)
+    finally:
+        stop_resubscriber(server)
+
+    assert max_running <= 5
+    assert all(renewals[f"uuid:{i}"] >= 2 for i in range(2, 25))
+    assert not server.is_subscription_healthy(subscriptions[1])
+
+
+async def test_recovers_lapsed_subscription():
+    server = NotifyServer(listen=("127.0.0.1", 11223))
+    received = []
+
+    async def on_event(changes):
+        received.append(changes)
+
+    subscription = register(server, "uuid:old", "10.0.0.2")
+    subscription.callbacks = [on_event]
+
+    async def resubscribe(target, service, sid):
+        # receiver rebooted and does not know the sid anymore
+        raise SubscriptionLapsedException()
+
+    async def subscribe(target, service):
+        # the receiver sends the initial event before the new sid is registered
+        server._buffer.append("uuid:new", {"STB_playContent": "{}"})
+        return "uuid:new", 300
+
+    server._async_resubscribe = resubscribe
+    server._async_subscribe = subscribe
+    server._resubscribe_task = asyncio.create_task(server._async_resubscribe_all())
+    try:
+        await asyncio.sleep(GRANTED_TIMEOUT)
+    finally:
+        stop_resubscriber(server)
+
+    await subscription.queue.async_join()
+    assert subscription.sid == "uuid:new"
+    assert server._subscription_registry.get("uuid:new") is subscription
+    assert server._subscription_registry.get("uuid:old") is None
+    assert server.is_subscription_healthy(subscription)
+    assert received == [{"STB_playContent": "{}"}]
+    assert server.subscription_stats.lapsed == 1
+    assert server.subscription_stats.recovered == 1
+
+
+async def test_retries_recovery_while_receiver_is_unreachable(caplog):
+    server = NotifyServer(listen=("127.0.0.1", 11223))
+    subscription = register(server, "uuid:old", "10.0.0.2")
+    attempts = 0
+
+    async def resubscribe(target, service, sid):
+        raise CommunicationTimeoutException()
+
+    async def subscribe(target, service):
+        nonlocal attempts
+        attempts += 1
+        raise CommunicationTimeoutException()
+
+    server._async_resubscribe = resubscribe
+    server._async_subscribe = subscribe
+    server._resubscribe_task = asyncio.create_task(server._async_resubscribe_all())
+    try:
+        await asyncio.sleep(GRANTED_TIMEOUT)
+    finally:
+        stop_resubscriber(server)
+
+    assert attempts == 1
+    assert subscription.sid == "uuid:old"
+    assert not server.is_subscription_healthy(subscription)
+    assert server.subscription_stats.lapsed == 1
+    assert server.subscription_stats.recovered == 0
+
+    # the receiver stays switched off, the retries back off
+    delays = [subscription.retry_delay]
+    for _ in range(3):
+        await server._async_renew(subscription)
+        delays.append(subscription.retry_delay)
+    assert attempts == 4
+    assert delays == sorted(delays)
+    assert delays[-1] > 4 * delays[0]
+    assert subscription.renew_at - time.monotonic() > 2 * RENEWAL_RETRY_DELAY
+    # only the first failure is a warning
+    assert len([record for record in caplog.records if record.levelno >= logging.WARNING]) == 1
+
+
+async def test_shares_subscription_of_same_service():
+    server = NotifyServer(listen=("127.0.0.1", 11223))
+    subscribed = []
+    unsubscribed = []
+
+    async def start():
+        pass
+
+    async def subscribe(target, service):
+        await asyncio.sleep(0.01)
+        subscribed.append((target, service))
+        return f"uuid:{len(subscribed)}", 300
+
+    async def unsubscribe(target, service, sid):
+        unsubscribed.append(sid)
+
+    server.async_start = start
+    server._async_subscribe = subscribe
+    server._async_unsubscribe = unsubscribe
+
+    received = []
+
+    def make_callback(name):
+        async def on_event(changes):
+            received.append(name)
+
+        return on_event
+
+    first, second, other = make_callback("first"), make_callback("second"), make_callback("other")
+    target = ("10.0.0.2", 8081)
+    subscriptions = await asyncio.gather(
+        server._async_subscribe_to_service(target, "X-CTC_RemotePairing", first),
+        server._async_subscribe_to_service(target, "X-CTC_RemotePairing", second),
+        server._async_subscribe_to_service(("10.0.0.3", 8081), "X-CTC_RemotePairing", other),
+    )
+    assert subscriptions[0] is subscriptions[1]
+    assert subscriptions[0] is not subscriptions[2]
+    assert len(subscribed) == 2
+    assert server._subscription_registry.for_target(target) == [subscriptions[0]]
+
+    server._notify_subscribed_callbacks(subscriptions[0].sid, {})
+    await subscriptions[0].queue.async_join()
+    assert received == ["first", "second"]
+
+    await server.async_unsubscribe(subscriptions[0], first)
+    assert unsubscribed == []
+    assert subscriptions[0] in server._subscription_registry
+
+    await server.async_unsubscribe(subscriptions[0], second)
+    assert unsubscribed == [subscriptions[0].sid]
+    assert server._subscription_registry.get_service(target, "X-CTC_RemotePairing") is None
+    assert len(server._subscription_registry) == 1
+
+
+async def test_cancelling_first_subscriber_keeps_shared_subscription():
+    server = NotifyServer(listen=("127.0.0.1", 11223))
+    subscribed = []
+    unsubscribed = []
+
+    async def start():
+        pass
+
+    async def subscribe(target, service):
+        await asyncio.sleep(0.05)
+        subscribed.append((target, service))
+        return "uuid:1", 300
+
+    async def unsubscribe(target, service, sid):
+        unsubscribed.append(sid)
+
+    server.async_start = start
+    server._async_subscribe = subscribe
+    server._async_unsubscribe = unsubscribe
+
+    async def first(changes):
+        pass
+
+    async def second(changes):
+        pass
+
+    target = ("10.0.0.2", 8081)
+    first_task = asyncio.create_task(server._async_subscribe_to_service(target, "X-CTC_RemotePairing", first))
+    second_task = asyncio.create_task(server._async_subscribe_to_service(target, "X-CTC_RemotePairing", second))
+    await asyncio.sleep(0.01)
+    first_task.cancel()
+
+    subscription = await second_task
+    with pytest.raises(asyncio.CancelledError):
+        await first_task
+    await asyncio.sleep(0.01)
+
+    assert len(subscribed) == 1
+    assert subscription.callbacks == [second]
+    assert subscription in server._subscription_registry
+    assert server._pending_subscriptions == {}
+    assert unsubscribed == []
+
+
+async def test_cancelled_only_subscriber_releases_subscription():
+    server = NotifyServer(listen=("127.0.0.1", 11223))
+    unsubscribed = []
+
+    async def start():
+        pass
+
+    async def subscribe(target, service):
+        await asyncio.sleep(0.05)
+        return "uuid:1", 300
+
+    async def unsubscribe(target, service, sid):
+        unsubscribed.append(sid)
+
+    server.async_start = start
+    server._async_subscribe = subscribe
+    server._async_unsubscribe = unsubscribe
+
+    task = asyncio.create_task(server._async_subscribe_to_service(("10.0.0.2", 8081), "X-CTC_RemotePairing", callback))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.1)
+
+    assert unsubscribed == ["uuid:1"]
+    assert len(server._subscription_registry) == 0
+    assert server._pending_subscriptions == {}
+
+
+async def test_answers_notify_before_callbacks_finish():
+    server = NotifyServer(listen=("127.0.0.1", 11223))
+    release = asyncio.Event()
+    received = []
+
+    async def slow_callback(changes):
+        await release.wait()
+        received.append(changes)
+
+    subscription = register(server, "uuid:1", "10.0.0.2")
+    subscription.callbacks = [slow_callback]
+
+    headers = {"NT": "upnp:event", "NTS": "upnp:propchange", "SID": "uuid:1"}
+    body = (
+        '<?xml version="1.0"?><e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">'
+        "<e:property><STB_playContent>{}</STB_playContent></e:property></e:propertyset>"
+    )
+    status = await asyncio.wait_for(server._handle_notify(headers, body), 1)
+    assert status == 200
+    assert received == []
+
+    release.set()
+    await subscription.queue.async_join()
+    assert received == [{"STB_playContent": "{}"}]
+    assert subscription.queue.stats.dispatched == 1
+
+
+async def test_listens_on_multiple_sockets(socket_enabled):
+    server = NotifyServer(listen=[("127.0.0.1", 0), ("127.0.0.1/8", 0)])
+    await server.async_start()
+    try:
+        ports = [sock.getsockname()[1] for sock in server._sockets]
+        assert len(set(ports)) == 2
+
+        headers = {"NT": "upnp:event", "NTS": "upnp:propchange", "SID": "uuid:unknown"}
+        body = (
+            '<?xml version="1.0"?><e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">'
+            "<e:property><STB_playContent>{}</STB_playContent></e:property></e:propertyset>"
+        )
+        async with aiohttp.ClientSession() as session:
+            for port in ports:
+                async with session.request("NOTIFY", f"http://127.0.0.1:{port}/eventSub", headers=headers, data=body):
+                    pass
+        assert len(server._buffer) == 2
+    finally:
+        stop_resubscriber(server)
+        await server.async_stop()
+    assert server._sockets == []
+
+
+async def test_advertise_address_is_cached_per_target(monkeypatch):
+    server = NotifyServer(listen=[("10.1.0.5/24", 11223), ("0.0.0.0", 11224)])
+    routed = []
+
+    def get_local_ip(target_url):
+        routed.append(target_url)
+        return "10.2.0.5"
+
+    monkeypatch.setattr(notify_server, "get_local_ip", get_local_ip)
+
+    assert server._advertise_address(("10.1.0.20", 8081), "url") == ("10.1.0.5", 11223)
+    assert server._advertise_address(("10.2.0.20", 8081), "url") == ("10.2.0.5", 11224)
+    assert server._advertise_address(("10.2.0.20", 8081), "url") == ("10.2.0.5", 11224)
+    assert routed == ["url"]
+    assert server.advertise_cache_stats.hits == 1
+
+    # e.g. after subscribing failed
+    server._advertise_addresses.invalidate("10.2.0.20")
+    server._advertise_address(("10.2.0.20", 8081), "url")
+    assert routed == ["url", "url"]
+
+    server = NotifyServer(listen=("0.0.0.0", 11223), advertise=(None, 32211))
+    assert server._advertise_address(("10.2.0.20", 8081), "url") == ("10.2.0.5", 32211)
+    assert routed == ["url", "url", "url"]
+
+    # a fully configured advertise address is used as is
+    server = NotifyServer(listen=("0.0.0.0", 11223), advertise=("10.3.0.5", 32211))
+    assert server._advertise_address(("10.2.0.20", 8081), "url") == ("10.3.0.5", 32211)
+    assert routed == ["url", "url", "url"]
+    assert server.advertise_cache_stats.misses == 0
+
+
+async def test_failed_subscription_invalidates_advertise_address(monkeypatch):
+    server = NotifyServer(listen=("0.0.0.0", 11223))
+    monkeypatch.setattr(notify_server, "get_local_ip", lambda target_url: "10.2.0.5")
+
+    async def request(http_request):
+        raise UpnpConnectionTimeoutError()
+
+    server._requester.async_http_request = request
+    for _ in range(2):
+        with pytest.raises(UpnpConnectionTimeoutError):
+            await server._async_subscribe(("10.2.0.20", 8081), "X-CTC_RemotePairing")
+
+    assert server.advertise_cache_stats.misses == 2
+    assert server.advertise_cache_stats.invalidations == 2
+
+
+async def test_buffers_notify_of_unknown_subscription(socket_enabled):
+    server = NotifyServer(listen=("127.0.0.1", 0))
+    await server.async_start()
+    try:
+        ports = {sock.getsockname()[1] for sock in server._sockets}
+
+        headers = {"NT": "upnp:event", "NTS": "upnp:propchange", "SID": "uuid:unknown"}
+        body = (
+            '<?xml version="1.0"?><e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">'
+            "<e:property><messageBody>X-pairingCheck:1234&5678</messageBody></e:property></e:propertyset>"
+        )
+        url = f"http://127.0.0.1:{ports.pop()}/eventSub"
+        async with aiohttp.ClientSession() as session, session.request("NOTIFY", url, headers=headers, data=body):
+            pass
+        assert server._buffer.pop("uuid:unknown") == [{"messageBody": "X-pairingCheck:1234&5678"}]
+    finally:
+        stop_resubscriber(server)
+        await server.async_stop()
+
+
+async def test_lingers_after_last_unsubscribe(socket_enabled):
+    server = NotifyServer(listen=("127.0.0.1", 0), idle_linger=0.05)
+    sids = iter(["uuid:1", "uuid:2", "uuid:3"])
+
+    async def subscribe(target, service):
+        return next(sids), 300
+
+    async def unsubscribe(target, service, sid):
+        pass
+
+    server._async_subscribe = subscribe
+    server._async_unsubscribe = unsubscribe
+    target = ("10.0.0.2", 8081)
+
+    subscription = await server._async_subscribe_to_service(target, "X-CTC_RemotePairing", callback)
+    await server.async_unsubscribe(subscription, callback)
+    assert server._is_running()
+
+    # subscribed again while lingering, the sockets are kept
+    subscription = await server._async_subscribe_to_service(target, "X-CTC_RemotePairing", callback)
+    await server.async_unsubscribe(subscription, callback)
+    await asyncio.sleep(0.02)
+    assert server._is_running()
+    assert server.lifecycle_stats.binds == 1
+    assert server.lifecycle_stats.reused == 1
+
+    await asyncio.sleep(0.1)
+    assert not server._is_running()
+    assert server.lifecycle_stats.unbinds == 1
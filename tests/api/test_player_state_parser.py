@@ -0,0 +1,65 @@
+from xml.parsers.expat import ExpatError
+
+import pytest
+from defusedxml import EntitiesForbidden
+from pydantic import ValidationError
+
+from custom_components.magentatv.api.event_model import PLAYER_STATE_PARSER
+from custom_components.magentatv.api.player_state_parser import parse_player_state
+
+
+def _response(elements: str, prolog: str = "") -> str:
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>{prolog}'
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+        f'<u:X-getPlayerStateResponse xmlns:u="urn:schemas-upnp-org:service:X-CTC_RemotePairing:1">{elements}'
+        "</u:X-getPlayerStateResponse></s:Body></s:Envelope>"
+    )
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {"chanKey": "5", "duration": "15", "mediaCode": "3710", "mediaType": "1", "playBackState": "1"},
+        {"chanKey": "2", "fastSpeed": "0", "mediaCode": "0042", "playBackState": "1", "playPostion": "1718"},
+        {"playBackState": "0"},
+    ],
+)
+def test_matches_validated_values(values):
+    expected = PLAYER_STATE_PARSER.validate_python(values)
+    body = _response("".join(f"<{tag}>{value}</{tag}>" for tag, value in values.items()))
+
+    for response in (body, body.encode()):
+        parsed = parse_player_state(response)
+        assert parsed == expected
+        assert parsed.fields_set == expected.fields_set
+
+
+def test_skips_unknown_elements_and_keeps_empty_ones_unset():
+    parsed = parse_player_state(_response("<playBackState>1</playBackState>\n<unknown>x</unknown>\n<fastSpeed/>\n"))
+
+    assert parsed.play_back_state == 1
+    assert parsed.fast_speed is None
+    assert parsed.fields_set == {"play_back_state", "fast_speed"}
+
+
+def test_rejects_invalid_values():
+    with pytest.raises(ValidationError):
+        parse_player_state(_response("<chanKey>five</chanKey>"))
+
+
+def test_rejects_malformed_response():
+    with pytest.raises(ExpatError):
+        parse_player_state(_response("<chanKey>5</chanKey")[:-10])
+
+
+@pytest.mark.parametrize(
+    "prolog",
+    [
+        '<!DOCTYPE s:Envelope [<!ENTITY key "5">]>',
+        '<!DOCTYPE s:Envelope [<!ENTITY key SYSTEM "file:///etc/passwd">]>',
+    ],
+)
+def test_rejects_entity_declarations(prolog):
+    with pytest.raises(EntitiesForbidden):
+        parse_player_state(_response("<chanKey>&key;</chanKey>", prolog))
@@ -0,0 +1,121 @@
+from custom_components.magentatv.api import PollScheduler
+from custom_components.magentatv.api.backoff import ExponentialBackoff
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def count_polls(scheduler: PollScheduler, clock: FakeClock, seconds: int, step: int = 10) -> int:
+    polls = 0
+    for _ in range(seconds // step):
+        if scheduler.should_poll():
+            scheduler.on_poll()
+            polls += 1
+        clock.now += step
+    return polls
+
+
+def test_initial_poll_always_happens():
+    scheduler = PollScheduler(clock=FakeClock())
+    scheduler.on_subscription_state(True)
+    scheduler.on_event()
+    assert scheduler.should_poll() is True
+
+
+def test_polls_every_min_interval_without_events():
+    clock = FakeClock()
+    scheduler = PollScheduler(min_interval=10, max_interval=120, clock=clock)
+    scheduler.on_subscription_state(True)
+
+    assert scheduler.interval == 10
+    assert count_polls(scheduler, clock, 600) == 60
+
+
+def test_stretches_polls_while_events_are_fresh():
+    clock = FakeClock()
+    scheduler = PollScheduler(min_interval=10, max_interval=120, event_freshness=600, clock=clock)
+    scheduler.on_subscription_state(True)
+    scheduler.on_event()
+
+    assert scheduler.interval == 120
+    assert count_polls(scheduler, clock, 600) == 5
+
+
+def test_tightens_when_events_stop_arriving():
+    clock = FakeClock()
+    scheduler = PollScheduler(min_interval=10, max_interval=120, event_freshness=60, clock=clock)
+    scheduler.on_subscription_state(True)
+    scheduler.on_event()
+    scheduler.on_poll()
+
+    clock.now += 70
+    assert scheduler.interval == 10
+    assert scheduler.should_poll() is True
+
+
+def test_tightens_when_subscription_fails():
+    clock = FakeClock()
+    scheduler = PollScheduler(min_interval=10, max_interval=120, clock=clock)
+    scheduler.on_subscription_state(True)
+    scheduler.on_event()
+    scheduler.on_poll()
+
+    clock.now += 10
+    assert scheduler.should_poll() is False
+
+    scheduler.on_subscription_state(False)
+    assert scheduler.interval == 10
+    assert scheduler.should_poll() is True
+
+    # recovering the subscription alone is not enough, events have to arrive again
+    scheduler.on_subscription_state(True)
+    assert scheduler.interval == 10
+
+
+def test_backs_off_while_receiver_is_unreachable():
+    clock = FakeClock()
+    backoff = ExponentialBackoff(initial=20, maximum=80, jitter=0)
+    scheduler = PollScheduler(min_interval=10, max_interval=120, backoff=backoff, clock=clock)
+
+    intervals = []
+    for _ in range(4):
+        scheduler.on_unreachable()
+        intervals.append(scheduler.interval)
+    assert intervals == [20, 40, 80, 80]
+
+    clock.now += 40
+    assert scheduler.should_poll() is False
+    clock.now += 40
+    assert scheduler.should_poll() is True
+
+
+def test_backs_off_in_deep_sleep_and_resets_on_poll_when_awake():
+    clock = FakeClock()
+    backoff = ExponentialBackoff(initial=20, maximum=80, jitter=0)
+    scheduler = PollScheduler(min_interval=10, max_interval=120, backoff=backoff, clock=clock)
+
+    scheduler.on_poll(idle=True)
+    scheduler.on_poll(idle=True)
+    assert scheduler.interval == 40
+
+    scheduler.on_poll(idle=False)
+    assert scheduler.interval == 10
+
+
+def test_event_resets_backoff():
+    clock = FakeClock()
+    backoff = ExponentialBackoff(initial=20, maximum=80, jitter=0)
+    scheduler = PollScheduler(min_interval=10, max_interval=120, backoff=backoff, clock=clock)
+    scheduler.on_unreachable()
+    scheduler.on_unreachable()
+    clock.now += 10
+    assert scheduler.should_poll() is False
+
+    scheduler.on_event()
+    assert scheduler.interval == 10
+    assert scheduler.should_poll() is True
@@ -0,0 +1,53 @@
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from async_upnp_client.const import HttpRequest
+
+from custom_components.magentatv.api.session import ConnectionPool
+
+
+async def _start_server() -> TestServer:
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_post("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def test_connection_pool_reuses_connections(socket_enabled):
+    server = await _start_server()
+    pool = ConnectionPool(limit_per_host=1)
+    try:
+        for _ in range(5):
+            response = await pool.requester.async_http_request(
+                HttpRequest(method="POST", url=str(server.make_url("/")), headers={}, body="")
+            )
+            assert response.status_code == 200
+            assert response.body == "ok"
+
+        assert pool.stats.opened == 1
+        assert pool.stats.reused == 4
+    finally:
+        await pool.async_close()
+        await server.close()
+
+
+async def test_connection_pool_recreates_session_after_close(socket_enabled):
+    server = await _start_server()
+    pool = ConnectionPool()
+    try:
+        await pool.requester.async_http_request(
+            HttpRequest(method="POST", url=str(server.make_url("/")), headers={}, body="")
+        )
+        await pool.async_close()
+
+        response = await pool.requester.async_http_request(
+            HttpRequest(method="POST", url=str(server.make_url("/")), headers={}, body="")
+        )
+        assert response.status_code == 200
+        assert pool.stats.opened == 2
+    finally:
+        await pool.async_close()
+        await server.close()
@@ -0,0 +1,45 @@
+from custom_components.magentatv.api.soap import SoapRequestTemplate, build_envelope, slot
+
+
+def test_static_template_renders_envelope():
+    template = SoapRequestTemplate(
+        "1.2.3.4",
+        8081,
+        "X-CTC_RemotePairing",
+        "X-getPlayerState",
+        {"pairingDeviceID": "ABC", "verificationCode": "123"},
+    )
+    assert template.slots == ()
+    assert template.render() == build_envelope(
+        "X-CTC_RemotePairing", "X-getPlayerState", {"pairingDeviceID": "ABC", "verificationCode": "123"}
+    )
+
+    request = template.request()
+    assert request.method == "POST"
+    assert request.url == "http://1.2.3.4:8081/upnp/service/X-CTC_RemotePairing/Control"
+    assert request.headers == {
+        "SOAPACTION": "urn:schemas-upnp-org:service:X-CTC_RemotePairing:1#X-getPlayerState",
+        "HOST": "1.2.3.4:8081",
+        "Content-Type": 'text/xml; charset="utf-8"',
+    }
+
+
+def test_template_fills_slots():
+    template = SoapRequestTemplate(
+        "1.2.3.4",
+        8081,
+        "X-CTC_RemoteControl",
+        "X_CTC_RemoteKey",
+        {"InstanceID": "0", "KeyCode": f"{slot('command')}^ABC:123^userID:XYZ"},
+    )
+    assert template.slots == ("command",)
+    assert template.render(command="keyCode=0x0030") == build_envelope(
+        "X-CTC_RemoteControl",
+        "X_CTC_RemoteKey",
+        {"InstanceID": "0", "KeyCode": "keyCode=0x0030^ABC:123^userID:XYZ"},
+    )
+
+
+def test_template_escapes_slot_values():
+    template = SoapRequestTemplate("host", 1, "Service", "Action", {"Text": slot("text")})
+    assert "<Text>Tom &amp; Jerry &lt;3</Text>" in template.render(text="Tom & Jerry <3")
@@ -1,5 +1,11 @@
 from custom_components.magentatv.api import MediaReceiverStateMachine, State
-from custom_components.magentatv.api.event_model import EitChangedEvent, PlayContentEvent, ProgramInfo, ShortEvent
+from custom_components.magentatv.api.event_model import (
+    EitChangedEvent,
+    LazyEitChangedEvent,
+    PlayContentEvent,
+    ProgramInfo,
+    ShortEvent,
+)
 
 
 def assert_unknwon(sm: MediaReceiverStateMachine):
@@ -447,3 +453,31 @@ def test_on_pause_then_play():
     assert sm.chan_key == 2
     assert sm.duration == 1753
     assert sm.position == 1728
+
+
+def test_state_machine_deep_sleep_flag():
+    sm = MediaReceiverStateMachine()
+    assert sm.deep_sleep is False
+
+    sm.on_poll_player_state(PlayContentEvent(playBackState=0))
+    assert sm.deep_sleep is True
+
+    sm.on_poll_player_state(PlayContentEvent(chanKey=5, mediaCode="3710", mediaType=1, playBackState=1))
+    assert sm.deep_sleep is False
+
+
+def test_invalid_program_info_is_dropped():
+    sm = MediaReceiverStateMachine()
+    sm.on_event_eit_changed(
+        LazyEitChangedEvent(type="EVENT_EIT_CHANGE", channel_num=4, program_info=[{"event_id": "1"}, {}])
+    )
+    assert sm.chan_key == 4
+    assert sm.program_current is None
+    assert sm.program_next is None
+
+
+def test_missing_program_info_is_none():
+    sm = MediaReceiverStateMachine()
+    sm.on_event_eit_changed(LazyEitChangedEvent(type="EVENT_EIT_CHANGE", channel_num=4, program_info=[]))
+    assert sm.program_current is None
+    assert sm.program_next is None
@@ -0,0 +1,121 @@
+import pytest
+
+from custom_components.magentatv.api.subscription import (
+    RENEWAL_MARGIN,
+    RENEWAL_RETRY_DELAY,
+    RENEWAL_RETRY_MAXIMUM,
+    Subscription,
+    SubscriptionRegistry,
+    parse_timeout_header,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def callback(changes):
+    pass
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("Second-300", 300),
+        ("second-1800", 1800),
+        (" Second-60 ", 60),
+        ("Second-infinite", None),
+        (None, 120),
+        ("", 120),
+        ("Minute-5", 120),
+    ],
+)
+def test_parse_timeout_header(value, expected):
+    assert parse_timeout_header(value, 120) == expected
+
+
+def test_renews_before_expiry():
+    clock = FakeClock()
+    subscription = Subscription("uuid:1", ("10.0.0.2", 8081), "X-CTC_RemotePairing", callback, clock=clock)
+    assert subscription.renewal_due() is False
+    assert subscription.expired is False
+
+    subscription.on_granted(300)
+    assert subscription.renew_at == 1000 + 300 - RENEWAL_MARGIN
+
+    clock.now += 300 - RENEWAL_MARGIN
+    assert subscription.renewal_due() is True
+    assert subscription.expired is False
+
+    delay = subscription.on_renewal_failed()
+    assert RENEWAL_RETRY_DELAY * 0.9 <= delay <= RENEWAL_RETRY_DELAY * 1.1
+    assert subscription.renewal_due() is False
+    clock.now += delay
+    assert subscription.renewal_due() is True
+
+    clock.now += RENEWAL_MARGIN
+    assert subscription.expired is True
+
+
+def test_renewal_retries_back_off_until_granted():
+    clock = FakeClock()
+    subscription = Subscription("uuid:1", ("10.0.0.2", 8081), "X-CTC_RemotePairing", callback, clock=clock)
+    subscription.on_granted(300)
+    assert not subscription.retrying
+
+    delays = [subscription.on_renewal_failed() for _ in range(12)]
+    assert subscription.retrying
+    assert delays[1] > delays[0] * 1.5
+    assert max(delays) <= RENEWAL_RETRY_MAXIMUM * 1.1
+    assert subscription.renew_at == clock.now + delays[-1]
+
+    subscription.on_granted(300)
+    assert not subscription.retrying
+    assert subscription.on_renewal_failed() <= RENEWAL_RETRY_DELAY * 1.1
+
+
+def test_short_timeouts_renew_at_half_time():
+    clock = FakeClock()
+    subscription = Subscription("uuid:1", ("10.0.0.2", 8081), "X-CTC_RemotePairing", callback, clock=clock)
+    subscription.on_granted(20)
+    assert subscription.renew_at == 1010
+
+
+def test_infinite_subscription_is_never_renewed():
+    clock = FakeClock()
+    subscription = Subscription("uuid:1", ("10.0.0.2", 8081), "X-CTC_RemotePairing", callback, clock=clock)
+    subscription.on_granted(None)
+    clock.now += 100000
+    assert subscription.renewal_due() is False
+    assert subscription.expired is False
+
+
+def test_registry_lookups():
+    registry = SubscriptionRegistry()
+    pairing = Subscription("uuid:1", ("10.0.0.2", 8081), "X-CTC_RemotePairing", callback)
+    control = Subscription("uuid:2", ("10.0.0.2", 8081), "X-CTC_RemoteControl", callback)
+    other = Subscription("uuid:3", ("10.0.0.3", 8081), "X-CTC_RemotePairing", callback)
+    for subscription in [pairing, control, other]:
+        registry.add(subscription)
+
+    assert len(registry) == 3
+    assert registry.get("uuid:2") is control
+    assert registry.get_service(("10.0.0.2", 8081), "X-CTC_RemotePairing") is pairing
+    assert registry.get_service(("10.0.0.4", 8081), "X-CTC_RemotePairing") is None
+    assert registry.for_target(("10.0.0.2", 8081)) == [pairing, control]
+
+    registry.rekey(pairing, "uuid:4")
+    assert pairing.sid == "uuid:4"
+    assert registry.get("uuid:1") is None
+    assert registry.get("uuid:4") is pairing
+    assert registry.get_service(("10.0.0.2", 8081), "X-CTC_RemotePairing") is pairing
+
+    registry.remove(pairing)
+    registry.remove(control)
+    assert pairing not in registry
+    assert registry.for_target(("10.0.0.2", 8081)) == []
+    assert list(registry) == [other]
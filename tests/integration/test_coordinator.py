@@ -0,0 +1,54 @@
+from unittest.mock import Mock
+
+from homeassistant.const import CONF_HOST, CONF_ID, CONF_PORT
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.magentatv.api.event_model import PLAYER_STATE_PARSER
+from custom_components.magentatv.const import DOMAIN
+from custom_components.magentatv.coordinator import MagentaTvCoordinator
+
+MOCK_POLL_RESPONSE = PLAYER_STATE_PARSER.validate_python(
+    {
+        "chanKey": "5",
+        "duration": "15",
+        "mediaCode": "3710",
+        "mediaType": "1",
+        "playBackState": "1",
+        "playPostion": "15",
+    }
+)
+
+
+async def test_listeners_share_poll_and_subscription(hass: HomeAssistant, mock_api_client: Mock):
+    """Test any number of listeners are served by a single poll and a single event subscription"""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.is_subscription_healthy.return_value = False
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+
+    entry = MockConfigEntry(
+        domain=DOMAIN, unique_id="abcdefg", data={CONF_HOST: "1.2.3.4", CONF_PORT: "1234", CONF_ID: "abcdefg"}
+    )
+    entry.add_to_hass(hass)
+    coordinator = MagentaTvCoordinator(hass, entry, client=mock_api_client, coalescing_window=0)
+
+    updates = []
+    for listener in range(3):
+        coordinator.async_add_listener(lambda listener=listener: updates.append(listener))
+
+    await coordinator.async_warm_up()
+    await coordinator.async_warm_up()
+    assert coordinator.last_update_success
+    assert coordinator.data.available
+    mock_api_client.async_get_player_state.assert_awaited_once()
+    mock_api_client.subscribe.assert_called_once()
+    assert sorted(updates) == [0, 1, 2]
+
+    updates.clear()
+    on_event = mock_api_client.subscribe.call_args[0][0]
+    await on_event({"STB_playContent": '{"new_play_mode":4,"playBackState":1,"mediaType":1,"mediaCode":"3710"}'})
+    assert sorted(updates) == [0, 1, 2]
+
+    await coordinator.async_close()
+    mock_api_client.unsubscribe.assert_called_once_with(on_event)
+    mock_api_client.async_close.assert_awaited_once()
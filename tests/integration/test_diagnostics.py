@@ -0,0 +1,56 @@
+from unittest.mock import Mock
+
+from homeassistant.const import CONF_HOST, CONF_ID, CONF_PORT
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.magentatv.api.advertise import AdvertiseCacheStats
+from custom_components.magentatv.api.dispatch import DispatchStats
+from custom_components.magentatv.api.event_buffer import EventBufferStats
+from custom_components.magentatv.api.event_model import PLAYER_STATE_PARSER
+from custom_components.magentatv.api.notify_server import LifecycleStats
+from custom_components.magentatv.api.session import ConnectionPoolStats
+from custom_components.magentatv.api.subscription import SubscriptionStats
+from custom_components.magentatv.const import CONF_USER_ID, CONF_VERIFICATION_CODE, DOMAIN
+from custom_components.magentatv.diagnostics import async_get_config_entry_diagnostics
+
+
+async def test_diagnostics_report_counters(hass: HomeAssistant, mock_api_client: Mock, mock_notify_server: Mock):
+    """Test the counters of the notify server and the receiver are reported, without the secrets"""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_get_player_state.return_value = PLAYER_STATE_PARSER.validate_python({"playBackState": "1"})
+    mock_api_client.connection_stats = ConnectionPoolStats()
+    mock_api_client.listener_stats = {}
+    subscription_stats = SubscriptionStats()
+    subscription_stats.lapsed = 2
+    mock_notify_server.subscription_stats = subscription_stats
+    mock_notify_server.buffer_stats = EventBufferStats()
+    mock_notify_server.dispatch_stats = DispatchStats()
+    mock_notify_server.lifecycle_stats = LifecycleStats()
+    mock_notify_server.advertise_cache_stats = AdvertiseCacheStats()
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="abcdefg",
+        title="Livingroom TV Receiver",
+        data={
+            CONF_HOST: "1.2.3.4",
+            CONF_PORT: "1234",
+            CONF_ID: "abcdefg",
+            CONF_USER_ID: "1234567890",
+            CONF_VERIFICATION_CODE: "CODE",
+        },
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"][CONF_USER_ID] == "**REDACTED**"
+    assert diagnostics["entry"]["data"][CONF_VERIFICATION_CODE] == "**REDACTED**"
+    assert diagnostics["receiver"]["available"] is True
+    assert diagnostics["receiver"]["connections"] == {"opened": 0, "reused": 0}
+    assert diagnostics["notify_server"]["subscriptions"] == {"lapsed": 2, "recovered": 0}
+    assert diagnostics["notify_server"]["dispatch"]["average_latency"] == 0
+    assert diagnostics["notify_server"]["advertise_cache"]["hit_rate"] == 0
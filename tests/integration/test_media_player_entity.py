@@ -1,13 +1,17 @@
 """Test sensor for simple integration."""
 
+import asyncio
 import datetime
 from unittest.mock import AsyncMock, Mock, call
 
+import pytest
+import voluptuous as vol
 from freezegun import freeze_time
 from homeassistant.components.media_player import (
     MediaPlayerEntityFeature,
     MediaType,
 )
+from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import (
     ATTR_MANUFACTURER,
     CONF_HOST,
@@ -16,13 +20,16 @@ from homeassistant.const import (
     CONF_PORT,
     CONF_TYPE,
     CONF_URL,
+    EVENT_STATE_CHANGED,
 )
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.magentatv.api import KeyCode
-from custom_components.magentatv.api.exceptions import CommunicationException
-from custom_components.magentatv.const import CONF_USER_ID, DOMAIN
+import custom_components.magentatv.media_player
+from custom_components.magentatv.api import KeyCode, KeyTiming
+from custom_components.magentatv.api.event_model import PLAYER_STATE_PARSER
+from custom_components.magentatv.api.exceptions import CommunicationException, NotPairedException
+from custom_components.magentatv.const import CONF_USER_ID, CONF_VERIFICATION_CODE, DATA_COALESCING_WINDOW, DOMAIN
 
 MOCK_CONFIG_ENTRY = MockConfigEntry(
     domain=DOMAIN,
@@ -40,25 +47,37 @@ MOCK_CONFIG_ENTRY = MockConfigEntry(
     },
 )
 
-MOCK_POLL_RESPONSE = {
-    "chanKey": "5",
-    "duration": "15",
-    "mediaCode": "3710",
-    "mediaType": "1",
-    "playBackState": "1",
-    "playPostion": "15",
-}
-
-MOCK_POLL_RESPONSE_OFF = {"playBackState": "0"}
-MOCK_POLL_RESPONSE_PAUSE = {
-    "chanKey": "2",
-    "duration": "1733",
-    "fastSpeed": "0",
-    "mediaCode": "3733",
-    "mediaType": "1",
-    "playBackState": "1",
-    "playPostion": "1718",
-}
+MOCK_POLL_RESPONSE = PLAYER_STATE_PARSER.validate_python(
+    {
+        "chanKey": "5",
+        "duration": "15",
+        "mediaCode": "3710",
+        "mediaType": "1",
+        "playBackState": "1",
+        "playPostion": "15",
+    }
+)
+
+MOCK_EIT_CHANGED_EVENT_104 = '{"type":"EVENT_EIT_CHANGE","instance_id":23,"channel_code":"378","channel_num":"104","mediaId":"3710","program_info":[{},{}]}'
+
+MOCK_ZAPPING_EVENTS = [
+    {"STB_playContent": '{"new_play_mode":20,"playBackState":1,"mediaType":1,"mediaCode":"3710"}'},
+    {"STB_EitChanged": MOCK_EIT_CHANGED_EVENT_104},
+    {"STB_playContent": '{"new_play_mode":4,"playBackState":1,"mediaType":1,"mediaCode":"3710"}'},
+]
+
+MOCK_POLL_RESPONSE_OFF = PLAYER_STATE_PARSER.validate_python({"playBackState": "0"})
+MOCK_POLL_RESPONSE_PAUSE = PLAYER_STATE_PARSER.validate_python(
+    {
+        "chanKey": "2",
+        "duration": "1733",
+        "fastSpeed": "0",
+        "mediaCode": "3733",
+        "mediaType": "1",
+        "playBackState": "1",
+        "playPostion": "1718",
+    }
+)
 
 
 @freeze_time("2012-01-01")
@@ -72,7 +91,7 @@ async def test_entity_loads_data(hass, mock_api_client):
 
     entry.add_to_hass(hass)
     await hass.config_entries.async_setup(entry.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     state = hass.states.get("media_player.livingroom_tv_receiver")
 
@@ -91,13 +110,17 @@ async def test_entity_loads_data(hass, mock_api_client):
         "media_position_updated_at": datetime.datetime(2012, 1, 1),
         "device_class": "receiver",
         "friendly_name": "Livingroom TV Receiver",
+        "poll_interval": 10.0,
+        "state_writes_per_minute": 1,
         "supported_features": 0
         | MediaPlayerEntityFeature.PAUSE
         | MediaPlayerEntityFeature.NEXT_TRACK
         | MediaPlayerEntityFeature.PREVIOUS_TRACK
         | MediaPlayerEntityFeature.TURN_OFF
-        | MediaPlayerEntityFeature.VOLUME_STEP,
+        | MediaPlayerEntityFeature.VOLUME_STEP
+        | MediaPlayerEntityFeature.PLAY_MEDIA,
     }
+    assert {"poll_interval", "state_writes_per_minute"} <= state.state_info["unrecorded_attributes"]
 
 
 async def test_entity_unavailble(hass, mock_api_client):
@@ -110,7 +133,7 @@ async def test_entity_unavailble(hass, mock_api_client):
 
     entry.add_to_hass(hass)
     await hass.config_entries.async_setup(entry.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     state = hass.states.get("media_player.livingroom_tv_receiver")
 
@@ -118,13 +141,155 @@ async def test_entity_unavailble(hass, mock_api_client):
     assert state.state == "unavailable"
 
 
+async def test_setup_retried_when_notify_server_cannot_listen(
+    hass: HomeAssistant, mock_api_client: Mock, mock_notify_server: Mock
+):
+    """Test a listen port in use makes Home Assistant retry the setup, which starts the notify server again"""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+    mock_notify_server.async_start.side_effect = [OSError(98, "Address already in use"), None, None]
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done()
+    assert MOCK_CONFIG_ENTRY.state is ConfigEntryState.SETUP_RETRY
+
+    await hass.config_entries.async_reload(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert MOCK_CONFIG_ENTRY.state is ConfigEntryState.LOADED
+    assert hass.states.get("media_player.livingroom_tv_receiver").state == "playing"
+
+
+async def test_entity_added_before_warm_up(hass: HomeAssistant, mock_api_client: Mock):
+    """Test a receiver slow to answer the first poll does not hold up adding the entity"""
+    answered = asyncio.Event()
+
+    async def get_player_state():
+        await answered.wait()
+        return MOCK_POLL_RESPONSE
+
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_get_player_state.side_effect = get_player_state
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done()
+
+    state = hass.states.get("media_player.livingroom_tv_receiver")
+    assert state
+    assert state.state == "unavailable"
+
+    answered.set()
+    await hass.async_block_till_done(wait_background_tasks=True)
+    assert hass.states.get("media_player.livingroom_tv_receiver").state == "playing"
+
+
+async def test_pairing_is_stored_in_config_entry(hass: HomeAssistant, mock_api_client: Mock):
+    """Test the verification code of a pairing is stored, the next start reuses it"""
+    mock_api_client.is_paired.return_value = False
+    mock_api_client.async_pair.return_value = "CODE"
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+
+    entry = MockConfigEntry(
+        domain=DOMAIN, unique_id="abcdefg", title="Livingroom TV Receiver", data=MOCK_CONFIG_ENTRY.data
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    mock_api_client.async_pair.assert_awaited_once()
+    assert entry.data[CONF_VERIFICATION_CODE] == "CODE"
+
+    await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client_class = custom_components.magentatv.media_player.Client
+    assert client_class.call_args.kwargs["verification_code"] == "CODE"
+
+
+async def test_pairs_again_when_verification_code_is_rejected(hass: HomeAssistant, mock_api_client: Mock):
+    """Test a rejected verification code leads to a new pairing"""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_pair.return_value = "NEW CODE"
+    mock_api_client.async_get_player_state.side_effect = [NotPairedException(), MOCK_POLL_RESPONSE]
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="abcdefg",
+        title="Livingroom TV Receiver",
+        data={**MOCK_CONFIG_ENTRY.data, CONF_VERIFICATION_CODE: "CODE"},
+    )
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    mock_api_client.async_pair.assert_awaited_once()
+    assert entry.data[CONF_VERIFICATION_CODE] == "NEW CODE"
+    assert hass.states.get("media_player.livingroom_tv_receiver").state == "playing"
+
+
+async def test_entity_unavailable_when_new_pairing_is_rejected(hass: HomeAssistant, mock_api_client: Mock):
+    """Test the receiver rejecting the code of a new pairing as well makes the entity unavailable"""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_pair.return_value = "NEW CODE"
+    mock_api_client.async_get_player_state.side_effect = NotPairedException()
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    mock_api_client.async_pair.assert_awaited_once()
+    assert mock_api_client.async_get_player_state.await_count == 2
+    assert hass.states.get("media_player.livingroom_tv_receiver").state == "unavailable"
+
+
+async def _async_zap(hass: HomeAssistant, mock_api_client: Mock, coalescing_window: float) -> list[str]:
+    """Send the events of a channel change and return the states written meanwhile."""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+    hass.data.setdefault(DOMAIN, {})[DATA_COALESCING_WINDOW] = coalescing_window
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    written = []
+    hass.bus.async_listen(EVENT_STATE_CHANGED, lambda event: written.append(event.data["new_state"].state))
+
+    on_event = mock_api_client.subscribe.call_args[0][0]
+    for changes in MOCK_ZAPPING_EVENTS:
+        await on_event(changes)
+    await asyncio.sleep(coalescing_window * 2)
+    await hass.async_block_till_done()
+    return written
+
+
+async def test_events_without_coalescing_write_every_state(hass: HomeAssistant, mock_api_client: Mock):
+    """Test a coalescing window of zero, every event is written including the intermediate buffering state"""
+    written = await _async_zap(hass, mock_api_client, coalescing_window=0)
+
+    assert written == ["buffering", "buffering", "playing"]
+    state = hass.states.get("media_player.livingroom_tv_receiver")
+    assert state.attributes["state_writes_per_minute"] == 4
+
+
+async def test_events_coalesced_to_one_state_write(hass: HomeAssistant, mock_api_client: Mock):
+    """Test a burst of events within the coalescing window, all are applied but only the final state is written"""
+    written = await _async_zap(hass, mock_api_client, coalescing_window=0.05)
+
+    assert written == ["playing"]
+    state = hass.states.get("media_player.livingroom_tv_receiver")
+    assert state.attributes["state_writes_per_minute"] == 2
+    assert state.attributes["media_duration"] == 0
+
+
 async def test_send_key_service(hass: HomeAssistant, mock_api_client: Mock):
     """Test sending a key to the receiver. Test checks if the client is called"""
     mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service(DOMAIN, "send_key")
     await hass.services.async_call(
@@ -141,6 +306,106 @@ async def test_send_key_service(hass: HomeAssistant, mock_api_client: Mock):
     send_key_method.assert_awaited_once_with(KeyCode.NUM0)
 
 
+async def test_send_keys_service(hass: HomeAssistant, mock_api_client: Mock):
+    """Test sending a key sequence to the receiver. Test checks if the client is called and timings are returned"""
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+    mock_api_client.async_send_keys.return_value = [
+        KeyTiming(key=KeyCode.NUM1, sent=0.0, latency=0.02),
+        KeyTiming(key=KeyCode.NUM0, sent=0.05, latency=0.02),
+    ]
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert hass.services.has_service(DOMAIN, "send_keys")
+    response = await hass.services.async_call(
+        domain=DOMAIN,
+        service="send_keys",
+        blocking=True,
+        return_response=True,
+        service_data={
+            "key_codes": ["NUM1", "NUM0"],
+            "inter_key_delay": 0.05,
+            "entity_id": "media_player.livingroom_tv_receiver",
+        },
+    )
+
+    send_keys_method: AsyncMock = mock_api_client.async_send_keys
+    send_keys_method.assert_awaited_once_with([KeyCode.NUM1, KeyCode.NUM0], inter_key_delay=0.05)
+    assert response == {
+        "media_player.livingroom_tv_receiver": {
+            "timings": [
+                {"key_code": "NUM1", "sent": 0.0, "latency": 0.02},
+                {"key_code": "NUM0", "sent": 0.05, "latency": 0.02},
+            ]
+        }
+    }
+
+
+async def test_send_keys_service_rejects_unknown_key(hass: HomeAssistant, mock_api_client: Mock):
+    """Test a mistyped key name fails the validation of the service call, nothing is sent"""
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    with pytest.raises(vol.Invalid, match="Unknown key code num2"):
+        await hass.services.async_call(
+            domain=DOMAIN,
+            service="send_keys",
+            blocking=True,
+            return_response=True,
+            service_data={"key_codes": ["NUM1", "num2"], "entity_id": "media_player.livingroom_tv_receiver"},
+        )
+    mock_api_client.async_send_keys.assert_not_awaited()
+
+
+async def test_play_media_tunes_channel(hass: HomeAssistant, mock_api_client: Mock):
+    """Test tuning a channel. The keys are sent in one sequence and the change is confirmed by an event"""
+    mock_api_client.is_paired.return_value = True
+    mock_api_client.async_get_player_state.return_value = MOCK_POLL_RESPONSE
+
+    MOCK_CONFIG_ENTRY.add_to_hass(hass)
+    await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    on_event = mock_api_client.subscribe.call_args[0][0]
+
+    async def _async_confirm_channel(*args, **kwargs):
+        await on_event({"STB_EitChanged": MOCK_EIT_CHANGED_EVENT_104})
+
+    mock_api_client.async_send_keys.side_effect = _async_confirm_channel
+
+    response = await hass.services.async_call(
+        domain=DOMAIN,
+        service="tune_channel",
+        blocking=True,
+        return_response=True,
+        service_data={"channel": 104, "entity_id": "media_player.livingroom_tv_receiver"},
+    )
+
+    send_keys_method: AsyncMock = mock_api_client.async_send_keys
+    send_keys_method.assert_awaited_once_with([KeyCode.NUM1, KeyCode.NUM0, KeyCode.NUM4])
+    result = response["media_player.livingroom_tv_receiver"]
+    assert result["channel"] == 104
+    assert result["confirmed"] is True
+    assert result["latency"] >= 0
+
+    await hass.services.async_call(
+        domain="media_player",
+        service="play_media",
+        blocking=True,
+        service_data={
+            "media_content_type": MediaType.CHANNEL,
+            "media_content_id": "104",
+            "entity_id": "media_player.livingroom_tv_receiver",
+        },
+    )
+    assert send_keys_method.await_count == 2
+
+
 async def test_service_power_off(hass: HomeAssistant, mock_api_client: Mock):
     """Test sending a key to the receiver. Test checks if the client is called"""
     mock_api_client.is_paired.return_value = True
@@ -148,7 +413,7 @@ async def test_service_power_off(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "turn_off")
     await hass.services.async_call(
@@ -171,7 +436,7 @@ async def test_service_power_on(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "turn_on")
     await hass.services.async_call(
@@ -194,7 +459,7 @@ async def test_service_volume_up(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "volume_up")
     await hass.services.async_call(
@@ -215,7 +480,7 @@ async def test_service_volume_down(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "volume_down")
     await hass.services.async_call(
@@ -236,7 +501,7 @@ async def test_service_channel_up(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "media_next_track")
     await hass.services.async_call(
@@ -257,7 +522,7 @@ async def test_service_channel_down(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "media_previous_track")
     await hass.services.async_call(
@@ -278,7 +543,7 @@ async def test_service_pause(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "media_pause")
     await hass.services.async_call(
@@ -299,7 +564,7 @@ async def test_service_play(hass: HomeAssistant, mock_api_client: Mock):
 
     MOCK_CONFIG_ENTRY.add_to_hass(hass)
     await hass.config_entries.async_setup(MOCK_CONFIG_ENTRY.entry_id)
-    await hass.async_block_till_done()
+    await hass.async_block_till_done(wait_background_tasks=True)
 
     assert hass.services.has_service("media_player", "media_play")
     await hass.services.async_call(
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from custom_components.magentatv.startup import StartupCoordinator
+
+
+async def test_receivers_warm_up_in_parallel_and_finish_together():
+    running = 0
+    max_running = 0
+    finished = []
+
+    def make_warm_up(seconds):
+        async def warm_up():
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(seconds)
+            running -= 1
+
+        return warm_up
+
+    async def start(receiver, seconds):
+        await coordinator.async_run(receiver, make_warm_up(seconds))
+        finished.append(receiver)
+
+    coordinator = StartupCoordinator(["a", "b", "c"], max_parallel=2)
+    task_a = asyncio.create_task(start("a", 0.01))
+    task_b = asyncio.create_task(start("b", 0.01))
+    await asyncio.sleep(0.05)
+    # a and b are warmed up, but wait for c
+    assert finished == []
+
+    await start("c", 0.01)
+    await asyncio.gather(task_a, task_b)
+    assert sorted(finished) == ["a", "b", "c"]
+    assert max_running == 2
+    assert coordinator.done
+    assert set(coordinator.timings) == {"a", "b", "c"}
+    assert coordinator.timings["c"].warm_up >= 0.01
+
+
+async def test_missing_receiver_delays_startup_until_timeout():
+    coordinator = StartupCoordinator(["a", "missing"], timeout=0.05)
+
+    async def warm_up():
+        pass
+
+    await asyncio.wait_for(coordinator.async_run("a", warm_up), 1)
+    assert not coordinator.done
+
+    # receivers added after startup do not wait
+    await asyncio.wait_for(coordinator.async_run("late", warm_up), 0.01)
+
+
+async def test_failing_warm_up_does_not_block_others():
+    coordinator = StartupCoordinator(["a", "b"])
+
+    async def failing():
+        raise ValueError()
+
+    async def working():
+        pass
+
+    task = asyncio.create_task(coordinator.async_run("a", working))
+    with pytest.raises(ValueError):
+        await coordinator.async_run("b", failing)
+    await asyncio.wait_for(task, 1)
+    assert coordinator.done
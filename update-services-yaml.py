@@ -20,6 +20,7 @@ key_options = [key.name for key in KeyCode]
 doc["send_key"]["fields"]["key_code"]["selector"]["select"]["options"] = [
     DoubleQuotedScalarString(v) for v in key_options
 ]
+# key_codes is a free text list, a select would not allow repeating a key
 
 yaml.indent(mapping=2, sequence=4, offset=2)
 with open(services_file, "w", encoding="utf-8") as f: